@@ -0,0 +1,222 @@
+# smartplate/ai_dispatcher.py
+"""Background queue for AI prompts, shared by every page that talks to Groq.
+
+A small pool of worker threads serves a bounded queue. Identical prompts that are queued or
+streaming at the same time share one API call, a newer request on the same channel cancels the
+older one, and each request's deadline is passed down to the Groq call. GroqClient (and the
+groq package) is only loaded when the first prompt is processed.
+"""
+from collections import deque
+import queue
+import threading
+import time
+import traceback
+from .cache import make_key, normalize_text
+
+AI_WORKERS = 2 # Concurrent Groq calls
+AI_QUEUE_SIZE = 8 # Prompts waiting beyond this are rejected instead of piling up
+AI_TIMEOUT_S = 45 # From submit to the last token, queue wait included
+LATENCY_SAMPLES = 200 # Recent requests kept for the latency percentiles
+
+class AiRequest:
+    """One prompt being answered; every caller asking the same thing at the same time shares it."""
+
+    def __init__(self, prompt, key, timeout_s, history=None):
+        self.prompt = prompt; self.key = key; self.timeout_s = timeout_s; self.history = history
+        self.submitted_at = time.perf_counter(); self.deadline = self.submitted_at + timeout_s
+        self.parts = []; self.subscribers = []; self.done = False
+        self.metrics = {"queue_wait_s": None, "ttft_s": None, "total_s": None, "error": False, "timed_out": False,
+                        "cancelled": False, "cached": None, "usage": None, "coalesced": 0}
+        self._cancel = threading.Event()
+
+    @property
+    def cancelled(self):
+        return self._cancel.is_set()
+
+    def remaining(self):
+        return self.deadline - time.perf_counter()
+
+    @property
+    def text(self):
+        return "".join(self.parts)
+
+class AiTicket:
+    """What AiDispatcher.submit returns to one caller. cancel() detaches that caller; the API call stops once nobody is left."""
+
+    def __init__(self, dispatcher, request, on_chunk, on_done, channel):
+        self.request = request; self.channel = channel
+        self._dispatcher = dispatcher; self._on_chunk = on_chunk; self._on_done = on_done; self.finished = False
+
+    def cancel(self):
+        self._dispatcher._detach(self)
+
+    def _chunk(self, text):
+        if self._on_chunk: self._on_chunk(text)
+
+    def _done(self, metrics):
+        if self.finished: return
+        self.finished = True
+        if self._on_done: self._on_done(metrics)
+
+class AiDispatcher:
+    """Bounded prompt queue served by a few worker threads, each with its own lazily created GroqClient."""
+
+    def __init__(self, workers=AI_WORKERS, queue_size=AI_QUEUE_SIZE, timeout_s=AI_TIMEOUT_S, client_factory=None):
+        self.workers = workers; self.timeout_s = timeout_s; self._client_factory = client_factory
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._lock = threading.RLock() # Reentrant: callbacks run under it and may cancel or submit
+        self._inflight = {} # normalized prompt -> AiRequest, while queued or streaming
+        self._channels = {} # channel -> latest AiTicket
+        self._threads = []; self._local = threading.local(); self._closed = False
+        self._counters = {"submitted": 0, "coalesced": 0, "rejected": 0, "cancelled": 0, "timeouts": 0, "completed": 0, "errors": 0}
+        self._latency = {name: deque(maxlen=LATENCY_SAMPLES) for name in ("queue_wait_s", "ttft_s", "total_s")}
+
+    # --- Public API ---
+    def submit(self, prompt, on_chunk=None, on_done=None, channel=None, timeout_s=None, history=None):
+        """Queues a prompt and returns an AiTicket.
+
+        on_chunk(text) and on_done(metrics) run on a worker thread and must be quick (e.g. put on a queue).
+        A later submit on the same `channel` cancels this one. If the same prompt is already queued or
+        streaming, the caller joins that request and first receives the text produced so far.
+        `history` is earlier conversation messages; only requests with the same history coalesce.
+        """
+        key = make_key(normalize_text(prompt), history=history) if history else normalize_text(prompt); rejected = None
+        with self._lock:
+            if self._closed: raise RuntimeError("AiDispatcher is shut down")
+            self._start_workers_locked(); self._counters["submitted"] += 1
+            previous = self._channels.get(channel) if channel is not None else None
+            request = self._inflight.get(key)
+            if request is not None: # Coalesce: one API call, several listeners
+                ticket = AiTicket(self, request, on_chunk, on_done, channel)
+                if request.parts: ticket._chunk(request.text)
+                request.subscribers.append(ticket); request.metrics["coalesced"] += 1; self._counters["coalesced"] += 1
+            else:
+                request = AiRequest(prompt, key, self.timeout_s if timeout_s is None else timeout_s, history)
+                ticket = AiTicket(self, request, on_chunk, on_done, channel); request.subscribers.append(ticket)
+                try: self._queue.put_nowait(request); self._inflight[key] = request
+                except queue.Full: self._counters["rejected"] += 1; rejected = request
+            if channel is not None: self._channels[channel] = ticket
+        if previous is not None and previous is not ticket: previous.cancel() # Joining first keeps a re-asked prompt alive
+        if rejected is not None:
+            print(f"[AiDispatcher] Queue full ({self._queue.maxsize}), rejecting '{prompt[:50]}...'")
+            rejected.metrics["error"] = True; self._deliver(rejected, "Error: Too many questions are waiting for the AI. Please try again in a moment.")
+            self._finish(rejected)
+        return ticket
+
+    def stats(self):
+        """Queue depth, in-flight count, event counters and latency percentiles in seconds."""
+        with self._lock:
+            s = dict(self._counters); s["queue_depth"] = self._queue.qsize(); s["in_flight"] = len(self._inflight); s["workers"] = len(self._threads)
+            for name, samples in self._latency.items():
+                values = sorted(samples)
+                s[name] = {"p50": _percentile(values, 0.50), "p95": _percentile(values, 0.95), "max": values[-1] if values else None}
+        return s
+
+    def shutdown(self):
+        """Cancels everything pending and stops the workers (they are daemons, so nothing waits on them)."""
+        with self._lock:
+            self._closed = True; requests = list(self._inflight.values())
+        for request in requests:
+            for ticket in list(request.subscribers): ticket.cancel()
+        for _ in self._threads:
+            try: self._queue.put_nowait(None)
+            except queue.Full: break
+
+    # --- Workers ---
+    def _start_workers_locked(self):
+        while len(self._threads) < self.workers:
+            thread = threading.Thread(target=self._work, name=f"smartplate-ai-{len(self._threads)}", daemon=True)
+            self._threads.append(thread); thread.start()
+
+    def _client(self):
+        """This worker's GroqClient, created on the first prompt it serves and reconfigured after key changes."""
+        client = getattr(self._local, "client", None)
+        if client is None:
+            if self._client_factory is None:
+                from .groq_client import GroqClient # groq is only imported once the AI is actually used
+                self._client_factory = GroqClient
+            client = self._local.client = self._client_factory()
+        else: client.refresh_credentials()
+        return client
+
+    def _work(self):
+        while True:
+            request = self._queue.get()
+            if request is None: return
+            try: self._serve(request)
+            except Exception as e:
+                print(f"[AiDispatcher] ERROR serving '{request.prompt[:50]}...': {e}\n{traceback.format_exc()}")
+                request.metrics["error"] = True; self._deliver(request, f"Error: An unexpected error occurred while contacting Groq ({type(e).__name__}).")
+            finally: self._finish(request)
+
+    def _serve(self, request):
+        m = request.metrics; m["queue_wait_s"] = time.perf_counter() - request.submitted_at
+        if request.cancelled: return
+        if request.remaining() <= 0:
+            m["timed_out"] = True; self._deliver(request, f"Error: The question waited more than {request.timeout_s:g}s for the AI. Please try again."); return
+        client = self._client(); stream = client.stream_response(request.prompt, timeout_s=request.remaining(), history=request.history)
+        try:
+            for text in stream:
+                if request.cancelled: break
+                if request.remaining() <= 0: m["timed_out"] = True; break
+                self._deliver(request, text)
+        finally: stream.close() # Stops the HTTP stream when we broke out early
+        if m["timed_out"]: # Our deadline, not the SDK's: whatever arrived after it was dropped
+            self._deliver(request, f"{chr(10) * 2 if request.parts else ''}Error: No complete answer from the AI within {request.timeout_s:g}s.")
+        client_metrics = client.last_metrics
+        m["cached"] = client_metrics.get("cached"); m["usage"] = client_metrics.get("usage"); m["error"] = client_metrics.get("error", False)
+        m["timed_out"] = m["timed_out"] or client_metrics.get("timed_out", False)
+
+    def _deliver(self, request, text):
+        with self._lock:
+            if not request.parts: request.metrics["ttft_s"] = time.perf_counter() - request.submitted_at
+            request.parts.append(text)
+            for ticket in request.subscribers: ticket._chunk(text)
+
+    def _finish(self, request):
+        with self._lock:
+            if request.done: return
+            request.done = True; m = request.metrics; m["total_s"] = time.perf_counter() - request.submitted_at
+            if m["timed_out"]: m["error"] = True
+            if self._inflight.get(request.key) is request: del self._inflight[request.key]
+            tickets = list(request.subscribers); request.subscribers.clear()
+            for ticket in tickets:
+                if self._channels.get(ticket.channel) is ticket: del self._channels[ticket.channel]
+            if not request.cancelled:
+                self._counters["timeouts" if m["timed_out"] else "errors" if m["error"] else "completed"] += 1
+                for name, samples in self._latency.items():
+                    if m[name] is not None: samples.append(m[name])
+        for ticket in tickets: ticket._done(dict(m))
+        if not request.cancelled:
+            ttft = f"{m['ttft_s']:.2f}s" if m["ttft_s"] is not None else "-"
+            print(f"[AiDispatcher] Done in {m['total_s']:.2f}s (queued {m['queue_wait_s'] or 0:.2f}s, first text {ttft}, {len(tickets)} listener(s))")
+
+    def _detach(self, ticket):
+        with self._lock:
+            request = ticket.request
+            if ticket not in request.subscribers: return # Already finished or cancelled
+            request.subscribers.remove(ticket)
+            if self._channels.get(ticket.channel) is ticket: del self._channels[ticket.channel]
+            if not request.subscribers and not request.done: # Nobody is waiting for this answer any more
+                request._cancel.set(); request.metrics["cancelled"] = True; self._counters["cancelled"] += 1
+                if self._inflight.get(request.key) is request: del self._inflight[request.key]
+                print(f"[AiDispatcher] Cancelled '{request.prompt[:50]}...'")
+        ticket._done(dict(request.metrics, cancelled=True))
+
+def _percentile(values, q):
+    return values[min(len(values) - 1, int(q * len(values)))] if values else None
+
+_dispatcher = None
+_dispatcher_lock = threading.Lock()
+
+def get_dispatcher():
+    """The shared dispatcher; its workers start with the first submitted prompt."""
+    global _dispatcher
+    if _dispatcher is None:
+        with _dispatcher_lock:
+            if _dispatcher is None: _dispatcher = AiDispatcher()
+    return _dispatcher
+
+def shutdown_dispatcher():
+    """Called on exit; does nothing if the AI was never used."""
+    if _dispatcher is not None: _dispatcher.shutdown()
\ No newline at end of file
@@ -1,10 +1,18 @@
 # smartplate/ui/analytics_page.py
 import tkinter as tk
+from tkinter import ttk
 from .base_page import BasePage
 from .widgets import ThemedLabel
+from ..chart_renderer import (TODAY_KEYS, build_today, update_today, build_trend, update_trend, trend_payload, data_version,
+                              get_chart_renderer, use_process_render)
 from matplotlib.figure import Figure
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
-import matplotlib.pyplot as plt
+import numpy as np
+import base64
+
+TODAY_VIEW = "Today"
+TREND_VIEW_NAMES = ["7 days", "30 days", "90 days", "365 days"] # Keys of trends.TREND_VIEWS
+TREND_METRIC_NAMES = {"Calories": "calories", "Protein": "protein_g", "Carbs": "carbs_g", "Fat": "fat_g", "Fiber": "fiber_g", "Sugar": "sugar_g", "Sodium": "sodium_mg"}
 
 class AnalyticsPage(BasePage):
     PAGE_NAME = "Analytics"
@@ -13,56 +21,118 @@ class AnalyticsPage(BasePage):
         self.user = user; super().__init__(master)
 
     def build(self):
-        title_frame = tk.Frame(self, bg=self.theme.bg())
+        title_frame = tk.Frame(self); self.theme.register(title_frame, lambda p: title_frame.config(bg=p['bg']))
         title_frame.pack(fill="x", padx=20, pady=(10, 0))
-        ThemedLabel(title_frame, text="Today's Nutritional Summary", font=("Segoe UI", 18, "bold"), foreground=self.theme.accent()).pack(side="left")
+        self.title_label = ThemedLabel(title_frame, text="Today's Nutritional Summary", font=("Segoe UI", 18, "bold"), style="Accent.TLabel")
+        self.title_label.pack(side="left")
+
+        # View and metric pickers (the metric only applies to trend views)
+        self.metric_box = ttk.Combobox(title_frame, values=list(TREND_METRIC_NAMES), style='TCombobox', state='readonly', width=10); self.metric_box.set("Calories")
+        self.metric_box.pack(side="right", padx=(5, 0)); self.metric_box.bind("<<ComboboxSelected>>", lambda e: self.draw_chart())
+        self.view_box = ttk.Combobox(title_frame, values=[TODAY_VIEW] + TREND_VIEW_NAMES, style='TCombobox', state='readonly', width=10); self.view_box.set(TODAY_VIEW)
+        self.view_box.pack(side="right"); self.view_box.bind("<<ComboboxSelected>>", lambda e: self.draw_chart())
+        ThemedLabel(title_frame, text="Show:").pack(side="right", padx=5)
 
-        chart_frame = tk.Frame(self, bg=self.theme.bg())
+        chart_frame = tk.Frame(self); self.chart_frame = chart_frame; self.theme.register(chart_frame, lambda p: chart_frame.config(bg=p['bg']))
         chart_frame.pack(fill="both", expand=True, padx=20, pady=10)
         self.fig = Figure(figsize=(8, 6), dpi=100)
         self.ax = self.fig.add_subplot(111)
         self.canvas = FigureCanvasTkAgg(self.fig, master=chart_frame)
         self.canvas.get_tk_widget().pack(fill="both", expand=True)
+        self.chart = None # Key and artists of what's on the canvas now
+        self.last_render = None # (render method, data) of the current chart, replayed with the new palette on a theme change
+        self.image_label = tk.Label(chart_frame, bd=0); self.chart_image = None # Shows off-thread renders
+        self.theme.register(self.image_label, lambda p: self.image_label.config(bg=p['bg']))
+        self.theme.register(self.canvas.get_tk_widget(), self.recolor_chart)
+        self._resize_job = None; chart_frame.bind("<Configure>", self.on_chart_resize)
 
     def draw_chart(self):
         from ..db import get_all_nutrition_for_today
-        self.ax.clear(); p = self.theme.palette(); self.fig.patch.set_facecolor(p['bg'])
-        text_props = {'color': p['text'], 'fontsize': 10}
-
-        if self.user['id'] == 0:
-            self.ax.text(0.5, 0.5, "Please log in to track analytics", ha='center', va='center', fontsize=12, color=p['text'])
-            self.ax.set_axis_off(); self.canvas.draw(); return
-
-        data = get_all_nutrition_for_today(self.user['id'])
-
-        if not data or data.get('total_calories', 0) == 0:
-            self.ax.text(0.5, 0.5, "No data logged for today", ha='center', va='center', fontsize=12, color=p['text'])
-            self.ax.set_axis_off(); self.canvas.draw(); return
-
-        # --- ✅ Update Labels with Units ---
-        labels = ['Sodium (mg)', 'Sugar (g)', 'Fiber (g)', 'Fat (g)', 'Carbs (g)', 'Protein (g)', 'Calories (kcal)']
-        # --- End Update ---
-        values = [
-            data.get('total_sodium', 0), data.get('total_sugar', 0), data.get('total_fiber', 0),
-            data.get('total_fat', 0), data.get('total_carbs', 0), data.get('total_protein', 0),
-            data.get('total_calories', 0)
-        ]
-
-        y_pos = range(len(labels))
-        bars = self.ax.barh(y_pos, values, align='center', color=p['accent'])
-        self.ax.set_yticks(y_pos, labels=labels, **text_props, weight='bold')
-        self.ax.invert_yaxis()
-        self.ax.set_xlabel('Total Amount', **text_props)
-        self.ax.set_title("Today's Nutrient Totals", **text_props, weight='bold', size=14)
-
-        self.ax.set_facecolor(p['panel'])
-        self.ax.tick_params(axis='x', colors=p['text'])
-        self.ax.tick_params(axis='y', colors=p['text'])
-        self.ax.spines['top'].set_visible(False); self.ax.spines['right'].set_visible(False)
-        self.ax.spines['left'].set_color(p['muted']); self.ax.spines['bottom'].set_color(p['muted'])
-
-        self.ax.bar_label(bars, fmt='%.1f', padding=5, color=p['text'], fontsize=9)
-        if values: # Avoid error if values list is empty
-            self.ax.set_xlim(right=max(values or [0]) * 1.15) # Ensure right limit is valid
-
-        self.canvas.draw()
\ No newline at end of file
+        if self.user['id'] == 0: self.show_message("Please log in to track analytics"); return
+        view = self.view_box.get()
+        if view != TODAY_VIEW: self.draw_trend(view); return
+        self.title_label.config(text="Today's Nutritional Summary")
+
+        # The query runs on a worker; the previous chart stays up until the new totals arrive
+        self.run_db(get_all_nutrition_for_today, self.user['id'], key="chart", on_success=self.render_chart,
+                    on_error=lambda e: self.show_message(f"Could not load today's totals: {e}"))
+
+    def draw_trend(self, view):
+        from ..trends import TREND_VIEWS, get_trend
+        days, window = TREND_VIEWS[view]; self.title_label.config(text=f"Nutrition Trends ({view})")
+        self.run_db(get_trend, self.user['id'], days, window, key="chart", on_success=self.render_trend,
+                    on_error=lambda e: self.show_message(f"Could not load trends: {e}"))
+    # --- Rendering: artists are built once per chart type and palette, then updated in place ---
+    def chart_key(self, mode, *parts):
+        """Identity of the chart layout; any change to it (including the theme palette) means a full rebuild."""
+        return (mode,) + parts + tuple(sorted(self.theme.palette().items()))
+
+    def show_canvas(self):
+        """Puts the live matplotlib canvas back in place of a rendered image."""
+        if self.image_label.winfo_ismapped(): self.image_label.pack_forget(); self.canvas.get_tk_widget().pack(fill="both", expand=True)
+
+    def recolor_chart(self, p):
+        """Theme change: redraws the current chart from the data it already has (no query)."""
+        self.canvas.get_tk_widget().config(bg=p['bg'], highlightbackground=p['bg']); self.fig.patch.set_facecolor(p['bg'])
+        if self.last_render: render, data = self.last_render; render(data) # Its chart key includes the palette, so it rebuilds
+        else: self.canvas.draw_idle()
+
+    def show_message(self, text):
+        self.last_render = (self.show_message, text)
+        key = self.chart_key("message", text)
+        if self.chart and self.chart["key"] == key: return # Already showing it
+        self.show_canvas(); p = self.theme.palette(); self.ax.clear(); self.fig.patch.set_facecolor(p['bg'])
+        self.ax.text(0.5, 0.5, text, ha='center', va='center', fontsize=12, color=p['text'])
+        self.ax.set_axis_off(); self.chart = {"key": key}; self.canvas.draw_idle()
+
+    def render_chart(self, data):
+        """Today's totals as horizontal bars; revisits only move the bars and labels (or skip drawing if nothing changed)."""
+        if not data or data.get('total_calories', 0) == 0: self.show_message("No data logged for today"); return
+        self.last_render = (self.render_chart, data)
+        values = [float(data.get(k) or 0) for k in TODAY_KEYS]
+        key = self.chart_key("today"); self.show_canvas()
+        if not self.chart or self.chart["key"] != key: self.chart = dict(build_today(self.fig, self.ax, self.theme.palette()), key=key, data=None)
+        elif self.chart["data"] == values: return # Same totals as the last visit: nothing to redraw
+        update_today(self.ax, self.chart, values)
+        self.chart["data"] = values; self.canvas.draw_idle()
+
+    def render_trend(self, trend):
+        """Daily values (bars, or a thin line for the year view) with the rolling average over them."""
+        from ..trends import TREND_METRICS
+        metric = TREND_METRIC_NAMES[self.metric_box.get()]; label, unit = TREND_METRICS[metric]; data = trend["series"][metric]
+        if not trend["days_logged"]: self.show_message(f"No meals logged in the last {trend['days']} days"); return
+        self.last_render = (self.render_trend, trend)
+        if use_process_render(trend["days"]): self.render_trend_image(trend_payload(trend, metric, label, unit)); return
+        key = self.chart_key("trend", trend["days"], label, str(trend["dates"][0])); self.show_canvas() # A new day shifts the x axis: rebuild
+        if not self.chart or self.chart["key"] != key: self.chart = dict(build_trend(self.fig, self.ax, trend, label, unit, self.theme.palette()), key=key, data=None)
+        elif all(np.array_equal(self.chart["data"][name], data[name], equal_nan=True) for name in ("daily", "rolling")): return
+        update_trend(self.ax, self.chart, trend, label, unit, data)
+        self.chart["data"] = {"daily": data["daily"].copy(), "rolling": data["rolling"].copy()}; self.canvas.draw_idle()
+
+    # --- Off-thread rendering: long views are drawn to PNG in a worker process and cached ---
+    def chart_size(self):
+        width, height = self.chart_frame.winfo_width(), self.chart_frame.winfo_height()
+        if width < 50 or height < 50: width, height = (int(v * self.fig.dpi) for v in self.fig.get_size_inches()) # Not laid out yet
+        return width, height
+
+    def render_trend_image(self, payload):
+        """Shows the cached image for this (user, data version, palette, size), or renders it off the Tk thread."""
+        p = self.theme.palette(); size = self.chart_size()
+        key = (self.user['id'], data_version(payload), tuple(sorted(p.items())), size)
+        renderer = get_chart_renderer(); png = renderer.cached(key)
+        if png is not None: self.show_image(key, png); return
+        self.run_db(renderer.render, key, payload, p, *size, key="chart", loading_text="Rendering chart...",
+                    on_success=lambda png: self.show_image(key, png), on_error=lambda e: self.show_message(f"Could not render the chart: {e}"))
+
+    def show_image(self, key, png):
+        if self.chart and self.chart["key"] == ("image", key): return # Already on screen
+        self.chart_image = tk.PhotoImage(data=base64.b64encode(png).decode("ascii")) # Keep a reference or Tk drops it
+        self.image_label.config(image=self.chart_image)
+        if not self.image_label.winfo_ismapped(): self.canvas.get_tk_widget().pack_forget(); self.image_label.pack(fill="both", expand=True)
+        self.chart = {"key": ("image", key), "size": key[3]}
+
+    def on_chart_resize(self, event):
+        """Re-renders a shown image once the size has settled (the live canvas resizes itself)."""
+        if not self.chart or self.chart["key"][0] != "image" or self.chart_size() == self.chart["size"]: return
+        if self._resize_job: self.after_cancel(self._resize_job)
+        self._resize_job = self.after(250, lambda: (setattr(self, "_resize_job", None), self.draw_chart()))
\ No newline at end of file
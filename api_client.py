@@ -1,49 +1,127 @@
 # smartplate/api_client.py
 import requests
+from requests.adapters import HTTPAdapter
 import json
+import random
+import threading
+import time
+from .cache import DiskCache, make_key, normalize_text
 from .ui.theme_manager import ThemeManager
 
+RECIPE_CACHE_TTL_S = 30 * 24 * 3600 # Nutrition data for a recipe rarely changes
+RECIPE_CACHE_MAX_ENTRIES = 500
+
+# --- HTTP ---
+CONNECT_TIMEOUT_S = 3.05 # TCP/TLS connect, per attempt
+READ_TIMEOUT_S = 10.0 # Waiting for the response, per attempt
+TOTAL_TIMEOUT_S = 20.0 # Whole call including retries and backoff
+MAX_RETRIES = 2 # Extra attempts after a 429/5xx or a connection failure
+BACKOFF_BASE_S = 0.5; BACKOFF_MAX_S = 4.0 # Full-jitter exponential backoff between attempts
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+HTTP_POOL_SIZE = 4 # Keep-alive connections kept per host
+
 class ApiClient:
     """Handles communication with the Spoonacular API (complexSearch endpoint)."""
 
     # ✅ Use the correct endpoint for searching recipes
     BASE_URL = "https://api.spoonacular.com/recipes/complexSearch"
-
-    def __init__(self):
-        # Key will be refreshed before each call
-        pass
-
-    def refresh_credentials(self):
-        """Reload the Spoonacular API key dynamically."""
+    _recipe_cache = None # Shared by every ApiClient; opened on first lookup
+    _session = None # Shared keep-alive session, so warm lookups skip the TCP/TLS handshake
+    _session_lock = threading.Lock()
+
+    def __init__(self, connect_timeout_s=CONNECT_TIMEOUT_S, read_timeout_s=READ_TIMEOUT_S, total_timeout_s=TOTAL_TIMEOUT_S, max_retries=MAX_RETRIES):
+        self.connect_timeout_s = connect_timeout_s; self.read_timeout_s = read_timeout_s
+        self.total_timeout_s = total_timeout_s; self.max_retries = max_retries
+        self.api_key = ""; self._credentials_version = None # Loaded on first use
+
+    @classmethod
+    def session(cls):
+        """The process-wide requests.Session with a pooled HTTPS adapter."""
+        if cls._session is None:
+            with cls._session_lock:
+                if cls._session is None:
+                    session = requests.Session()
+                    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=HTTP_POOL_SIZE, max_retries=0) # Retries are ours
+                    session.mount("https://", adapter); cls._session = session
+        return cls._session
+
+    def refresh_credentials(self, force=False):
+        """Reloads the Spoonacular API key, but only after ThemeManager reports a change (or when forced)."""
+        version = ThemeManager.credentials_version()
+        if not force and version == self._credentials_version: return
         # ✅ Use getter for Spoonacular key
-        self.api_key = ThemeManager.get_spoonacular_api_key().strip()
+        self.api_key = ThemeManager.get_spoonacular_api_key().strip(); self._credentials_version = version
         print(f"[ApiClient] Refreshed Spoonacular credentials: API Key='{self.api_key[:4]}...'")
 
-    def analyze_natural(self, query):
-        """Analyzes a meal description using Spoonacular complexSearch."""
+    def _get(self, url, params):
+        """GET with bounded retries on 429/5xx and connection errors, inside the total timeout."""
+        deadline = time.monotonic() + self.total_timeout_s
+        for attempt in range(self.max_retries + 1):
+            remaining = deadline - time.monotonic()
+            if remaining <= 0: raise requests.exceptions.Timeout(f"Gave up after {self.total_timeout_s:.0f}s")
+            timeout = (min(self.connect_timeout_s, remaining), min(self.read_timeout_s, remaining))
+            try:
+                response = self.session().get(url, params=params, timeout=timeout)
+                if response.status_code not in RETRY_STATUSES or attempt == self.max_retries: return response
+                delay = self._retry_after(response)
+                print(f"[ApiClient] HTTP {response.status_code}, retrying (attempt {attempt + 2}/{self.max_retries + 1})...")
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                if attempt == self.max_retries: raise
+                delay = None; print(f"[ApiClient] {type(e).__name__}, retrying (attempt {attempt + 2}/{self.max_retries + 1})...")
+            if delay is None: delay = random.uniform(0, min(BACKOFF_MAX_S, BACKOFF_BASE_S * 2 ** attempt))
+            if time.monotonic() + delay >= deadline: raise requests.exceptions.Timeout(f"No time left to retry within {self.total_timeout_s:.0f}s")
+            time.sleep(delay)
+
+    @staticmethod
+    def _retry_after(response):
+        """Seconds from a numeric Retry-After header, capped at BACKOFF_MAX_S."""
+        try: return min(float(response.headers.get("Retry-After")), BACKOFF_MAX_S)
+        except (TypeError, ValueError): return None
+
+    @classmethod
+    def recipe_cache(cls):
+        """On-disk cache of successful complexSearch results, keyed on the normalized query and request params."""
+        if cls._recipe_cache is None: cls._recipe_cache = DiskCache("spoonacular.complexSearch", ttl_s=RECIPE_CACHE_TTL_S, max_entries=RECIPE_CACHE_MAX_ENTRIES)
+        return cls._recipe_cache
+
+    @classmethod
+    def cache_stats(cls):
+        return cls.recipe_cache().stats()
+
+    def analyze_natural(self, query, use_cache=True):
+        """Analyzes a meal description using Spoonacular complexSearch.
+
+        Successful results are cached on disk; use_cache=False skips the lookup and refreshes the stored entry.
+        """
         print(f"[ApiClient] Analyzing query with Spoonacular: '{query}'")
         if not query.strip(): return {"error": "Query cannot be empty."}
 
-        self.refresh_credentials()
-
-        if not self.api_key:
-            print("[ApiClient] ERROR: Spoonacular API Key is missing.")
-            return {"error": "Spoonacular API Key missing. Please save it in Settings."}
-
         params = {
-            "apiKey": self.api_key,
-            "query": query,
+            "query": normalize_text(query),
             "addRecipeNutrition": True, # Request nutritional info
             "number": 5,                # Get a few results to choose from
             "cuisine": "Indian,Asian,Middle Eastern,European,American", # Prioritize Indian, but allow others
             "fillIngredients": False,   # Don't need ingredient details now
             "addRecipeInformation": False # Don't need full recipe steps now
         }
+        cache_key = make_key(self.BASE_URL, **params) # The API key isn't part of the cache key
+        if use_cache:
+            started = time.perf_counter(); cached = self.recipe_cache().get(cache_key)
+            if cached is not None:
+                print(f"[ApiClient] Cache hit for '{params['query']}' ({(time.perf_counter() - started) * 1000:.2f} ms)")
+                return cached
+
+        self.refresh_credentials()
+
+        if not self.api_key:
+            print("[ApiClient] ERROR: Spoonacular API Key is missing.")
+            return {"error": "Spoonacular API Key missing. Please save it in Settings."}
+        params["apiKey"] = self.api_key
 
         print(f"[ApiClient] Sending request to Spoonacular...")
 
         try:
-            response = requests.get(self.BASE_URL, params=params, timeout=15)
+            response = self._get(self.BASE_URL, params)
             print(f"[ApiClient] Spoonacular response status code: {response.status_code}")
 
             # --- Handle Spoonacular Error Codes ---
@@ -104,6 +182,7 @@ class ApiClient:
 
             print(f"[ApiClient] Spoonacular analysis successful. Found {len(extracted_recipes)} recipes.")
             # Return *all* found recipes - MealLogPage needs update to handle multiple
+            self.recipe_cache().set(cache_key, {"recipes": extracted_recipes}) # Errors and quota failures are never cached
             return {"recipes": extracted_recipes}
 
         # ... (keep exception handling as before) ...
@@ -1,6 +1,7 @@
 # smartplate/ui/base_page.py
 from tkinter import ttk
 from .theme_manager import ThemeManager
+from .db_executor import get_executor
 
 class BasePage(ttk.Frame):
     PAGE_NAME = "Base" # Should be overridden by subclasses
@@ -11,10 +12,52 @@ class BasePage(ttk.Frame):
         super().__init__(master, style='TFrame', **kwargs) 
         
         self.theme = ThemeManager # Provide easy access to theme methods
+        self._db_tasks = {} # key -> DbTask for reads that a newer request (or leaving the page) makes stale
+        self._loading_count = 0; self._loading_label = None
+        self.bind("<Destroy>", lambda e: self.cancel_db() if e.widget is self else None, add="+")
         
         # Build the specific content for the page
         self.build() 
 
     def build(self):
         """Subclasses must implement this method to create their widgets."""
-        raise NotImplementedError("Subclasses must implement the build method")
\ No newline at end of file
+        raise NotImplementedError("Subclasses must implement the build method")
+
+    # --- Background DB calls ---
+    def run_db(self, fn, *args, key=None, on_success=None, on_error=None, loading_text="Loading...", **kwargs):
+        """Runs a blocking db call on the shared worker pool; callbacks run on the Tk thread.
+
+        Calls with a `key` are reads: a newer call with the same key, or leaving the page, cancels them.
+        Unkeyed calls (writes) always run; their callbacks are skipped if the page has been destroyed.
+        """
+        if key is not None: self.cancel_db(key)
+        alive = lambda cb: (lambda *a: cb(*a) if cb and self.winfo_exists() else None)
+        if loading_text: self.set_loading(True, loading_text)
+        def done():
+            if loading_text and self.winfo_exists(): self.set_loading(False)
+            if key is not None and self._db_tasks.get(key) is task: del self._db_tasks[key]
+        task = get_executor(self).submit(fn, *args, on_success=alive(on_success), on_error=alive(on_error), on_done=done,
+                                         label=f"{self.PAGE_NAME}:{key or getattr(fn, '__name__', 'task')}", **kwargs)
+        if key is not None: task.loading = bool(loading_text); self._db_tasks[key] = task
+        return task
+
+    def cancel_db(self, key=None):
+        """Cancels the pending read with `key`, or every pending read when key is None."""
+        keys = list(self._db_tasks) if key is None else [key]
+        for k in keys:
+            task = self._db_tasks.pop(k, None)
+            if task:
+                task.cancel()
+                if task.loading and self.winfo_exists(): self.set_loading(False)
+
+    def set_loading(self, loading, text="Loading..."):
+        """Shows a small 'Loading...' note in the page corner while any request is outstanding."""
+        self._loading_count = max(0, self._loading_count + (1 if loading else -1))
+        if self._loading_count:
+            if self._loading_label is None: self._loading_label = ttk.Label(self, style='Muted.TLabel', font=("Segoe UI", 9, "italic"))
+            self._loading_label.config(text=text); self._loading_label.place(relx=1.0, y=0, anchor="ne"); self._loading_label.lift()
+        elif self._loading_label is not None: self._loading_label.place_forget()
+
+    def on_hide(self):
+        """Called by MainWindow when navigating away; in-flight reads are no longer wanted."""
+        self.cancel_db()
\ No newline at end of file
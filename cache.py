@@ -0,0 +1,154 @@
+# smartplate/cache.py
+"""Small persistent key/value cache (SQLite file) with per-entry TTL and LRU eviction.
+
+Used for remote API responses so repeated lookups are answered locally and survive restarts.
+Each DiskCache works in its own namespace of the shared cache file.
+"""
+import atexit
+from collections import OrderedDict
+import hashlib
+import json
+import os
+from pathlib import Path
+import sqlite3
+import threading
+import time
+
+CACHE_PATH = os.environ.get("SMARTPLATE_CACHE_PATH", str(Path.home() / ".smartplate_cache.sqlite3"))
+MEMORY_ENTRIES = 256 # Hot entries also kept decoded in memory
+TOUCH_FLUSH_EVERY = 32 # Last-access updates are written to disk in batches of this size
+
+def make_key(*parts, **params):
+    """Stable hash of the positional parts and keyword params (param order doesn't matter)."""
+    raw = json.dumps([parts, sorted(params.items())], sort_keys=True, default=str, separators=(",", ":"))
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+def normalize_text(text):
+    """Lower-cases and collapses whitespace so trivially different queries share a key."""
+    return " ".join(str(text).lower().split())
+
+class DiskCache:
+    """Thread-safe JSON value cache for one namespace, bounded to `max_entries` with LRU eviction."""
+
+    def __init__(self, namespace, ttl_s=7 * 24 * 3600, max_entries=1000, path=CACHE_PATH):
+        self.namespace = namespace; self.ttl_s = ttl_s; self.max_entries = max_entries; self.path = path
+        self._lock = threading.Lock(); self._conn = None
+        self._memory = OrderedDict() # key -> (value, expires_at), most recently used last
+        self._touched = {} # key -> last access time not yet written
+        self._stats = {"hits": 0, "memory_hits": 0, "misses": 0, "expired": 0, "writes": 0, "evictions": 0, "errors": 0}
+
+    # --- Storage ---
+    def _db(self):
+        if self._conn is None:
+            self._conn = sqlite3.connect(self.path, timeout=5, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode = WAL"); self._conn.execute("PRAGMA synchronous = NORMAL")
+            self._conn.execute("""CREATE TABLE IF NOT EXISTS cache_entries (namespace TEXT NOT NULL, key TEXT NOT NULL, value TEXT NOT NULL,
+                                  created_at REAL NOT NULL, expires_at REAL, last_access REAL NOT NULL, PRIMARY KEY (namespace, key)) WITHOUT ROWID""")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_cache_entries_lru ON cache_entries (namespace, last_access)")
+            self._conn.commit(); atexit.register(self.close) # Pending last-access times are written on exit
+        return self._conn
+
+    def _remember(self, key, value, expires_at):
+        self._memory[key] = (value, expires_at); self._memory.move_to_end(key)
+        while len(self._memory) > MEMORY_ENTRIES: self._memory.popitem(last=False)
+
+    # --- Public API ---
+    def get(self, key, default=None):
+        """Returns the cached value, or `default` if it's missing or expired."""
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                value, expires_at = entry
+                if expires_at is None or expires_at > now:
+                    self._memory.move_to_end(key); self._touch(key, now)
+                    self._stats["hits"] += 1; self._stats["memory_hits"] += 1
+                    return value
+                del self._memory[key]
+            try:
+                row = self._db().execute("SELECT value, expires_at FROM cache_entries WHERE namespace = ? AND key = ?", (self.namespace, key)).fetchone()
+                if row is None: self._stats["misses"] += 1; return default
+                if row[1] is not None and row[1] <= now:
+                    self._conn.execute("DELETE FROM cache_entries WHERE namespace = ? AND key = ?", (self.namespace, key)); self._conn.commit()
+                    self._stats["expired"] += 1; self._stats["misses"] += 1; return default
+                value = json.loads(row[0])
+            except (sqlite3.Error, ValueError) as e:
+                self._stats["errors"] += 1; print(f"[DiskCache:{self.namespace}] Read failed: {e}"); return default
+            self._remember(key, value, row[1]); self._touch(key, now); self._stats["hits"] += 1
+            return value
+
+    def set(self, key, value, ttl_s=None):
+        """Stores a JSON-serializable value; evicts least recently used entries past max_entries."""
+        now = time.time(); ttl_s = self.ttl_s if ttl_s is None else ttl_s
+        expires_at = now + ttl_s if ttl_s else None
+        with self._lock:
+            try:
+                c = self._db()
+                c.execute("INSERT OR REPLACE INTO cache_entries (namespace, key, value, created_at, expires_at, last_access) VALUES (?, ?, ?, ?, ?, ?)",
+                          (self.namespace, key, json.dumps(value, separators=(",", ":")), now, expires_at, now))
+                self._touched.pop(key, None); self._flush_touches_locked(); self._evict_locked(); c.commit()
+            except (sqlite3.Error, TypeError, ValueError) as e:
+                self._stats["errors"] += 1; print(f"[DiskCache:{self.namespace}] Write failed: {e}"); return False
+            self._remember(key, value, expires_at); self._stats["writes"] += 1
+            return True
+
+    def delete(self, key):
+        with self._lock:
+            self._memory.pop(key, None); self._touched.pop(key, None)
+            self._db().execute("DELETE FROM cache_entries WHERE namespace = ? AND key = ?", (self.namespace, key)); self._conn.commit()
+
+    def clear(self):
+        """Removes every entry in this namespace."""
+        with self._lock:
+            self._memory.clear(); self._touched.clear()
+            self._db().execute("DELETE FROM cache_entries WHERE namespace = ?", (self.namespace,)); self._conn.commit()
+
+    def items(self):
+        """Every unexpired (key, value) pair in this namespace, least recently used first."""
+        with self._lock:
+            self._flush_touches_locked()
+            rows = self._db().execute("SELECT key, value FROM cache_entries WHERE namespace = ? AND (expires_at IS NULL OR expires_at > ?) ORDER BY last_access",
+                                      (self.namespace, time.time())).fetchall()
+        return [(key, json.loads(value)) for key, value in rows]
+
+    def stats(self):
+        """Hit/miss counters plus the number of stored entries."""
+        with self._lock:
+            s = dict(self._stats)
+            try: s["entries"] = self._db().execute("SELECT COUNT(*) FROM cache_entries WHERE namespace = ?", (self.namespace,)).fetchone()[0]
+            except sqlite3.Error: s["entries"] = None
+        lookups = s["hits"] + s["misses"]
+        s["hit_rate"] = s["hits"] / lookups if lookups else 0.0
+        return s
+
+    def close(self):
+        """Writes pending access times and closes the file."""
+        with self._lock:
+            if self._conn is None: return
+            try: self._flush_touches_locked(); self._conn.commit()
+            except sqlite3.Error as e: print(f"[DiskCache:{self.namespace}] Flush failed: {e}")
+            self._conn.close(); self._conn = None
+
+    # --- Internals ---
+    def _touch(self, key, now):
+        self._touched[key] = now
+        if len(self._touched) >= TOUCH_FLUSH_EVERY:
+            try: self._flush_touches_locked(); self._conn.commit()
+            except sqlite3.Error as e: print(f"[DiskCache:{self.namespace}] Flush failed: {e}")
+
+    def _flush_touches_locked(self):
+        if not self._touched: return
+        self._db().executemany("UPDATE cache_entries SET last_access = ? WHERE namespace = ? AND key = ?",
+                               [(t, self.namespace, key) for key, t in self._touched.items()])
+        self._touched.clear()
+
+    def _evict_locked(self):
+        c = self._conn; count = c.execute("SELECT COUNT(*) FROM cache_entries WHERE namespace = ?", (self.namespace,)).fetchone()[0]
+        c.execute("DELETE FROM cache_entries WHERE namespace = ? AND expires_at IS NOT NULL AND expires_at <= ?", (self.namespace, time.time()))
+        count -= max(c.execute("SELECT changes()").fetchone()[0], 0)
+        if count <= self.max_entries: return
+        victims = [row[0] for row in c.execute("SELECT key FROM cache_entries WHERE namespace = ? ORDER BY last_access LIMIT ?",
+                                               (self.namespace, count - self.max_entries))]
+        c.executemany("DELETE FROM cache_entries WHERE namespace = ? AND key = ?", [(self.namespace, key) for key in victims])
+        for key in victims: self._memory.pop(key, None)
+        self._stats["evictions"] += len(victims)
\ No newline at end of file
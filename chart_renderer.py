@@ -0,0 +1,165 @@
+# smartplate/chart_renderer.py
+"""Matplotlib drawing for the Analytics charts, on the Tk canvas or headless.
+
+build_*/update_* create a chart's artists once and then move them, which is how AnalyticsPage
+updates its canvas in place. render_png draws the same chart on a fresh Agg figure; ChartRenderer
+runs it in a worker process so big charts never block the Tk thread, and keeps the PNGs in an
+LRU cache keyed by (user, data version, palette, size).
+"""
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+import hashlib
+import io
+import multiprocessing
+import os
+import threading
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+import matplotlib.dates as mdates
+import numpy as np
+
+CHART_RENDER_MODE = os.environ.get("SMARTPLATE_CHART_RENDER", "auto") # "auto", "process" (every trend view) or "inline"
+PROCESS_RENDER_MIN_DAYS = 90 # In "auto" mode, trend views at least this long are rendered in the worker process
+IMAGE_CACHE_ENTRIES = 24 # Rendered PNGs kept in memory
+RENDER_DPI = 100
+
+TODAY_LABELS = ['Sodium (mg)', 'Sugar (g)', 'Fiber (g)', 'Fat (g)', 'Carbs (g)', 'Protein (g)', 'Calories (kcal)']
+TODAY_KEYS = ('total_sodium', 'total_sugar', 'total_fiber', 'total_fat', 'total_carbs', 'total_protein', 'total_calories')
+
+# --- Drawing (shared by the Tk canvas and the worker process) ---
+def style_axes(ax, p):
+    ax.set_facecolor(p['panel'])
+    ax.tick_params(axis='x', colors=p['text'])
+    ax.tick_params(axis='y', colors=p['text'])
+    ax.spines['top'].set_visible(False); ax.spines['right'].set_visible(False)
+    ax.spines['left'].set_color(p['muted']); ax.spines['bottom'].set_color(p['muted'])
+
+def reset_axes(fig, ax, p):
+    ax.clear(); fig.patch.set_facecolor(p['bg']); ax.set_axis_on(); style_axes(ax, p)
+
+def build_today(fig, ax, p):
+    """Empty 'Today's Nutrient Totals' bars; returns the handles update_today moves."""
+    reset_axes(fig, ax, p); fig.subplots_adjust(left=0.2); text_props = {'color': p['text'], 'fontsize': 10}
+    y_pos = range(len(TODAY_LABELS))
+    bars = ax.barh(y_pos, [0] * len(TODAY_LABELS), align='center', color=p['accent'])
+    ax.set_yticks(y_pos, labels=TODAY_LABELS, **text_props, weight='bold')
+    ax.invert_yaxis()
+    ax.set_xlabel('Total Amount', **text_props)
+    ax.set_title("Today's Nutrient Totals", **text_props, weight='bold', size=14)
+    values = [ax.annotate("", xy=(0, y), xytext=(5, 0), textcoords='offset points', va='center', color=p['text'], fontsize=9) for y in y_pos]
+    return {"bars": list(bars), "values": values}
+
+def update_today(ax, handles, values):
+    for bar, label, value in zip(handles["bars"], handles["values"], values):
+        bar.set_width(value); label.xy = (value, bar.get_y() + bar.get_height() / 2); label.set_text(f"{value:.1f}")
+    ax.set_xlim(0, max(values) * 1.15) # Room for the value labels
+
+def build_trend(fig, ax, trend, label, unit, p):
+    """Empty daily series (bars, or a thin line for long views), rolling average and average line."""
+    reset_axes(fig, ax, p); fig.subplots_adjust(left=0.1); text_props = {'color': p['text'], 'fontsize': 10}
+    dates = trend["dates"]; blank = np.zeros(len(dates))
+    if trend["days"] <= 90: daily = list(ax.bar(dates, blank, width=0.8, color=p['accent'], alpha=0.45, label="Daily total"))
+    else: daily, = ax.plot(dates, blank, color=p['accent'], alpha=0.45, linewidth=1, marker='.', markersize=3, label="Daily total")
+    rolling, = ax.plot(dates, blank, color=p['text'], linewidth=2, label=f"{trend['window']}-day average")
+    average = ax.axhline(0, color=p['muted'], linestyle='--', linewidth=1, label="Average")
+    locator = mdates.AutoDateLocator(); ax.xaxis.set_major_locator(locator); ax.xaxis.set_major_formatter(mdates.ConciseDateFormatter(locator))
+    ax.set_ylabel(f"{label} ({unit})", **text_props)
+    title = ax.set_title("", **text_props, weight='bold', size=13)
+    legend = ax.legend(loc='upper left', fontsize=9, facecolor=p['panel'], edgecolor=p['muted'])
+    for text in legend.get_texts(): text.set_color(p['text'])
+    return {"daily": daily, "rolling": rolling, "average": average, "average_label": next(t for t in legend.get_texts() if t.get_text() == "Average"), "title": title}
+
+def update_trend(ax, handles, trend, label, unit, data):
+    daily = np.nan_to_num(data["daily"])
+    if isinstance(handles["daily"], list):
+        for bar, value in zip(handles["daily"], daily): bar.set_height(value)
+    else: handles["daily"].set_ydata(data["daily"])
+    handles["rolling"].set_ydata(data["rolling"])
+    avg = data["average"]; handles["average"].set_ydata([avg or 0, avg or 0]); handles["average"].set_visible(avg is not None)
+    handles["average_label"].set_text(f"Average {avg:.0f} {unit}" if avg is not None else "Average")
+    slope = f", trend {data['slope_per_week']:+.0f} {unit}/week" if data["slope_per_week"] is not None else ""
+    handles["title"].set_text(f"{label} per day, last {trend['days']} days ({trend['days_logged']} logged{slope})")
+    ax.set_ylim(0, max(float(np.nanmax(np.concatenate([daily, np.nan_to_num(data["rolling"])]))), 1.0) * 1.1)
+
+# --- Headless rendering ---
+def trend_payload(trend, metric, label, unit):
+    """The part of a get_trend result needed to draw one metric (small enough to send to the worker)."""
+    return {"trend": {key: trend[key] for key in ("dates", "days", "window", "days_logged")}, "data": trend["series"][metric], "label": label, "unit": unit}
+
+def data_version(payload):
+    """Digest of the numbers a chart shows; equal digests mean the image would be identical."""
+    h = hashlib.sha1(); trend, data = payload["trend"], payload["data"]
+    h.update(repr((str(trend["dates"][0]), trend["days"], trend["window"], trend["days_logged"], payload["label"], data["average"], data["slope_per_week"])).encode())
+    for name in ("daily", "rolling"): h.update(np.ascontiguousarray(data[name]).tobytes())
+    return h.hexdigest()
+
+def render_png(payload, palette, width, height, dpi=RENDER_DPI):
+    """Draws a trend chart on an off-screen Agg figure and returns PNG bytes. Runs in the worker process."""
+    fig = Figure(figsize=(width / dpi, height / dpi), dpi=dpi); FigureCanvasAgg(fig); ax = fig.add_subplot(111)
+    handles = build_trend(fig, ax, payload["trend"], payload["label"], payload["unit"], palette)
+    update_trend(ax, handles, payload["trend"], payload["label"], payload["unit"], payload["data"])
+    buffer = io.BytesIO(); fig.savefig(buffer, format="png", dpi=dpi, facecolor=fig.get_facecolor())
+    return buffer.getvalue()
+
+class ChartRenderer:
+    """Renders chart PNGs in one worker process and keeps the most recent ones in memory."""
+
+    def __init__(self, max_entries=IMAGE_CACHE_ENTRIES):
+        self.max_entries = max_entries
+        self._images = OrderedDict() # cache key -> PNG bytes, most recently used last
+        self._lock = threading.Lock(); self._pool = None
+        self._stats = {"hits": 0, "renders": 0, "fallbacks": 0}
+
+    def _get_pool(self):
+        with self._lock:
+            if self._pool is None: # spawn, not fork: the parent has Tk and several threads running
+                self._pool = ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn"))
+            return self._pool
+
+    def cached(self, key):
+        """The stored PNG for `key`, or None."""
+        with self._lock:
+            png = self._images.get(key)
+            if png is not None: self._images.move_to_end(key); self._stats["hits"] += 1
+            return png
+
+    def render(self, key, payload, palette, width, height):
+        """Blocking; call from a worker thread. Returns the cached PNG for `key` or renders it in the process."""
+        png = self.cached(key)
+        if png is not None: return png
+        try: png = self._get_pool().submit(render_png, payload, palette, width, height).result()
+        except (BrokenProcessPool, OSError) as e: # Worker died or couldn't start: draw in this thread instead
+            print(f"[ChartRenderer] Worker process unavailable ({e}), rendering in-process.")
+            with self._lock: self._pool = None; self._stats["fallbacks"] += 1
+            png = render_png(payload, palette, width, height)
+        with self._lock:
+            self._images[key] = png; self._images.move_to_end(key); self._stats["renders"] += 1
+            while len(self._images) > self.max_entries: self._images.popitem(last=False)
+        return png
+
+    def stats(self):
+        with self._lock: return dict(self._stats, entries=len(self._images))
+
+    def shutdown(self):
+        with self._lock: pool, self._pool = self._pool, None
+        if pool: pool.shutdown(wait=False, cancel_futures=True)
+
+_renderer = None
+_renderer_lock = threading.Lock()
+
+def get_chart_renderer():
+    """The shared renderer; its worker process starts with the first off-thread render."""
+    global _renderer
+    if _renderer is None:
+        with _renderer_lock:
+            if _renderer is None: _renderer = ChartRenderer()
+    return _renderer
+
+def shutdown_chart_renderer():
+    """Called on exit; does nothing if no chart was rendered off-thread."""
+    if _renderer is not None: _renderer.shutdown()
+
+def use_process_render(days):
+    """Whether a trend view of `days` should be rendered in the worker process."""
+    return CHART_RENDER_MODE == "process" or (CHART_RENDER_MODE == "auto" and days >= PROCESS_RENDER_MIN_DAYS)
\ No newline at end of file
@@ -0,0 +1,88 @@
+# smartplate/chat_session.py
+"""Conversation history for multi-turn AI chat, kept inside a fixed token budget.
+
+Recent turns are sent verbatim. When they no longer fit, the oldest are folded into a short
+running summary (first sentence of each question and answer), and the oldest summary lines are
+dropped once that summary outgrows its own share. Compaction is local, so it adds no API call.
+"""
+import re
+import threading
+
+CHAT_TOKEN_BUDGET = 1500 # History + new question per request (system prompt and answer not included)
+SUMMARY_TOKEN_BUDGET = 300 # Part of the budget the running summary may use
+MESSAGE_OVERHEAD_TOKENS = 4 # Role and separators per chat message
+CHARS_PER_TOKEN = 4 # Rough average for English text with Llama tokenizers
+SUMMARY_QUESTION_WORDS = 20
+SUMMARY_ANSWER_WORDS = 30
+
+def estimate_tokens(text):
+    """Cheap token estimate (~4 characters per token); good enough for budgeting, no tokenizer needed."""
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+def _message_tokens(content):
+    return estimate_tokens(content) + MESSAGE_OVERHEAD_TOKENS
+
+def _gist(text, max_words):
+    """First sentence of `text`, cut to max_words."""
+    sentence = re.split(r"(?<=[.!?])\s+", " ".join(text.split()), maxsplit=1)[0]
+    words = sentence.split()
+    return " ".join(words[:max_words]) + ("..." if len(words) > max_words else "")
+
+class ChatSession:
+    """History of one chat; context(prompt) returns the messages to send before the new question."""
+
+    def __init__(self, budget=CHAT_TOKEN_BUDGET, summary_budget=SUMMARY_TOKEN_BUDGET):
+        self.budget = budget; self.summary_budget = summary_budget
+        self.turns = [] # [(question, answer)] still sent verbatim, oldest first
+        self.summary_lines = [] # One line per folded turn, oldest first
+        self.turns_dropped = 0 # Turns whose summary line was dropped as well
+        self._lock = threading.Lock()
+
+    def reset(self):
+        with self._lock:
+            self.turns.clear(); self.summary_lines.clear(); self.turns_dropped = 0
+
+    def add_turn(self, question, answer):
+        """Records a completed exchange (call only for answers that actually arrived)."""
+        with self._lock: self.turns.append((question.strip(), answer.strip()))
+
+    @property
+    def empty(self):
+        return not self.turns and not self.summary_lines
+
+    def context(self, prompt):
+        """Returns (history messages, usage) for a request asking `prompt`.
+
+        Compacts the session first so history + prompt fit the budget. usage has the estimated
+        tokens per part, the budget, and how many turns are sent, summarized and dropped.
+        """
+        prompt_tokens = _message_tokens(prompt)
+        with self._lock:
+            while self.turns and prompt_tokens + self._summary_tokens() + self._turn_tokens() > self.budget:
+                self._fold_oldest()
+            while self.summary_lines and prompt_tokens + self._summary_tokens() + self._turn_tokens() > self.budget:
+                self.summary_lines.pop(0); self.turns_dropped += 1 # Even the summary doesn't fit next to a long question
+            messages = []
+            if self.summary_lines: messages.append({"role": "system", "content": self._summary_text()})
+            for question, answer in self.turns:
+                messages += [{"role": "user", "content": question}, {"role": "assistant", "content": answer}]
+            usage = {"budget": self.budget, "prompt_tokens": prompt_tokens, "summary_tokens": self._summary_tokens(), "history_tokens": self._turn_tokens(),
+                     "turns_sent": len(self.turns), "turns_summarized": len(self.summary_lines), "turns_dropped": self.turns_dropped}
+        usage["total_tokens"] = usage["prompt_tokens"] + usage["summary_tokens"] + usage["history_tokens"]
+        return messages, usage
+
+    # --- Internals (caller holds the lock) ---
+    def _summary_text(self):
+        return "Summary of the earlier conversation:\n" + "\n".join(self.summary_lines)
+
+    def _summary_tokens(self):
+        return _message_tokens(self._summary_text()) if self.summary_lines else 0
+
+    def _turn_tokens(self):
+        return sum(_message_tokens(q) + _message_tokens(a) for q, a in self.turns)
+
+    def _fold_oldest(self):
+        question, answer = self.turns.pop(0)
+        self.summary_lines.append(f"- User asked: {_gist(question, SUMMARY_QUESTION_WORDS)} Assistant: {_gist(answer, SUMMARY_ANSWER_WORDS)}")
+        while len(self.summary_lines) > 1 and self._summary_tokens() > self.summary_budget:
+            self.summary_lines.pop(0); self.turns_dropped += 1
\ No newline at end of file
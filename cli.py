@@ -0,0 +1,7 @@
+import sys, os
+sys.path.append(os.path.dirname(__file__))  # ensures smartplate package is seen
+
+from smartplate.commands import main
+
+if __name__ == "__main__":
+    sys.exit(main())
\ No newline at end of file
@@ -0,0 +1,100 @@
+# smartplate/commands.py
+"""Headless maintenance commands for SmartPlate (no Tk needed). Entry point: cli.py next to run.py."""
+import argparse
+from contextlib import nullcontext, redirect_stdout
+import sys
+from . import db
+from . import exporter
+from . import importer
+
+def _open_database(args):
+    """Selects the backend and makes sure the schema is current before a command runs."""
+    if args.backend: db.set_backend(args.backend)
+    if not db.init_driver(): raise SystemExit("Failed to initialize database driver. Check console log for details.")
+    db.init_db_schema(background=False) # Finish data migrations before a command touches the tables
+
+# --- Commands ---
+def cmd_rebuild_rollup(args):
+    """Recomputes the daily_nutrition rollup from meal_logs."""
+    days = db.rebuild_daily_rollup(user_id=args.user_id)
+    print(f"Rebuilt {days} daily rollup rows.")
+    return 0
+
+def _resolve_user_id(args):
+    if args.user_id is not None: return args.user_id
+    user = db.get_user_by_email(args.email)
+    if not user: raise SystemExit(f"No user with email '{args.email}'.")
+    return user["id"]
+
+def cmd_import(args):
+    """Streams a CSV/JSONL meal history file into one user's log."""
+    user_id = _resolve_user_id(args)
+    stats = importer.import_file(user_id, args.file, fmt=args.format, batch_size=args.batch_size)
+    print(f"Imported {stats['imported']:,} meals ({stats['skipped']:,} skipped) in {stats['elapsed_s']:.2f}s "
+          f"- {stats['rows_per_s']:,.0f} rows/s over {stats['batches']} batches.")
+    return 0 if stats["imported"] or not stats["skipped"] else 1
+
+def cmd_export(args):
+    """Streams one user's meal log or daily totals to a CSV/JSONL(.gz) file."""
+    user_id = _resolve_user_id(args)
+    if args.what == "daily":
+        stats = exporter.export_daily(user_id, args.file, fmt=args.format, start_date=args.start, end_date=args.end,
+                                      append=args.append, arraysize=args.arraysize)
+    else:
+        stats = exporter.export_meals(user_id, args.file, fmt=args.format, start_date=args.start, end_date=args.end,
+                                      after=args.after, append=args.append, arraysize=args.arraysize)
+    resume = f" Last cursor: {exporter.format_cursor(stats['last_cursor'])}." if stats["last_cursor"] else ""
+    print(f"Exported {stats['rows']:,} {args.what} rows in {stats['elapsed_s']:.2f}s.{resume}", file=sys.stderr)
+    return 0
+
+def _cursor_arg(text):
+    try: return exporter.parse_cursor(text)
+    except ValueError as e: raise argparse.ArgumentTypeError(str(e))
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="smartplate", description="SmartPlate maintenance commands.")
+    parser.add_argument("--backend", choices=sorted(db.BACKENDS), help="Storage backend (default: $SMARTPLATE_DB_BACKEND or sqlite).")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("rebuild-rollup", help="Recompute daily nutrition totals from the meal log.")
+    p.add_argument("--user-id", type=int, default=None, help="Only rebuild this user's days (default: everyone).")
+    p.set_defaults(func=cmd_rebuild_rollup)
+
+    p = sub.add_parser("import", help="Bulk import meal history from a CSV or JSONL file (.gz ok, '-' for stdin).")
+    p.add_argument("file", help="Path to the file to import.")
+    who = p.add_mutually_exclusive_group(required=True)
+    who.add_argument("--user-id", type=int, help="Import into this user id.")
+    who.add_argument("--email", help="Import into the user with this email.")
+    p.add_argument("--format", choices=("csv", "jsonl"), default=None, help="Input format (default: from the file extension).")
+    p.add_argument("--batch-size", type=int, default=importer.DEFAULT_BATCH_SIZE, help="Rows per INSERT batch and commit.")
+    p.set_defaults(func=cmd_import)
+
+    p = sub.add_parser("export", help="Stream a user's meal log or daily totals to CSV, JSONL or JSONL.gz ('-' for stdout).")
+    p.add_argument("file", help="Output path; the format follows the extension (.csv, .jsonl, .jsonl.gz).")
+    who = p.add_mutually_exclusive_group(required=True)
+    who.add_argument("--user-id", type=int, help="Export this user id.")
+    who.add_argument("--email", help="Export the user with this email.")
+    p.add_argument("--what", choices=("meals", "daily"), default="meals", help="Meal log rows or per-day rollup totals (default: meals).")
+    p.add_argument("--format", choices=("csv", "jsonl", "jsonl.gz"), default=None, help="Output format (default: from the file extension).")
+    p.add_argument("--from", dest="start", default=None, help="First day to include (YYYY-MM-DD).")
+    p.add_argument("--to", dest="end", default=None, help="Last day to include (YYYY-MM-DD).")
+    p.add_argument("--after", type=_cursor_arg, default=None, help="Resume after this DATE,ID cursor (printed when an export stops).")
+    p.add_argument("--append", action="store_true", help="Append to the file instead of overwriting it (use with --after).")
+    p.add_argument("--arraysize", type=int, default=db.EXPORT_ARRAYSIZE, help="Rows fetched per database round trip.")
+    p.set_defaults(func=cmd_export)
+    return parser
+
+def _log_output(args):
+    """Where database, migration and pool messages go: stderr while stdout carries the export itself ('export -')."""
+    return redirect_stdout(sys.stderr) if args.command == "export" and args.file == "-" else nullcontext()
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    try:
+        with _log_output(args): _open_database(args)
+        return args.func(args)
+    finally:
+        with _log_output(args): db.close_pool()
+
+if __name__ == "__main__":
+    sys.exit(main())
\ No newline at end of file
@@ -0,0 +1,43 @@
+# tests/conftest.py
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__)))) # Same as run.py: the smartplate package sits next to tests/
+
+class FakeClock:
+    """Stands in for a module's `time` import: time(), monotonic() and perf_counter() all return `now`, which tests advance."""
+
+    def __init__(self, now):
+        self.now = now
+
+    def time(self):
+        return self.now
+
+    monotonic = perf_counter = time
+
+@pytest.fixture
+def fake_clock(monkeypatch):
+    """Freezes time as one module sees it: `clock = fake_clock(pool)`, then `clock.now += 61`. The real time module is untouched."""
+    def install(module, now=1_700_000_000.0):
+        clock = FakeClock(now); monkeypatch.setattr(module, "time", clock)
+        return clock
+    return install
+
+@pytest.fixture
+def db(tmp_path, monkeypatch):
+    """smartplate.db on a fresh, fully migrated SQLite file."""
+    from smartplate import db, sqlite_backend
+    from smartplate.migrations import migrate
+    monkeypatch.setattr(sqlite_backend, "SQLITE_PATH", str(tmp_path / "smartplate.sqlite3"))
+    db.set_backend("sqlite"); migrate(background=False)
+    yield db
+    db.close_pool()
+
+@pytest.fixture
+def user_id(db):
+    """A user row for meals to belong to (the password hash is never checked)."""
+    with db.get_conn() as conn:
+        c = conn.cursor(); c.execute(db._sql("create_user"), {"email": "test@example.com", "password_hash": b"unused", "name": "Test"})
+        conn.commit(); return c.lastrowid
\ No newline at end of file
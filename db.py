@@ -1,190 +1,434 @@
 # smartplate/db.py
-import oracledb
-import bcrypt
 from contextlib import contextmanager
+import datetime
+import importlib
 import os
-import re 
+import threading
+from .pool import ConnectionPool
+from .nutrients import NUTRIENT_COLUMNS, NUTRIENT_UNITS, parse_amount, parse_calories, parse_nutrients
 
+# --- Storage backend selection ---
+# 'sqlite' (embedded, default) or 'oracle' (needs oracledb + Instant Client, see oracle_backend.py)
+DB_BACKEND = os.environ.get("SMARTPLATE_DB_BACKEND", "sqlite").strip().lower()
+BACKENDS = {"sqlite": "sqlite_backend", "oracle": "oracle_backend"}
+_backend = None
 
-ORACLE_USER = "system"
-ORACLE_PASSWORD = "sanjay" 
-ORACLE_DSN = "localhost:1521/XE" 
+# --- Connection pool settings (see configure_pool) ---
+POOL_MIN_SIZE = 1
+POOL_MAX_SIZE = 5
+POOL_IDLE_TIMEOUT_S = 300.0 # Idle connections above min size are closed after this
+POOL_WAIT_TIMEOUT_S = 10.0 # How long get_conn() waits when every connection is busy
+POOL_HEALTH_CHECK_INTERVAL_S = 30.0 # Ping connections that sat idle longer than this
+_pool = None
+_pool_lock = threading.Lock()
 
+# bcrypt cost factor for new hashes; older hashes are upgraded on the next successful login (see authenticate)
+DEFAULT_BCRYPT_ROUNDS = 12
 
-ORACLE_CLIENT_LIB_DIR = r"C:\oracle\instantclient-basic-windows\instantclient_23_8" 
+def _bcrypt_rounds(value):
+    """SMARTPLATE_BCRYPT_ROUNDS clamped to bcrypt's 4..31; a bad value falls back to the default instead of breaking the import."""
+    if value is None or not str(value).strip(): return DEFAULT_BCRYPT_ROUNDS
+    try: return max(4, min(31, int(value)))
+    except ValueError:
+        print(f"Warning: Invalid SMARTPLATE_BCRYPT_ROUNDS '{value}'. Using {DEFAULT_BCRYPT_ROUNDS}.")
+        return DEFAULT_BCRYPT_ROUNDS
+
+BCRYPT_ROUNDS = _bcrypt_rounds(os.environ.get("SMARTPLATE_BCRYPT_ROUNDS"))
+
+NUTRIENT_BACKFILL_BATCH_SIZE = 500 # Rows converted per transaction by backfill_nutrient_columns
+EXPORT_ARRAYSIZE = 1000 # Rows fetched per round trip by the streaming iter_* readers
+EXPORT_MIN_DATE = "0001-01-01"; EXPORT_MAX_DATE = "9999-01-01" # Open-ended range bounds (Oracle adds a day to the end date)
+
+# Columns summed into the daily_nutrition rollup
+ROLLUP_COLUMNS = ("calories",) + tuple(NUTRIENT_COLUMNS.values())
+
+def get_backend():
+    """Returns the active backend module, importing it on first use."""
+    global _backend
+    if _backend is None:
+        module_name = BACKENDS.get(DB_BACKEND)
+        if module_name is None:
+            raise ValueError(f"Unknown database backend '{DB_BACKEND}'. Choose one of: {', '.join(BACKENDS)}")
+        _backend = importlib.import_module(f".{module_name}", __package__)
+        print(f"Database backend: {_backend.NAME}")
+    return _backend
+
+def set_backend(name):
+    """Switches the storage backend (before any connection is opened)."""
+    global DB_BACKEND, _backend
+    close_pool()
+    DB_BACKEND = name.strip().lower(); _backend = None
+    return get_backend()
+
+def _sql(key):
+    return get_backend().SQL[key]
+
+def get_pool():
+    """Returns the process-wide connection pool for the active backend, creating it on first use."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            backend = get_backend()
+            _pool = ConnectionPool(backend.connect, backend.ping, min_size=POOL_MIN_SIZE, max_size=POOL_MAX_SIZE,
+                                   idle_timeout_s=POOL_IDLE_TIMEOUT_S, wait_timeout_s=POOL_WAIT_TIMEOUT_S,
+                                   health_check_interval_s=POOL_HEALTH_CHECK_INTERVAL_S, name=backend.NAME)
+        return _pool
+
+def configure_pool(min_size=None, max_size=None, idle_timeout_s=None, wait_timeout_s=None, health_check_interval_s=None):
+    """Changes pool settings; the current pool is closed and rebuilt lazily with the new values."""
+    global POOL_MIN_SIZE, POOL_MAX_SIZE, POOL_IDLE_TIMEOUT_S, POOL_WAIT_TIMEOUT_S, POOL_HEALTH_CHECK_INTERVAL_S
+    if min_size is not None: POOL_MIN_SIZE = min_size
+    if max_size is not None: POOL_MAX_SIZE = max_size
+    if idle_timeout_s is not None: POOL_IDLE_TIMEOUT_S = idle_timeout_s
+    if wait_timeout_s is not None: POOL_WAIT_TIMEOUT_S = wait_timeout_s
+    if health_check_interval_s is not None: POOL_HEALTH_CHECK_INTERVAL_S = health_check_interval_s
+    close_pool()
+
+def pool_stats():
+    """Hit/miss, wait-time and size counters of the connection pool (empty if no pool yet)."""
+    return _pool.stats() if _pool is not None else {}
+
+def close_pool():
+    """Closes every idle pooled connection (call on shutdown)."""
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        stats = pool.stats()
+        print(f"[db] Closing connection pool: hits={stats['hits']}, misses={stats['misses']}, waits={stats['waits']}, avg_wait={stats['avg_wait_s'] * 1000:.1f}ms")
+        pool.close()
 
 @contextmanager
 def get_conn():
-    """Provides an Oracle database connection that is safely closed."""
-    conn = None
+    """Provides a pooled database connection that is returned to the pool afterwards."""
+    backend = get_backend(); pool = get_pool()
+    conn = None; failed = False
     try:
-        conn = oracledb.connect(user=ORACLE_USER, password=ORACLE_PASSWORD, dsn=ORACLE_DSN)
+        conn = pool.acquire()
         yield conn
-    except oracledb.DatabaseError as e:
+    except backend.DatabaseError as e:
+        failed = True
         print(f"Database connection error: {e}"); raise
     finally:
-        if conn:
-            try: conn.close()
-            except oracledb.DatabaseError as e: print(f"Error closing DB connection: {e}")
+        # Uncommitted work is rolled back; after an error the connection is pinged before reuse
+        if conn is not None: pool.release(conn, check_health=failed)
+
+def init_driver():
+    """Prepares the active backend's driver. Only Oracle has real work to do here."""
+    return get_backend().init_driver()
 
 def init_oracle_driver():
-    """Initializes the Oracle client driver."""
-    try:
-        print(f"Initializing Oracle client from: {ORACLE_CLIENT_LIB_DIR}...")
-        oracledb.init_oracle_client(lib_dir=ORACLE_CLIENT_LIB_DIR)
-        print("Oracle client initialized."); return True
-    except Exception as e:
-        print(f"CRITICAL: Failed to initialize Oracle client: {e}"); return False
-
-def init_db_schema():
-    """Initializes the database schema only if objects don't exist (11g compatible)."""
-    print("Checking database schema (11g compatible)...")
-    created_objects = False
+    """Initializes the Oracle client driver (kept for callers that still use the old name)."""
+    return importlib.import_module(".oracle_backend", __package__).init_driver()
+
+def init_db_schema(background=True):
+    """Brings the schema up to date through the versioned migrations (a single SELECT when it already is).
+
+    Large data migrations continue on a background thread unless background is False.
+    """
+    backend = get_backend()
     try:
-        with get_conn() as conn:
-            c = conn.cursor()
-
-            # --- Check and Create Users Table, Sequence, Trigger ---
-            c.execute("SELECT table_name FROM user_tables WHERE table_name = 'USERS'")
-            if c.fetchone() is None:
-                print("Creating table: USERS")
-                c.execute("CREATE TABLE users (id NUMBER PRIMARY KEY, email VARCHAR2(255) UNIQUE NOT NULL, password_hash RAW(60) NOT NULL, name VARCHAR2(255))")
-                created_objects = True # Mark that we created something
-
-                # Only create sequence/trigger if table was just created
-                print("Creating sequence: USERS_SEQ")
-                c.execute("CREATE SEQUENCE users_seq START WITH 1 INCREMENT BY 1 NOCACHE")
-                print("Creating trigger: USERS_BI")
-                c.execute("""CREATE OR REPLACE TRIGGER users_bi BEFORE INSERT ON users FOR EACH ROW
-                           BEGIN IF :new.id IS NULL THEN SELECT users_seq.NEXTVAL INTO :new.id FROM dual; END IF; END;""")
-                c.execute("ALTER TRIGGER users_bi ENABLE")
-            else:
-                print("Table 'USERS' already exists.")
-
-            # --- Check and Create Meal Logs Table, Sequence, Trigger ---
-            c.execute("SELECT table_name FROM user_tables WHERE table_name = 'MEAL_LOGS'")
-            if c.fetchone() is None:
-                print("Creating table: MEAL_LOGS")
-                c.execute("""CREATE TABLE meal_logs (id NUMBER PRIMARY KEY, user_id NUMBER, date_log DATE, meal VARCHAR2(500), calories NUMBER,
-                           protein VARCHAR2(50), carbs VARCHAR2(50), fat VARCHAR2(50), fiber VARCHAR2(50), sugar VARCHAR2(50), sodium VARCHAR2(50),
-                           FOREIGN KEY(user_id) REFERENCES users(id) ON DELETE CASCADE)""")
-                created_objects = True
-
-                print("Creating sequence: MEAL_LOGS_SEQ")
-                c.execute("CREATE SEQUENCE meal_logs_seq START WITH 1 INCREMENT BY 1 NOCACHE")
-                print("Creating trigger: MEAL_LOGS_BI")
-                c.execute("""CREATE OR REPLACE TRIGGER meal_logs_bi BEFORE INSERT ON meal_logs FOR EACH ROW
-                           BEGIN IF :new.id IS NULL THEN SELECT meal_logs_seq.NEXTVAL INTO :new.id FROM dual; END IF; END;""")
-                c.execute("ALTER TRIGGER meal_logs_bi ENABLE")
-            else:
-                print("Table 'MEAL_LOGS' already exists.")
-
-
-            # --- Check and Create Profiles Table ---
-            c.execute("SELECT table_name FROM user_tables WHERE table_name = 'PROFILES'")
-            if c.fetchone() is None:
-                print("Creating table: PROFILES")
-                c.execute("""CREATE TABLE profiles (user_id NUMBER PRIMARY KEY, name VARCHAR2(255), dob VARCHAR2(20), height_cm NUMBER,
-                           weight_kg NUMBER, activity_level VARCHAR2(100), FOREIGN KEY(user_id) REFERENCES users(id) ON DELETE CASCADE)""")
-                created_objects = True
-            else:
-                print("Table 'PROFILES' already exists.")
-
-            if created_objects:
-                conn.commit() # Commit only if we actually created something
-                print("Database schema creation complete.")
-            else:
-                print("Database schema check complete (already exists).")
-
-    except oracledb.DatabaseError as e:
+        from .migrations import migrate # Imports db itself, so loaded here rather than at the top
+        migrate(background=background)
+        get_pool().prefill()
+    except backend.DatabaseError as e:
         print(f"Error checking/initializing database schema: {e}")
-        error_obj, = e.args
-        print(f"Oracle Error Code: {error_obj.code}, Message: {error_obj.message}")
+        backend.describe_error(e)
         raise # Re-raise after logging
 
 
 def _row_to_dict(cursor, row):
-    """Converts an Oracle row (tuple) to a dictionary using cursor description."""
+    """Converts a row (tuple) to a dictionary using cursor description."""
     if row is None: return None
     cols = [d[0].lower() for d in cursor.description]
     return dict(zip(cols, row))
 
 # --- User Functions ---
+# bcrypt is imported inside these functions: a remembered session never needs it (see session.py)
+def hash_password(password):
+    import bcrypt
+    return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt(rounds=BCRYPT_ROUNDS))
+
+def _hash_rounds(password_hash):
+    """Cost factor of a '$2b$12$...' hash (None if it can't be read)."""
+    try: return int(password_hash.split(b"$")[2])
+    except (IndexError, ValueError): return None
+
 def create_user(email, password, name=""):
     """Creates a new user with a hashed password."""
-    password_hash = bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt())
+    backend = get_backend()
+    password_hash = hash_password(password)
     with get_conn() as conn:
         c = conn.cursor();
-        try: c.execute("INSERT INTO users (email, password_hash, name) VALUES (:1, :2, :3)", (email, password_hash, name)); conn.commit(); return True
-        except oracledb.IntegrityError: print(f"Email exists: {email}"); return False
-        except oracledb.DatabaseError as e: print(f"DB error creating user: {e}"); conn.rollback(); return False
+        try: c.execute(_sql("create_user"), {"email": email, "password_hash": password_hash, "name": name}); conn.commit(); return True
+        except backend.IntegrityError: print(f"Email exists: {email}"); return False
+        except backend.DatabaseError as e: print(f"DB error creating user: {e}"); conn.rollback(); return False
 
-def authenticate(email, password):
-    """Authenticates a user by email and password."""
+def get_user_by_email(email):
+    """Returns the user row for an email (including password_hash), or None."""
     with get_conn() as conn:
-        c = conn.cursor(); c.execute("SELECT * FROM users WHERE email = :1", (email,)); user_row = c.fetchone()
-        if user_row:
-            user_dict = _row_to_dict(c, user_row); stored_hash = user_dict["password_hash"]
-            if isinstance(stored_hash, memoryview): stored_hash = bytes(stored_hash)
-            if bcrypt.checkpw(password.encode('utf-8'), stored_hash): return user_dict
+        c = conn.cursor(); c.execute(_sql("get_user_by_email"), {"email": email}); user_row = c.fetchone()
+        return _row_to_dict(c, user_row) if user_row else None
+
+def authenticate(email, password):
+    """Authenticates a user by email and password.
+
+    A hash made with another cost factor than BCRYPT_ROUNDS is replaced while the plain password is at hand.
+    """
+    import bcrypt
+    user_dict = get_user_by_email(email)
+    if user_dict:
+        stored_hash = bytes(user_dict["password_hash"]) # memoryview (SQLite) or bytes
+        if bcrypt.checkpw(password.encode('utf-8'), stored_hash):
+            rounds = _hash_rounds(stored_hash)
+            if rounds != BCRYPT_ROUNDS:
+                stored_hash = hash_password(password)
+                with get_conn() as conn:
+                    c = conn.cursor(); c.execute(_sql("update_password_hash"), {"id": user_dict["id"], "password_hash": stored_hash}); conn.commit()
+                print(f"[db] Rehashed password of user {user_dict['id']} ({rounds} -> {BCRYPT_ROUNDS} rounds).")
+            user_dict["password_hash"] = stored_hash; return user_dict
     return None
 
+def sign_up(email, password, name=""):
+    """Creates an account and returns its user row (one bcrypt hash, no second login check), or None if the email is taken."""
+    return get_user_by_email(email) if create_user(email, password, name) else None
+
 # --- Profile Functions ---
 def update_profile(user_id, name, dob, height, weight, activity):
     """Updates or inserts a user's profile."""
     with get_conn() as conn:
-        c = conn.cursor(); c.execute("""MERGE INTO profiles p USING (SELECT :user_id AS user_id FROM dual) d ON (p.user_id = d.user_id) WHEN MATCHED THEN UPDATE SET p.name = :name, p.dob = :dob, p.height_cm = :height, p.weight_kg = :weight, p.activity_level = :activity WHEN NOT MATCHED THEN INSERT (user_id, name, dob, height_cm, weight_kg, activity_level) VALUES (:user_id, :name, :dob, :height, :weight, :activity)""", {"user_id": user_id, "name": name, "dob": dob, "height": height, "weight": weight, "activity": activity}); conn.commit()
+        c = conn.cursor(); c.execute(_sql("upsert_profile"), {"user_id": user_id, "name": name, "dob": dob, "height": height, "weight": weight, "activity": activity}); conn.commit()
 
 def get_profile(user_id):
     """Retrieves a user's profile."""
     with get_conn() as conn:
-        c = conn.cursor(); c.execute("SELECT * FROM profiles WHERE user_id = :1", (user_id,)); row = c.fetchone()
+        c = conn.cursor(); c.execute(_sql("get_profile"), {"user_id": user_id}); row = c.fetchone()
         return _row_to_dict(c, row) if row else None
 
+def backfill_nutrient_columns(batch_size=NUTRIENT_BACKFILL_BATCH_SIZE):
+    """Parses legacy text nutrients ('12.3g') into the numeric columns in small batches, then retires the text columns.
+
+    Each batch is its own short transaction, so it can run while the app is in use. Returns the number of rows visited.
+    """
+    backend = get_backend()
+    with get_conn() as conn: legacy = backend.legacy_nutrient_columns(conn)
+    if not legacy: return 0
+    print(f"[db] Backfilling numeric nutrient columns from {legacy} in batches of {batch_size}...")
+    select_sql = f"SELECT id, {', '.join(legacy)} FROM meal_logs WHERE id > :after_id ORDER BY id"
+    set_numeric = ", ".join(f"{NUTRIENT_COLUMNS[col]} = COALESCE({NUTRIENT_COLUMNS[col]}, :{NUTRIENT_COLUMNS[col]})" for col in legacy)
+    clear_text = ", ".join(f"{col} = NULL" for col in legacy)
+    update_sql = f"UPDATE meal_logs SET {set_numeric}, {clear_text} WHERE id = :id"
+    after_id = 0; visited = 0
+    while True:
+        with get_conn() as conn:
+            c = conn.cursor(); c.execute(select_sql, {"after_id": after_id}); rows = c.fetchmany(batch_size)
+            if not rows: break
+            params = []
+            for row in rows:
+                values = {"id": row[0]}
+                for col, raw in zip(legacy, row[1:]): values[NUTRIENT_COLUMNS[col]] = parse_amount(raw, NUTRIENT_UNITS[col])
+                params.append(values)
+            c.executemany(update_sql, params); conn.commit()
+        after_id = rows[-1][0]; visited += len(rows)
+        print(f"[db]   ...{visited} rows converted (last id {after_id})")
+    with get_conn() as conn:
+        if backend.drop_legacy_nutrient_columns(conn, legacy): conn.commit()
+    print(f"[db] Nutrient backfill complete ({visited} rows).")
+    return visited
+
 # --- Meal Log Functions ---
+def _meal_params(user_id, date, meal, calories, protein, carbs, fat, fiber, sugar, sodium):
+    """Parses UI strings once into the numeric columns (kcal, g, sodium in mg)."""
+    params = {"user_id": user_id, "date_log": date, "meal": meal, "calories": parse_calories(calories)}
+    params.update(parse_nutrients({"protein": protein, "carbs": carbs, "fat": fat, "fiber": fiber, "sugar": sugar, "sodium": sodium}))
+    return params
+
 def add_meal(user_id, date, meal, calories, protein, carbs, fat, fiber, sugar, sodium):
-    """Adds a meal entry using direct string values from the UI."""
-    try: calories_f = float(calories) if calories else 0.0
-    except (ValueError, TypeError): calories_f = 0.0
+    """Adds a meal entry; nutrient strings from the UI ('12.3g') are parsed to numbers here."""
+    params = _meal_params(user_id, date, meal, calories, protein, carbs, fat, fiber, sugar, sodium)
+    with get_conn() as conn:
+        c = conn.cursor(); c.execute(_sql("add_meal"), params)
+        _apply_rollup_deltas(c, [_rollup_delta(params, +1)]); conn.commit()
+
+def add_meals(user_id, rows):
+    """Inserts many entries with one array-bound INSERT, one rollup update and a single commit.
+
+    Each row is a dict with 'date_log', 'meal', 'calories' and the UI nutrient fields ('protein', ..., 'sodium').
+    Returns the number of rows inserted.
+    """
+    batch = [_meal_params(user_id, row.get("date_log"), row.get("meal"), row.get("calories"), row.get("protein"), row.get("carbs"),
+                          row.get("fat"), row.get("fiber"), row.get("sugar"), row.get("sodium")) for row in rows]
+    if not batch: return 0
     with get_conn() as conn:
-        c = conn.cursor(); c.execute("""INSERT INTO meal_logs (user_id, date_log, meal, calories, protein, carbs, fat, fiber, sugar, sodium) VALUES (:1, TO_DATE(:2, 'YYYY-MM-DD'), :3, :4, :5, :6, :7, :8, :9, :10)""", (user_id, date, meal, calories_f, protein, carbs, fat, fiber, sugar, sodium)); conn.commit()
+        c = conn.cursor(); c.executemany(_sql("add_meal"), batch)
+        _apply_rollup_deltas(c, [_rollup_delta(params, +1) for params in batch]); conn.commit()
+    return len(batch)
+
+def _get_meals_by_ids(c, ids):
+    """Fetches meal rows by id in IN-list chunks. Returns {id: row}."""
+    backend = get_backend(); found = {}
+    for start in range(0, len(ids), backend.MAX_IN_LIST):
+        chunk = ids[start:start + backend.MAX_IN_LIST]
+        binds = {f"id{i}": meal_id for i, meal_id in enumerate(chunk)}
+        c.execute(_sql("get_meals_by_ids").format(ids=", ".join(f":{name}" for name in binds)), binds)
+        for row in c.fetchall():
+            meal = _row_to_dict(c, row); found[meal["id"]] = meal
+    return found
+
+def get_meals_by_ids(meal_ids):
+    """Current rows for these meal ids as {id: row}; ids that no longer exist are absent."""
+    with get_conn() as conn: return _get_meals_by_ids(conn.cursor(), sorted({int(meal_id) for meal_id in meal_ids}))
 
 def get_meals(user_id, limit=200):
-    """Retrieves meal log entries for a user, using ROWNUM for Oracle 11g compatibility."""
+    """Retrieves the most recent meal log entries for a user (numeric nutrient columns, see nutrients.py)."""
+    return get_meals_after(user_id, None, limit)[0]
+
+def get_meals_after(user_id, cursor=None, page_size=100):
+    """Keyset pagination over a user's log, newest first.
+
+    `cursor` is the (date_log, id) of the last row already shown, or None for the first page.
+    Returns (rows, next_cursor); next_cursor is None once there are no older rows.
+    """
     with get_conn() as conn:
         c = conn.cursor()
-        c.execute("""SELECT * FROM (SELECT id, TO_CHAR(date_log, 'YYYY-MM-DD') AS date_log, meal, calories, protein, carbs, fat, fiber, sugar, sodium FROM meal_logs WHERE user_id = :1 ORDER BY date_log DESC, id DESC) WHERE ROWNUM <= :2""", (user_id, limit)); rows = c.fetchall()
-        return [_row_to_dict(c, row) for row in rows]
+        if cursor is None:
+            c.execute(_sql("get_meals"), {"user_id": user_id, "limit": page_size})
+        else:
+            c.execute(_sql("get_meals_after"), {"user_id": user_id, "cursor_date": cursor[0], "cursor_id": int(cursor[1]), "limit": page_size})
+        rows = [_row_to_dict(c, row) for row in c.fetchall()]
+    next_cursor = (rows[-1]["date_log"], rows[-1]["id"]) if len(rows) == page_size else None
+    return rows, next_cursor
+
+def _stream_rows(sql, params, arraysize):
+    """Yields row dicts from one query, fetching `arraysize` rows at a time on a pooled connection held until exhausted or closed."""
+    with get_conn() as conn:
+        c = conn.cursor(); get_backend().configure_fetch(c, arraysize); c.execute(sql, params)
+        cols = [d[0].lower() for d in c.description]
+        while True:
+            rows = c.fetchmany(arraysize)
+            if not rows: return
+            for row in rows: yield dict(zip(cols, row))
+
+def iter_meals(user_id, start_date=None, end_date=None, after=None, arraysize=EXPORT_ARRAYSIZE):
+    """Lazily yields a user's full log oldest first, optionally within [start_date, end_date] (ISO, inclusive).
+
+    `after` is the (date_log, id) of the last row already consumed, so an interrupted export can resume from it.
+    """
+    start_date = start_date or EXPORT_MIN_DATE
+    cursor_date, cursor_id = (after[0], int(after[1])) if after and after[0] >= start_date else (start_date, 0)
+    yield from _stream_rows(_sql("export_meals"), {"user_id": user_id, "end_date": end_date or EXPORT_MAX_DATE,
+                                                  "cursor_date": cursor_date, "cursor_id": cursor_id}, arraysize)
 
 def delete_meal(meal_id):
     """Deletes a specific meal log entry by its ID."""
-    with get_conn() as conn: c = conn.cursor(); c.execute("DELETE FROM meal_logs WHERE id = :1", (int(meal_id),)); conn.commit()
+    delete_meals([meal_id])
+
+def delete_meals(meal_ids):
+    """Deletes many entries with one array-bound DELETE and a single commit. Returns the number deleted."""
+    ids = sorted({int(meal_id) for meal_id in meal_ids})
+    if not ids: return 0
+    with get_conn() as conn:
+        c = conn.cursor(); old = _get_meals_by_ids(c, ids)
+        missing = [meal_id for meal_id in ids if meal_id not in old]
+        if missing: print(f"DB: Meals {missing} not found, skipping.")
+        if not old: return 0
+        c.executemany(_sql("delete_meal"), [{"id": meal_id} for meal_id in old])
+        _apply_rollup_deltas(c, [_rollup_delta(meal, -1) for meal in old.values()]); conn.commit()
+    print(f"DB: Deleted {len(old)} meal(s).")
+    return len(old)
 
 def update_meal(meal_id, date_str, meal, calories_str, protein_str, carbs_str, fat_str, fiber_str, sugar_str, sodium_str):
     """Updates an existing meal log entry in the database."""
     print(f"DB: Updating meal {meal_id}...");
-    try: calories = float(calories_str) if calories_str else 0.0
-    except ValueError: print(f"Warning: Invalid calorie value '{calories_str}'. Setting to 0."); calories = 0.0
-    with get_conn() as conn:
-        c = conn.cursor(); c.execute("""UPDATE meal_logs SET date_log = TO_DATE(:1, 'YYYY-MM-DD'), meal = :2, calories = :3, protein = :4, carbs = :5, fat = :6, fiber = :7, sugar = :8, sodium = :9 WHERE id = :10""", (date_str, meal, calories, protein_str, carbs_str, fat_str, fiber_str, sugar_str, sodium_str, int(meal_id))); conn.commit()
+    if update_meals([{"id": meal_id, "date_log": date_str, "meal": meal, "calories": calories_str, "protein": protein_str, "carbs": carbs_str,
+                      "fat": fat_str, "fiber": fiber_str, "sugar": sugar_str, "sodium": sodium_str}]):
         print(f"DB: Meal {meal_id} updated.")
 
+def update_meals(rows):
+    """Updates many entries in one transaction with an array-bound UPDATE.
+
+    Each row is a dict with 'id', 'date_log', 'meal', 'calories' and the UI nutrient fields
+    ('protein', ..., 'sodium') as strings or numbers. Returns the number of rows updated.
+    """
+    params_by_id = {}
+    for row in rows:
+        params = _meal_params(None, row.get("date_log"), row.get("meal"), row.get("calories"), row.get("protein"), row.get("carbs"),
+                              row.get("fat"), row.get("fiber"), row.get("sugar"), row.get("sodium"))
+        del params["user_id"]; params["id"] = int(row["id"]); params_by_id[params["id"]] = params
+    if not params_by_id: return 0
+    with get_conn() as conn:
+        c = conn.cursor(); old = _get_meals_by_ids(c, sorted(params_by_id))
+        missing = [meal_id for meal_id in params_by_id if meal_id not in old]
+        if missing: print(f"DB: Meals {missing} not found, nothing to update for them.")
+        if not old: return 0
+        batch = [params_by_id[meal_id] for meal_id in old]
+        c.executemany(_sql("update_meal"), batch)
+        deltas = [_rollup_delta(meal, -1) for meal in old.values()]
+        deltas += [_rollup_delta(dict(params, user_id=old[params["id"]]["user_id"]), +1) for params in batch]
+        _apply_rollup_deltas(c, deltas); conn.commit()
+    return len(batch)
+
+# --- Daily Rollup ---
+_ROLLUP_CLEAR_SQL = "DELETE FROM daily_nutrition WHERE (:user_id IS NULL OR user_id = :user_id)"
+_ROLLUP_REBUILD_SQL = f"""INSERT INTO daily_nutrition (user_id, date_log, meal_count, {', '.join(ROLLUP_COLUMNS)})
+    SELECT user_id, date_log, COUNT(*), {', '.join(f'COALESCE(SUM({col}), 0)' for col in ROLLUP_COLUMNS)}
+    FROM meal_logs WHERE user_id IS NOT NULL AND date_log IS NOT NULL AND (:user_id IS NULL OR user_id = :user_id)
+    GROUP BY user_id, date_log"""
+
+def _rollup_delta(meal, sign):
+    """The change one meal row makes to its day's totals (+1 when added, -1 when removed)."""
+    delta = {"user_id": meal["user_id"], "date_log": meal["date_log"], "meal_count": sign}
+    for col in ROLLUP_COLUMNS: delta[col] = sign * (meal.get(col) or 0.0)
+    return delta
+
+def _apply_rollup_deltas(c, deltas):
+    """Folds deltas per (user, day) and applies them on the caller's cursor, inside its transaction."""
+    merged = {}
+    for d in deltas:
+        key = (d["user_id"], d["date_log"])
+        if key not in merged: merged[key] = dict(d); continue
+        acc = merged[key]; acc["meal_count"] += d["meal_count"]
+        for col in ROLLUP_COLUMNS: acc[col] += d[col]
+    changed = [d for d in merged.values() if d["meal_count"] or any(d[col] for col in ROLLUP_COLUMNS)]
+    if not changed: return
+    c.executemany(_sql("apply_daily_delta"), changed)
+    shrunk = [{"user_id": d["user_id"], "date_log": d["date_log"]} for d in changed if d["meal_count"] < 0]
+    if shrunk: c.executemany(_sql("prune_daily"), shrunk) # Drop days whose last meal went away
+
+def rebuild_daily_rollup(user_id=None):
+    """Recomputes daily_nutrition from meal_logs in one transaction, for one user or everyone."""
+    print(f"[db] Rebuilding daily nutrition rollup ({'all users' if user_id is None else f'user {user_id}'})...")
+    with get_conn() as conn:
+        c = conn.cursor()
+        c.execute(_ROLLUP_CLEAR_SQL, {"user_id": user_id})
+        c.execute(_ROLLUP_REBUILD_SQL, {"user_id": user_id}); days = c.rowcount
+        conn.commit()
+    print(f"[db] Rollup rebuilt: {days} day rows.")
+    return days
+
 # --- Analytics Functions ---
-def get_all_nutrition_for_today(user_id):
-    """Calculates ALL key nutrient totals for today's chart."""
+def get_daily_totals(user_id, day=None):
+    """Nutrient totals for one day (today by default), read from the rollup table."""
+    day = day or datetime.date.today().isoformat()
     with get_conn() as conn:
         c = conn.cursor()
-        # Use REGEXP_SUBSTR robustly
-        c.execute("""
-            SELECT
-                NVL(SUM(calories), 0) as total_calories,
-                NVL(SUM(TO_NUMBER(REGEXP_SUBSTR(protein, '^[0-9]+(\.[0-9]+)?'))), 0) as total_protein,
-                NVL(SUM(TO_NUMBER(REGEXP_SUBSTR(carbs, '^[0-9]+(\.[0-9]+)?'))), 0) as total_carbs,
-                NVL(SUM(TO_NUMBER(REGEXP_SUBSTR(fat, '^[0-9]+(\.[0-9]+)?'))), 0) as total_fat,
-                NVL(SUM(TO_NUMBER(REGEXP_SUBSTR(fiber, '^[0-9]+(\.[0-9]+)?'))), 0) as total_fiber,
-                NVL(SUM(TO_NUMBER(REGEXP_SUBSTR(sugar, '^[0-9]+(\.[0-9]+)?'))), 0) as total_sugar,
-                NVL(SUM(TO_NUMBER(REGEXP_SUBSTR(sodium, '^[0-9]+(\.[0-9]+)?'))), 0) as total_sodium
-            FROM meal_logs
-            WHERE user_id = :1 AND date_log = TRUNC(SYSDATE)
-        """, (user_id,))
-        row = c.fetchone(); return _row_to_dict(c, row)
\ No newline at end of file
+        c.execute(_sql("daily_totals"), {"user_id": user_id, "date_log": day})
+        row = c.fetchone()
+        if row: return _row_to_dict(c, row)
+    return {"meal_count": 0, "total_calories": 0, "total_protein": 0, "total_carbs": 0, "total_fat": 0, "total_fiber": 0, "total_sugar": 0, "total_sodium": 0}
+
+def get_daily_history(user_id, start_date, end_date):
+    """Per-day totals between two ISO dates (inclusive); days without meals are absent."""
+    with get_conn() as conn:
+        c = conn.cursor()
+        c.execute(_sql("daily_history"), {"user_id": user_id, "start_date": start_date, "end_date": end_date})
+        return [_row_to_dict(c, row) for row in c.fetchall()]
+
+def iter_daily_history(user_id, start_date=None, end_date=None, arraysize=EXPORT_ARRAYSIZE):
+    """Streaming form of get_daily_history with open-ended defaults, for exports."""
+    yield from _stream_rows(_sql("daily_history"), {"user_id": user_id, "start_date": start_date or EXPORT_MIN_DATE,
+                                                   "end_date": end_date or EXPORT_MAX_DATE}, arraysize)
+
+def get_all_nutrition_for_today(user_id):
+    """Calculates ALL key nutrient totals for today's chart."""
+    return get_daily_totals(user_id)
\ No newline at end of file
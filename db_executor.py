@@ -0,0 +1,95 @@
+# smartplate/ui/db_executor.py
+"""Runs blocking db calls on worker threads and hands the results back on the Tk thread.
+
+Workers never touch Tk: finished tasks go onto a queue that the Tk thread drains with
+after(), and only then are the page callbacks invoked.
+"""
+from concurrent.futures import ThreadPoolExecutor
+import itertools
+import queue
+import threading
+import tkinter as tk
+
+DB_WORKERS = 3 # Keep below db.POOL_MAX_SIZE so background work can't starve the pool
+POLL_INTERVAL_MS = 15 # How often the Tk thread checks for finished tasks while any are pending
+
+class DbTask:
+    """Handle for one submitted call. cancel() drops it if it hasn't run, and suppresses its callbacks if it has."""
+    _ids = itertools.count(1)
+
+    def __init__(self, fn, args, kwargs, on_success, on_error, on_done, label):
+        self.id = next(self._ids); self.label = label or getattr(fn, "__name__", "task")
+        self.fn = fn; self.args = args; self.kwargs = kwargs
+        self.on_success = on_success; self.on_error = on_error; self.on_done = on_done
+        self._cancelled = threading.Event()
+
+    def cancel(self): self._cancelled.set()
+
+    @property
+    def cancelled(self): return self._cancelled.is_set()
+
+class DbExecutor:
+    """A small worker pool for db calls, shared by every page of one Tk root."""
+
+    def __init__(self, widget, max_workers=DB_WORKERS, poll_ms=POLL_INTERVAL_MS):
+        self.widget = widget; self.poll_ms = poll_ms
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="smartplate-db")
+        self._results = queue.Queue(); self._pending = 0; self._polling = False; self._closed = False
+
+    def submit(self, fn, *args, on_success=None, on_error=None, on_done=None, label=None, **kwargs):
+        """Runs fn(*args, **kwargs) on a worker. Must be called from the Tk thread.
+
+        on_success(result) or on_error(exception) runs on the Tk thread, followed by on_done()
+        unless the task was cancelled first.
+        """
+        if self._closed: raise RuntimeError("DbExecutor is shut down.")
+        task = DbTask(fn, args, kwargs, on_success, on_error, on_done, label)
+        self._pending += 1; self._pool.submit(self._run, task); self._schedule_poll()
+        return task
+
+    def shutdown(self, wait=False):
+        """Stops accepting work; queued tasks that haven't started are dropped."""
+        self._closed = True; self._pool.shutdown(wait=wait, cancel_futures=True)
+
+    # --- Worker side ---
+    def _run(self, task):
+        if task.cancelled: self._results.put((task, None, None)); return
+        try: result, error = task.fn(*task.args, **task.kwargs), None
+        except Exception as e: result, error = None, e
+        self._results.put((task, result, error))
+
+    # --- Tk side ---
+    def _schedule_poll(self):
+        if self._polling or self._closed: return
+        try: self.widget.after(self.poll_ms, self._drain); self._polling = True
+        except tk.TclError: pass # The widget was destroyed (app closing)
+
+    def _drain(self):
+        self._polling = False
+        while True:
+            try: task, result, error = self._results.get_nowait()
+            except queue.Empty: break
+            self._pending -= 1
+            if task.cancelled: continue
+            try:
+                if error is None:
+                    if task.on_success: task.on_success(result)
+                elif task.on_error: task.on_error(error)
+                else: print(f"[DbExecutor] '{task.label}' failed: {error}")
+            except Exception as e: print(f"[DbExecutor] Callback for '{task.label}' raised: {e}")
+            try:
+                if task.on_done: task.on_done() # Runs even if the callback raised, so loading indicators are cleared
+            except Exception as e: print(f"[DbExecutor] on_done for '{task.label}' raised: {e}")
+        if self._pending > 0: self._schedule_poll()
+
+def get_executor(widget):
+    """The executor attached to `widget`'s Tk root, created on first use."""
+    root = widget._root()
+    executor = getattr(root, "_smartplate_db_executor", None)
+    if executor is None: executor = root._smartplate_db_executor = DbExecutor(root)
+    return executor
+
+def shutdown_executor(root):
+    """Shuts down the root's executor, if one was created."""
+    executor = getattr(root, "_smartplate_db_executor", None)
+    if executor: executor.shutdown(); root._smartplate_db_executor = None
\ No newline at end of file
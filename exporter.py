@@ -0,0 +1,87 @@
+# smartplate/exporter.py
+"""Streaming export of a user's meal log and daily rollup to CSV, JSONL or gzipped JSONL.
+
+Rows come straight from db.iter_meals / db.iter_daily_history and are written as they
+arrive, so memory use doesn't depend on how long the history is.
+"""
+import csv
+import gzip
+import json
+import sys
+import time
+from contextlib import closing, nullcontext
+from . import db
+
+MEAL_FIELDS = ["id", "date_log", "meal", "calories", "protein_g", "carbs_g", "fat_g", "fiber_g", "sugar_g", "sodium_mg"]
+DAILY_FIELDS = ["date_log", "meal_count", "calories", "protein_g", "carbs_g", "fat_g", "fiber_g", "sugar_g", "sodium_mg"]
+PROGRESS_EVERY_ROWS = 50000
+
+def detect_format(path):
+    """'csv', 'jsonl' or 'jsonl.gz' from the file extension."""
+    name = path.lower()
+    if name.endswith((".jsonl.gz", ".ndjson.gz", ".json.gz")): return "jsonl.gz"
+    if name.endswith((".jsonl", ".ndjson", ".json")): return "jsonl"
+    if name.endswith(".csv"): return "csv"
+    raise ValueError(f"Can't tell the format of '{path}'; pass fmt='csv', 'jsonl' or 'jsonl.gz'.")
+
+def _open_text(path, fmt, append):
+    mode = "a" if append else "w"
+    if path == "-": return nullcontext(sys.stdout) # Leave stdout open for the caller
+    if fmt == "jsonl.gz": return gzip.open(path, mode + "t", encoding="utf-8", newline="")
+    return open(path, mode, encoding="utf-8", newline="")
+
+def write_rows(rows, path, fields, fmt=None, append=False, on_row=None):
+    """Writes dict rows to `path` ('-' for stdout) as they are produced. Returns the number written.
+
+    `on_row(row)` is called after each row is written (used to track the resume cursor).
+    With append=True the CSV header is skipped, so a resumed export continues the same file.
+    """
+    fmt = fmt or ("jsonl" if path == "-" else detect_format(path))
+    if fmt not in ("csv", "jsonl", "jsonl.gz"): raise ValueError(f"Unsupported export format '{fmt}'.")
+    count = 0; started = time.perf_counter()
+    with closing(rows), _open_text(path, fmt, append) as f:
+        if fmt == "csv":
+            writer = csv.DictWriter(f, fieldnames=fields, extrasaction="ignore")
+            if not append: writer.writeheader()
+            write = writer.writerow
+        else:
+            write = lambda row: f.write(json.dumps({k: row.get(k) for k in fields}, separators=(",", ":")) + "\n")
+        for row in rows:
+            write(row); count += 1
+            if on_row: on_row(row)
+            if count % PROGRESS_EVERY_ROWS == 0:
+                print(f"[Exporter] {count:,} rows written ({count / (time.perf_counter() - started):,.0f} rows/s)", file=sys.stderr)
+    return count
+
+def export_meals(user_id, path, fmt=None, start_date=None, end_date=None, after=None, append=False, arraysize=db.EXPORT_ARRAYSIZE):
+    """Exports a user's meal log oldest first. Returns stats with the (date_log, id) cursor of the last row written.
+
+    If the export is interrupted, pass that cursor back as `after` (with append=True) to carry on where it stopped.
+    """
+    stats = {"rows": 0, "last_cursor": tuple(after) if after else None, "elapsed_s": 0.0}
+    def track(row): stats["last_cursor"] = (row["date_log"], row["id"])
+    started = time.perf_counter()
+    try:
+        stats["rows"] = write_rows(db.iter_meals(user_id, start_date, end_date, after=after, arraysize=arraysize),
+                                   path, MEAL_FIELDS, fmt=fmt, append=append, on_row=track)
+    except KeyboardInterrupt:
+        if stats["last_cursor"]: print(f"[Exporter] Interrupted; resume after {format_cursor(stats['last_cursor'])}.", file=sys.stderr)
+        raise
+    stats["elapsed_s"] = time.perf_counter() - started
+    return stats
+
+def export_daily(user_id, path, fmt=None, start_date=None, end_date=None, append=False, arraysize=db.EXPORT_ARRAYSIZE):
+    """Exports per-day totals from the daily rollup. Returns stats like export_meals."""
+    started = time.perf_counter()
+    rows = write_rows(db.iter_daily_history(user_id, start_date, end_date, arraysize=arraysize), path, DAILY_FIELDS, fmt=fmt, append=append)
+    return {"rows": rows, "last_cursor": None, "elapsed_s": time.perf_counter() - started}
+
+def format_cursor(cursor):
+    """'2024-05-01,1234' - the form parse_cursor and the CLI --after flag accept."""
+    return f"{cursor[0]},{cursor[1]}"
+
+def parse_cursor(text):
+    """Parses 'YYYY-MM-DD,ID' into a (date_log, id) resume cursor."""
+    date_part, sep, id_part = str(text).partition(",")
+    if not sep or not id_part.strip().isdigit(): raise ValueError(f"Invalid cursor '{text}' (expected YYYY-MM-DD,ID).")
+    return date_part.strip(), int(id_part)
\ No newline at end of file
@@ -0,0 +1,129 @@
+# smartplate/food_db.py
+"""Bundled offline food table (foods.csv) with an in-memory n-gram index for fuzzy name search.
+
+MealLogPage asks this first and only goes to Spoonacular when nothing here matches
+well enough. Results use the same recipe shape as ApiClient.analyze_natural.
+"""
+import csv
+import os
+import re
+import threading
+from collections import defaultdict
+
+FOODS_CSV = os.path.join(os.path.dirname(os.path.abspath(__file__)), "foods.csv")
+MATCH_THRESHOLD = 0.8 # Minimum similarity for a local result to replace an online lookup
+MAX_RESULTS = 5
+
+# foods.csv column -> recipe nutrient code (same codes ApiClient returns)
+_NUTRIENT_CODES = [("protein_g", "PROCNT", "g"), ("carbs_g", "CHOCDF", "g"), ("fat_g", "FAT", "g"),
+                   ("fiber_g", "FIBTG", "g"), ("sugar_g", "SUGAR", "g"), ("sodium_mg", "NA", "mg")]
+_QUANTITY_RE = re.compile(r"^\s*(\d+(?:\.\d+)?|half|one|two|three|four)\s*(?:(kg|g|gms?|grams?|ml|l|litres?|liters?|cups?|tbsp|tablespoons?)\b\.?\s*(?:of\s+)?|x\s+)?",
+                          re.IGNORECASE)
+_WORD_QUANTITIES = {"half": 0.5, "one": 1, "two": 2, "three": 3, "four": 4}
+# Measure word -> (base unit, size in that unit). Volumes are compared with gram servings as if 1 ml weighed 1 g.
+_UNITS = {"g": ("g", 1), "gm": ("g", 1), "gms": ("g", 1), "gram": ("g", 1), "grams": ("g", 1), "kg": ("g", 1000),
+          "ml": ("ml", 1), "l": ("ml", 1000), "litre": ("ml", 1000), "litres": ("ml", 1000), "liter": ("ml", 1000), "liters": ("ml", 1000),
+          "cup": ("cup", 240), "cups": ("cup", 240), "tbsp": ("tbsp", 15), "tablespoon": ("tbsp", 15), "tablespoons": ("tbsp", 15)}
+_SERVING_SIZE_RE = re.compile(r"(\d+(?:\.\d+)?)\s*(g|ml)\b", re.IGNORECASE)
+_SERVING_MEASURE_RE = re.compile(r"^\s*(\d+(?:\.\d+)?)\s*(cups?|tbsp)\b", re.IGNORECASE)
+
+def _normalize(text):
+    """Lower-case words without punctuation; a plural 's' is dropped so 'eggs' finds 'egg'."""
+    words = re.sub(r"[^a-z0-9 ]+", " ", str(text).lower()).split()
+    return " ".join(w[:-1] if len(w) > 3 and w.endswith("s") and not w.endswith("ss") else w for w in words)
+
+def parse_quantity(text):
+    """Splits a leading amount off a meal item as (amount, unit, name); unit is None for a plain count.
+
+    '2 roti' -> (2.0, None, 'roti'), '100 g chicken' -> (100.0, 'g', 'chicken'), 'half cup rice' -> (0.5, 'cup', 'rice').
+    """
+    match = _QUANTITY_RE.match(text)
+    if not match or match.end() >= len(text.rstrip()): return 1.0, None, text.strip()
+    word = match.group(1).lower(); unit = match.group(2)
+    return float(_WORD_QUANTITIES.get(word) or word), unit.lower() if unit else None, text[match.end():].strip()
+
+def servings_for(food, amount, unit):
+    """How many of `food`'s servings `amount` `unit` is, or None if its serving size can't be compared with the unit."""
+    if unit is None: return amount
+    base, size = _UNITS[unit]
+    if base in ("cup", "tbsp"): # A serving given in the same measure ('1 cup cooked (158g)') divides directly
+        measure = _SERVING_MEASURE_RE.match(food["serving"])
+        if measure and _UNITS[measure.group(2).lower()][0] == base: return amount / float(measure.group(1))
+    serving = _SERVING_SIZE_RE.search(food["serving"])
+    return amount * size / float(serving.group(1)) if serving else None
+
+def _trigrams(text):
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+class FoodIndex:
+    """Foods keyed by name and aliases, searchable through a character-trigram inverted index."""
+
+    def __init__(self, foods):
+        self.foods = foods
+        self._names = [] # (normalized name/alias, food index, trigram set)
+        self._postings = defaultdict(list) # trigram -> indexes into self._names
+        for food_id, food in enumerate(foods):
+            for name in [food["name"]] + food["aliases"]:
+                norm = _normalize(name)
+                if not norm: continue
+                grams = _trigrams(norm); name_id = len(self._names); self._names.append((norm, food_id, grams))
+                for gram in grams: self._postings[gram].append(name_id)
+
+    @classmethod
+    def load(cls, path=FOODS_CSV):
+        foods = []
+        with open(path, newline="", encoding="utf-8") as f:
+            for row in csv.DictReader(f):
+                food = {"name": row["name"].strip(), "aliases": [a.strip() for a in (row.get("aliases") or "").split(";") if a.strip()],
+                        "serving": row.get("serving", "").strip(), "calories": float(row["calories"])}
+                for column, _, _ in _NUTRIENT_CODES: food[column] = float(row[column] or 0)
+                foods.append(food)
+        return cls(foods)
+
+    def search(self, query, limit=MAX_RESULTS, min_score=0.0):
+        """Returns [(score, food)] best first; score is the Dice similarity of trigram sets (1.0 = exact)."""
+        norm = _normalize(query)
+        if not norm: return []
+        grams = _trigrams(norm); overlap = defaultdict(int)
+        for gram in grams:
+            for name_id in self._postings.get(gram, ()): overlap[name_id] += 1
+        best = {} # food index -> best score over its names
+        for name_id, shared in overlap.items():
+            name, food_id, name_grams = self._names[name_id]
+            score = 1.0 if name == norm else 2.0 * shared / (len(grams) + len(name_grams))
+            if score > best.get(food_id, 0.0): best[food_id] = score
+        ranked = sorted(((score, food_id) for food_id, score in best.items() if score >= min_score), key=lambda x: (-x[0], x[1]))
+        return [(score, self.foods[food_id]) for score, food_id in ranked[:limit]]
+
+    def lookup(self, query, min_score=MATCH_THRESHOLD):
+        """Recipes in ApiClient's format for a meal description like '2 roti' or '150 g paneer', or None if nothing matches well.
+
+        Weights and volumes are scaled by the food's serving size; foods whose serving has no size in that unit are skipped.
+        """
+        amount, unit, query = parse_quantity(query)
+        recipes = []
+        for _, food in self.search(query, min_score=min_score):
+            servings = servings_for(food, amount, unit)
+            if servings is not None: recipes.append(self.to_recipe(food, servings, f"{amount:g} {unit}" if unit else None))
+        return {"recipes": recipes, "source": "local"} if recipes else None
+
+    @staticmethod
+    def to_recipe(food, servings=1.0, measure=None):
+        if measure: label = f"{food['name']} ({measure})"
+        else: label = f"{food['name']} ({food['serving']})" if servings == 1 else f"{food['name']} x{servings:g} ({food['serving']} each)"
+        nutrients = {"ENERC_KCAL": {"quantity": food["calories"] * servings, "unit": "kcal"}}
+        for column, code, unit in _NUTRIENT_CODES: nutrients[code] = {"quantity": food[column] * servings, "unit": unit}
+        return {"title": label, "calories": round(food["calories"] * servings), "nutrients": nutrients, "source": "local"}
+
+_index = None
+_index_lock = threading.Lock()
+
+def get_food_index():
+    """The shared index, loaded from foods.csv on first use."""
+    global _index
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                _index = FoodIndex.load(); print(f"[FoodIndex] Loaded {len(_index.foods)} local foods.")
+    return _index
\ No newline at end of file
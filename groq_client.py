@@ -1,18 +1,29 @@
 # smartplate/groq_client.py
-from groq import Groq, APIConnectionError, AuthenticationError, RateLimitError, BadRequestError
+from groq import Groq, APIConnectionError, APITimeoutError, AuthenticationError, RateLimitError, BadRequestError
 from .ui.theme_manager import ThemeManager
+import time
 import traceback
 
+MODEL = "llama-3.1-8b-instant"
+MAX_TOKENS = 250
+ANSWER_CACHE_TTL_S = 14 * 24 * 3600
+ANSWER_CACHE_MAX_ENTRIES = 2000
+SYSTEM_PROMPT = "You are a helpful assistant knowledgeable about health, food, and nutrition. Provide concise and informative answers."
+
 class GroqClient:
     """Handles communication with the Groq API (Llama models)."""
+    _answer_cache = None # Shared exact + semantic answer cache, opened on first use
 
     def __init__(self):
         self.api_key = None
         self.client = None
+        self.last_metrics = {}
+        self._credentials_version = None
         self.configure_client()
 
     def configure_client(self):
         """Configures the Groq client with the API key from settings."""
+        self._credentials_version = ThemeManager.credentials_version()
         self.api_key = ThemeManager.get_groq_api_key()
         if self.api_key:
             try:
@@ -28,46 +39,119 @@ class GroqClient:
             self.client = None
             return False
 
-    def generate_response(self, prompt):
-        """Sends a prompt to Groq and returns the response."""
-        if not self.client:
-            if not self.configure_client(): # Try to configure again
-                return "Error: Groq API Key not configured or invalid. Please save it in Settings."
+    def refresh_credentials(self, force=False):
+        """Reconfigures the client, but only after ThemeManager reports a key change (or when forced)."""
+        if force or ThemeManager.credentials_version() != self._credentials_version: self.configure_client()
 
-        print(f"[GroqClient] Sending prompt: '{prompt[:50]}...'")
-        try:
-            # --- ✅ Use the correct, active model ---
-            model_to_use = "llama-3.1-8b-instant" 
-            print(f"[GroqClient] Using model: {model_to_use}")
-            
-            response = self.client.chat.completions.create(
-                model=model_to_use, 
-                # --- End Change ---
-                messages=[
-                    {"role": "system", "content": "You are a helpful assistant knowledgeable about health, food, and nutrition. Provide concise and informative answers."},
-                    {"role": "user", "content": prompt}
-                ],
-                max_tokens=250 
-            )
+    @classmethod
+    def answer_cache(cls):
+        """Persistent cache of answers; similar rewordings of a question reuse the stored answer."""
+        if cls._answer_cache is None:
+            from .semantic_cache import SemanticCache # NumPy is only loaded once the AI is actually used
+            cls._answer_cache = SemanticCache("groq.answers", ttl_s=ANSWER_CACHE_TTL_S, max_entries=ANSWER_CACHE_MAX_ENTRIES)
+        return cls._answer_cache
 
-            response_text = response.choices[0].message.content
-            print(f"[GroqClient] Received response: '{response_text[:100]}...'")
-            return response_text.strip()
+    @classmethod
+    def cache_stats(cls):
+        return cls.answer_cache().stats()
+
+    def _cached_answer(self, prompt):
+        """(answer, info) from the cache for this model and system prompt, or (None, None)."""
+        answer, info = self.answer_cache().get(prompt, model=MODEL, system=SYSTEM_PROMPT, max_tokens=MAX_TOKENS)
+        if answer is not None:
+            similarity = f", similarity {info['similarity']:.2f}" if info["tier"] == "semantic" else ""
+            print(f"[GroqClient] Cache hit ({info['tier']}{similarity}) for '{prompt[:50]}...'")
+        return answer, info
+
+    def _store_answer(self, prompt, answer):
+        self.answer_cache().set(prompt, answer, model=MODEL, system=SYSTEM_PROMPT, max_tokens=MAX_TOKENS)
 
-        except AuthenticationError:
+    def _messages(self, prompt, history=None):
+        """System prompt, then earlier conversation messages (if any), then the question."""
+        return [{"role": "system", "content": SYSTEM_PROMPT}] + list(history or []) + [{"role": "user", "content": prompt}]
+
+    def _error_message(self, e):
+        """Maps a Groq exception to the message shown in the UI."""
+        if isinstance(e, AuthenticationError):
             print("[GroqClient] ERROR: Invalid Groq API Key.")
             self.client = None 
             return "Error: Invalid Groq API Key. Please check and save it in Settings."
-        except RateLimitError:
+        if isinstance(e, RateLimitError):
             print("[GroqClient] ERROR: Groq rate limit or quota exceeded.")
             return "Error: Groq API rate limit or quota exceeded. Please check your account usage."
-        except APIConnectionError as e:
+        if isinstance(e, APITimeoutError): # Subclass of APIConnectionError, so checked first
+            print(f"[GroqClient] ERROR: Groq request timed out: {e}")
+            return "Error: Groq did not answer in time. Please try again."
+        if isinstance(e, APIConnectionError):
             print(f"[GroqClient] ERROR: Could not connect to Groq API: {e}")
             return "Error: Could not connect to Groq. Check your internet connection."
-        except BadRequestError as e:
+        if isinstance(e, BadRequestError):
             print(f"[GroqClient] BAD REQUEST ERROR: {e}\n{traceback.format_exc()}")
             # Show the actual error message from Groq
             return f"Error: Groq Bad Request. API responded with: {str(e)}"
+        print(f"[GroqClient] ERROR generating response: {e}\n{traceback.format_exc()}")
+        return f"Error: An unexpected error occurred while contacting Groq ({type(e).__name__})."
+
+    def generate_response(self, prompt, use_cache=True):
+        """Sends a prompt to Groq and returns the response (from the answer cache when possible)."""
+        if use_cache:
+            answer, _ = self._cached_answer(prompt)
+            if answer is not None: return answer
+        if not self.client:
+            if not self.configure_client(): # Try to configure again
+                return "Error: Groq API Key not configured or invalid. Please save it in Settings."
+
+        print(f"[GroqClient] Sending prompt: '{prompt[:50]}...'")
+        try:
+            print(f"[GroqClient] Using model: {MODEL}")
+            response = self.client.chat.completions.create(model=MODEL, messages=self._messages(prompt), max_tokens=MAX_TOKENS)
+
+            response_text = response.choices[0].message.content
+            print(f"[GroqClient] Received response: '{response_text[:100]}...'")
+            self._store_answer(prompt, response_text.strip())
+            return response_text.strip()
+        except Exception as e: return self._error_message(e)
+
+    def stream_response(self, prompt, use_cache=True, timeout_s=None, history=None):
+        """Yields the answer in text chunks as Groq generates them.
+
+        `history` is earlier conversation messages (see ChatSession); such answers depend on the
+        conversation, so they bypass the answer cache. `timeout_s` bounds the HTTP request (connect
+        and each read) instead of the SDK default.
+        Timing lands in self.last_metrics: ttft_s (time to first token), total_s, chunks, chars and
+        the token usage Groq reports with the last chunk.
+        A cached answer is yielded in one chunk and last_metrics["cached"] describes the match.
+        Errors are yielded as a single 'Error: ...' chunk, like generate_response returns them.
+        """
+        metrics = {"ttft_s": None, "total_s": None, "chunks": 0, "chars": 0, "error": False, "timed_out": False, "cached": None, "usage": None}; self.last_metrics = metrics
+        use_cache = use_cache and not history
+        if use_cache:
+            started = time.perf_counter(); answer, info = self._cached_answer(prompt)
+            if answer is not None:
+                metrics.update(cached=info, ttft_s=time.perf_counter() - started, chunks=1, chars=len(answer)); metrics["total_s"] = metrics["ttft_s"]
+                yield answer; return
+        if not self.client:
+            if not self.configure_client():
+                metrics["error"] = True; yield "Error: Groq API Key not configured or invalid. Please save it in Settings."; return
+
+        print(f"[GroqClient] Streaming prompt: '{prompt[:50]}...'")
+        started = time.perf_counter(); parts = []; stream = None
+        options = {"timeout": timeout_s} if timeout_s is not None else {}
+        try:
+            stream = self.client.chat.completions.create(model=MODEL, messages=self._messages(prompt, history), max_tokens=MAX_TOKENS, stream=True, **options)
+            for chunk in stream:
+                usage = getattr(getattr(chunk, "x_groq", None), "usage", None) # Only on the final chunk
+                if usage is not None: metrics["usage"] = {"prompt_tokens": usage.prompt_tokens, "completion_tokens": usage.completion_tokens}
+                text = chunk.choices[0].delta.content if chunk.choices else None
+                if not text: continue
+                if metrics["ttft_s"] is None: metrics["ttft_s"] = time.perf_counter() - started
+                metrics["chunks"] += 1; metrics["chars"] += len(text); parts.append(text)
+                yield text
+            if parts and use_cache: self._store_answer(prompt, "".join(parts).strip()) # Only complete answers are cached
         except Exception as e:
-            print(f"[GroqClient] ERROR generating response: {e}\n{traceback.format_exc()}")
-            return f"Error: An unexpected error occurred while contacting Groq ({type(e).__name__})."
\ No newline at end of file
+            metrics["error"] = True; metrics["timed_out"] = isinstance(e, APITimeoutError); yield self._error_message(e)
+        finally:
+            if stream is not None and hasattr(stream, "close"): stream.close() # Frees the connection when the caller stops early
+            metrics["total_s"] = time.perf_counter() - started
+            ttft = f"{metrics['ttft_s']:.2f}s" if metrics["ttft_s"] is not None else "-"
+            print(f"[GroqClient] Stream finished: first token {ttft}, total {metrics['total_s']:.2f}s, {metrics['chunks']} chunks")
\ No newline at end of file
@@ -2,24 +2,21 @@
 import tkinter as tk
 from tkinter import ttk, scrolledtext, messagebox
 from .base_page import BasePage
-from .widgets import ThemedLabel, AccentButton
-# --- ✅ Import Groq Client ---
-from ..groq_client import GroqClient
-# --- End Change ---
-import threading
+from .widgets import ThemedLabel, ThemedButton, AccentButton
+from ..ai_dispatcher import get_dispatcher # GroqClient is created by the dispatcher on the first question
+from ..chat_session import ChatSession
+import queue
 
 class HomePage(BasePage):
     PAGE_NAME = "Home"
-
-    def __init__(self, master, **kwargs):
-        # --- ✅ Initialize Groq Client ---
-        self.ai_client = GroqClient()
-        # --- End Change ---
-        super().__init__(master, **kwargs)
+    STREAM_FLUSH_MS = 50 # Streamed tokens are pushed into the output box in batches this often
 
     def build(self):
+        self.chat = ChatSession(); self.chat_mode = tk.BooleanVar(value=True) # Follow-up questions see earlier turns
+        self.ai_ticket = None; self.ai_chunks = None # The answer being streamed, if any
+        self.bind("<Destroy>", lambda e: self.cancel_ai() if e.widget is self else None, add="+")
         # Welcome
-        ThemedLabel(self, text="Welcome to SmartPlate!", font=("Segoe UI", 24, "bold"), foreground=self.theme.accent()).pack(pady=(30, 10))
+        ThemedLabel(self, text="Welcome to SmartPlate!", font=("Segoe UI", 24, "bold"), style="Accent.TLabel").pack(pady=(30, 10))
         ThemedLabel(self, text="Your intelligent meal planning and tracking assistant.", font=("Segoe UI", 14)).pack(pady=5)
 
         # AI Section
@@ -29,41 +26,97 @@ class HomePage(BasePage):
         ThemedLabel(ai_frame, text="Ask Groq (Llama 3) about Health or Nutrition:", font=("Segoe UI", 12, "bold")).grid(row=0, column=0, columnspan=2, sticky="w", pady=(10, 5))
 
         # Input
-        self.ai_input = tk.Text(ai_frame, height=4, width=80, relief="flat", bg=self.theme.palette()['panel'], fg=self.theme.text(), insertbackground=self.theme.text(), font=("Segoe UI", 10), bd=1, wrap="word")
+        self.ai_input = tk.Text(ai_frame, height=4, width=80, relief="flat", font=("Segoe UI", 10), bd=1, wrap="word")
+        self.theme.register(self.ai_input, lambda p: self.ai_input.config(bg=p['panel'], fg=p['text'], insertbackground=p['text'], highlightbackground=p['muted'], highlightcolor=p['accent']))
         self.ai_input.grid(row=1, column=0, columnspan=2, sticky="ew", pady=(0, 10))
         self.ai_input.bind("<FocusIn>", lambda e: self.ai_input.config(bd=1, highlightbackground=self.theme.accent(), highlightcolor=self.theme.accent(), highlightthickness=2))
         self.ai_input.bind("<FocusOut>", lambda e: self.ai_input.config(bd=1, highlightbackground=self.theme.muted(), highlightthickness=1))
 
-        # Button
-        self.ask_button = AccentButton(ai_frame, text="Ask AI", command=self.ask_ai_thread)
-        self.ask_button.grid(row=2, column=0, sticky="w", pady=5)
+        # Buttons
+        controls = ttk.Frame(ai_frame, style="TFrame"); controls.grid(row=2, column=0, columnspan=2, sticky="ew", pady=5)
+        self.ask_button = AccentButton(controls, text="Ask AI", command=self.ask_ai); self.ask_button.pack(side="left")
+        ThemedButton(controls, text="New Chat", command=self.new_chat).pack(side="left", padx=10)
+        ttk.Checkbutton(controls, text="Remember conversation", variable=self.chat_mode).pack(side="left")
 
         # Output
         ThemedLabel(ai_frame, text="AI Response:", font=("Segoe UI", 11, "bold")).grid(row=3, column=0, columnspan=2, sticky="w", pady=(10, 5))
         # --- End Update ---
-        self.ai_output = scrolledtext.ScrolledText(ai_frame, height=10, width=80, relief="flat", bg=self.theme.palette()['panel'], fg=self.theme.text(), font=("Segoe UI", 10), bd=1, wrap="word", state="disabled")
+        self.ai_output = scrolledtext.ScrolledText(ai_frame, height=10, width=80, relief="flat", font=("Segoe UI", 10), bd=1, wrap="word", state="disabled")
+        self.theme.register(self.ai_output, lambda p: self.ai_output.config(bg=p['panel'], fg=p['text']))
         self.ai_output.grid(row=4, column=0, columnspan=2, sticky="nsew", pady=(0, 10))
         ai_frame.rowconfigure(4, weight=1)
 
         # Status
-        self.ai_status = ThemedLabel(ai_frame, text="", font=("Segoe UI", 9), foreground=self.theme.muted())
+        self.ai_status = ThemedLabel(ai_frame, text="", font=("Segoe UI", 9), style="Muted.TLabel")
         self.ai_status.grid(row=5, column=0, columnspan=2, sticky="w")
 
-    # --- (Methods are identical, no changes needed) ---
-    def ask_ai_thread(self):
+    # --- Streaming AI answer ---
+    def ask_ai(self):
+        """Queues the question on the AI dispatcher; asking again replaces the question still being answered."""
         prompt = self.ai_input.get("1.0", tk.END).strip()
         if not prompt: messagebox.showwarning("Input Needed", "Please enter your question.", parent=self); return
-        self.ask_button.config(state="disabled"); self.ai_status.config(text="AI is thinking...")
+        self.ai_status.config(text="AI is thinking...")
+        conversation = self.chat_mode.get()
+        history, self.ai_usage = self.chat.context(prompt) if conversation else ([], None) # Compacted to the token budget
+        if self.ai_usage: print(f"[HomePage] Chat context: {self.format_usage(self.ai_usage)}")
+        self.ai_output.config(state="normal")
+        if not conversation or self.chat.empty: self.ai_output.delete("1.0", tk.END)
+        if conversation:
+            self.ai_output.insert(tk.END, ("\n\n" if self.ai_output.get("1.0", "end-1c") else "") + f"You: {prompt}\n\nAI: "); self.ai_input.delete("1.0", tk.END)
+        self.ai_output.see(tk.END); self.ai_output.config(state="disabled")
+        chunks = queue.Queue(); self.ai_chunks = chunks; self.answer_started = False; self.ai_question = prompt; self.ai_answer = []
+        # Dispatcher callbacks run on its worker threads, so they only queue: text chunks, then the metrics dict.
+        # Submitting on the page's channel supersedes the previous ticket (a re-asked prompt still running is joined, not restarted)
+        self.ai_ticket = get_dispatcher().submit(prompt, on_chunk=chunks.put, on_done=chunks.put, channel=f"home:{id(self)}", history=history)
+        self.after(self.STREAM_FLUSH_MS, self.drain_ai_stream, chunks)
+
+    def new_chat(self):
+        """Forgets the conversation so the next question starts fresh."""
+        self.cancel_ai(); self.chat.reset()
         self.ai_output.config(state="normal"); self.ai_output.delete("1.0", tk.END); self.ai_output.config(state="disabled")
-        self.update_idletasks()
-        thread = threading.Thread(target=self.call_ai_api, args=(prompt,))
-        thread.start()
+        self.ai_status.config(text="Started a new conversation.")
+
+    def cancel_ai(self):
+        """Stops the answer still streaming (the Groq request ends once no one else waits for it). Returns True if there was one."""
+        ticket = self.ai_ticket; self.ai_ticket = None; self.ai_chunks = None # drain_ai_stream stops at its next tick
+        if ticket is None or ticket.finished: return False
+        ticket.cancel(); return True
+
+    def on_hide(self):
+        super().on_hide()
+        if self.cancel_ai(): self.ai_status.config(text="Answer stopped when you left the page.")
+
+    @staticmethod
+    def format_usage(usage):
+        return (f"{usage['total_tokens']}/{usage['budget']} tokens of context "
+                f"({usage['turns_sent']} recent turns, {usage['turns_summarized']} summarized, {usage['turns_dropped']} dropped)")
 
-    def call_ai_api(self, prompt):
-        response = self.ai_client.generate_response(prompt)
-        self.after(0, self.update_ai_output, response)
+    def drain_ai_stream(self, chunks):
+        """Tk thread: appends everything that arrived since the last tick in a single insert."""
+        if chunks is not getattr(self, "ai_chunks", None) or not self.winfo_exists(): return # Superseded by a newer question
+        parts = []; metrics = None
+        while True:
+            try: item = chunks.get_nowait()
+            except queue.Empty: break
+            if isinstance(item, dict): metrics = item; break
+            parts.append(item)
+        if parts:
+            self.ai_answer += parts
+            if not self.answer_started: self.answer_started = True; self.ai_status.config(text="AI is answering...")
+            self.ai_output.config(state="normal"); self.ai_output.insert(tk.END, "".join(parts)); self.ai_output.see(tk.END); self.ai_output.config(state="disabled")
+        if metrics is not None: self.finish_ai_output(metrics)
+        else: self.after(self.STREAM_FLUSH_MS, self.drain_ai_stream, chunks)
 
-    def update_ai_output(self, response):
-        self.ai_output.config(state="normal"); self.ai_output.insert(tk.END, response); self.ai_output.config(state="disabled")
-        self.ask_button.config(state="normal"); self.ai_status.config(text="")
+    def finish_ai_output(self, metrics):
+        answer = "".join(self.ai_answer).strip(); status = ""; cached = metrics.get("cached")
+        if self.ai_usage is not None and answer and not metrics.get("error") and not metrics.get("cancelled"):
+            self.chat.add_turn(self.ai_question, answer) # Failed or cut-off answers don't become context
+        if cached and cached["tier"] == "exact": status = "Cached answer (asked before)"
+        elif cached: status = f"Cached answer for a similar question: \"{cached['prompt'][:60]}\" ({cached['similarity']:.0%} match)"
+        elif metrics.get("ttft_s") is not None and not metrics.get("error"):
+            status = f"First token after {metrics['ttft_s']:.2f}s, full answer in {metrics['total_s']:.2f}s"
+        if self.ai_usage is not None:
+            reported = f", {metrics['usage']['prompt_tokens']} prompt tokens billed" if metrics.get("usage") else ""
+            status = (status + " | " if status else "") + self.format_usage(self.ai_usage) + reported
+        self.ai_status.config(text=status)
         print("AI response displayed.")
\ No newline at end of file
@@ -0,0 +1,121 @@
+# smartplate/importer.py
+"""Streaming bulk import of meal history from CSV or JSONL files.
+
+Records are read lazily, validated and inserted in fixed-size batches with db.add_meals,
+so memory stays flat no matter how large the file is.
+"""
+import csv
+import datetime
+import gzip
+import io
+import itertools
+import json
+import os
+import sys
+import time
+from . import db
+
+DEFAULT_BATCH_SIZE = 5000
+PROGRESS_EVERY_ROWS = 20000
+MAX_REPORTED_ERRORS = 10 # Only the first few bad rows are printed; the rest are just counted
+
+# Header / key aliases used by other trackers -> field names understood by db.add_meals
+FIELD_ALIASES = {
+    "date_log": "date_log", "date": "date_log", "day": "date_log", "logged_on": "date_log",
+    "meal": "meal", "name": "meal", "food": "meal", "description": "meal", "item": "meal",
+    "calories": "calories", "kcal": "calories", "energy_kcal": "calories", "energy": "calories",
+    "protein": "protein", "protein_g": "protein",
+    "carbs": "carbs", "carbs_g": "carbs", "carbohydrates": "carbs", "carbohydrates_g": "carbs",
+    "fat": "fat", "fat_g": "fat", "total_fat": "fat",
+    "fiber": "fiber", "fiber_g": "fiber", "fibre": "fiber",
+    "sugar": "sugar", "sugar_g": "sugar", "sugars": "sugar",
+    "sodium": "sodium", "sodium_mg": "sodium",
+}
+
+class ImportRecordError(ValueError):
+    """A single input record that can't be imported."""
+
+# --- Reading ---
+def detect_format(path):
+    """'csv' or 'jsonl' from the file extension (a trailing .gz is ignored)."""
+    name = path.lower()
+    if name.endswith(".gz"): name = name[:-3]
+    if name.endswith((".jsonl", ".ndjson", ".json")): return "jsonl"
+    if name.endswith((".csv", ".tsv", ".txt")): return "csv"
+    raise ValueError(f"Can't tell the format of '{path}'; pass fmt='csv' or fmt='jsonl'.")
+
+def _open_text(path):
+    if path == "-": return io.TextIOWrapper(sys.stdin.buffer, encoding="utf-8-sig", newline="")
+    if path.lower().endswith(".gz"): return gzip.open(path, "rt", encoding="utf-8-sig", newline="")
+    return open(path, "r", encoding="utf-8-sig", newline="")
+
+def iter_records(path, fmt=None):
+    """Yields (raw, error) pairs from a CSV/JSONL file ('-' reads stdin) one record at a time.
+
+    `raw` is the record dict and `error` None, or `raw` is None and `error` an ImportRecordError for an unreadable line.
+    """
+    fmt = fmt or ("jsonl" if path == "-" else detect_format(path))
+    with _open_text(path) as f:
+        if fmt == "csv":
+            dialect = "excel-tab" if path.lower().replace(".gz", "").endswith(".tsv") else "excel"
+            for record in csv.DictReader(f, dialect=dialect): yield record, None
+        elif fmt == "jsonl":
+            for line_no, line in enumerate(f, start=1):
+                line = line.strip()
+                if not line: continue
+                try: yield json.loads(line), None
+                except json.JSONDecodeError as e: yield None, ImportRecordError(f"line {line_no}: invalid JSON ({e.msg})")
+        else:
+            raise ValueError(f"Unsupported import format '{fmt}'.")
+
+# --- Validation ---
+def _parse_date(value):
+    text = str(value or "").strip()[:10] # Accepts '2024-05-01' and '2024-05-01T08:30:00'
+    try: return datetime.date.fromisoformat(text).isoformat()
+    except ValueError: raise ImportRecordError(f"invalid date '{value}' (expected YYYY-MM-DD)") from None
+
+def normalize_record(raw):
+    """Maps aliased keys to db.add_meals fields and validates the date and meal name."""
+    if not isinstance(raw, dict): raise ImportRecordError("record is not an object")
+    row = {}
+    for key, value in raw.items():
+        field = FIELD_ALIASES.get(str(key or "").strip().lower())
+        if field and (value not in (None, "") or field not in row): row[field] = value
+    row["date_log"] = _parse_date(row.get("date_log"))
+    row["meal"] = str(row.get("meal") or "").strip()
+    if not row["meal"]: raise ImportRecordError("missing meal name")
+    return row
+
+def iter_valid_rows(records, stats):
+    """Filters (raw, error) pairs down to normalized rows, counting and reporting rejects in `stats`."""
+    for index, (raw, error) in enumerate(records, start=1):
+        if error is None:
+            try: yield normalize_record(raw); continue
+            except ImportRecordError as e: error = ImportRecordError(f"record {index}: {e}")
+        stats["skipped"] += 1
+        if stats["skipped"] <= MAX_REPORTED_ERRORS: print(f"[Importer] Skipping {error}")
+
+# --- Import ---
+def import_meals(user_id, records, batch_size=DEFAULT_BATCH_SIZE, progress_every=PROGRESS_EVERY_ROWS):
+    """Imports (raw, error) records from iter_records for one user in batches. Returns a stats dict."""
+    if batch_size < 1: raise ValueError("batch_size must be at least 1")
+    stats = {"imported": 0, "skipped": 0, "batches": 0, "elapsed_s": 0.0, "rows_per_s": 0.0}
+    rows = iter_valid_rows(records, stats)
+    started = time.perf_counter(); next_report = progress_every
+    while True:
+        batch = list(itertools.islice(rows, batch_size))
+        if not batch: break
+        stats["imported"] += db.add_meals(user_id, batch); stats["batches"] += 1
+        if progress_every and stats["imported"] >= next_report:
+            elapsed = time.perf_counter() - started
+            print(f"[Importer] {stats['imported']:,} rows imported ({stats['imported'] / elapsed:,.0f} rows/s)")
+            next_report += progress_every
+    stats["elapsed_s"] = time.perf_counter() - started
+    stats["rows_per_s"] = stats["imported"] / stats["elapsed_s"] if stats["elapsed_s"] else 0.0
+    if stats["skipped"] > MAX_REPORTED_ERRORS: print(f"[Importer] ... {stats['skipped'] - MAX_REPORTED_ERRORS} more rows skipped.")
+    return stats
+
+def import_file(user_id, path, fmt=None, batch_size=DEFAULT_BATCH_SIZE):
+    """Streams a CSV/JSONL(.gz) file into the meal log of `user_id`."""
+    if path != "-" and not os.path.exists(path): raise FileNotFoundError(f"No such file: {path}")
+    return import_meals(user_id, iter_records(path, fmt), batch_size=batch_size)
\ No newline at end of file
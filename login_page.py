@@ -2,11 +2,28 @@
 import tkinter as tk
 from tkinter import messagebox, ttk
 from .theme_manager import ThemeManager
-# Import db functions and oracledb ONLY inside attempt_db_connection
-from .main_window import MainWindow 
+from .. import startup_report
+from .. import session
+from .db_executor import get_executor
+# Import db functions (and the backend driver) ONLY inside attempt_db_connection
+# MainWindow (and every page with its dependencies) is imported only after login, in open_main_app
 from .widgets import ThemedLabel, ThemedEntry, AccentButton, ThemedButton
 
+# --- Worker-side auth (bcrypt is slow by design, so these never run on the Tk thread) ---
+def _sign_in(email, password, remember):
+    from ..db import authenticate
+    user = authenticate(email, password)
+    if user: session.issue(user) if remember else session.clear()
+    return user
+
+def _sign_up(email, password, remember):
+    from ..db import sign_up
+    user = sign_up(email, password)
+    if user and remember: session.issue(user)
+    return user
+
 class LoginPage(tk.Toplevel): 
+    busy = False # True while a worker is signing in or restoring a saved login
     def __init__(self, root):
         super().__init__(root)
         self.root = root # Store reference to the main hidden root window
@@ -69,20 +86,24 @@ class LoginPage(tk.Toplevel):
              print("Warning: Email/Password entries not found for key binding.")
 
         print("LoginPage __init__ finished.")
+        self.update_idletasks(); startup_report.login_window_shown()
 
     def build_themed_widgets(self):
         """Builds the themed widgets within the container."""
         for widget in self.container.winfo_children():
             if widget != self.status_label: widget.destroy()
 
-        ThemedLabel(self.container, text="SmartPlate", font=("Segoe UI", 24, "bold"), foreground=ThemeManager.accent()).pack(pady=(0, 15)) 
+        ThemedLabel(self.container, text="SmartPlate", font=("Segoe UI", 24, "bold"), style="Accent.TLabel").pack(pady=(0, 15)) 
         ThemedLabel(self.container, text="Email").pack(anchor="w", pady=(5, 2))
         self.email_entry = ThemedEntry(self.container); self.email_entry.pack(fill="x") 
         ThemedLabel(self.container, text="Password").pack(anchor="w", pady=(5, 2))
-        self.pwd_entry = ThemedEntry(self.container, show="*"); self.pwd_entry.pack(fill="x", pady=(0, 20)) 
+        self.pwd_entry = ThemedEntry(self.container, show="*"); self.pwd_entry.pack(fill="x", pady=(0, 5)) 
+        self.remember_var = tk.BooleanVar(value=False)
+        self.remember_check = ttk.Checkbutton(self.container, text="Keep me signed in", variable=self.remember_var); self.remember_check.pack(anchor="w", pady=(0, 15))
         self.login_button = AccentButton(self.container, text="Login", command=self.login, state="disabled"); self.login_button.pack(fill="x", ipady=5) 
         self.signup_button = ThemedButton(self.container, text="Sign up", command=self.signup, state="disabled"); self.signup_button.pack(fill="x", pady=5)
         self.guest_button = ThemedButton(self.container, text="Continue as Guest", command=self.guest, state="disabled"); self.guest_button.pack(fill="x")
+        self.progress = ttk.Progressbar(self.container, mode="indeterminate") # Shown while a worker checks the password
         self.status_label.pack_forget() 
         self.status_label.pack(side=tk.BOTTOM, pady=(10, 0))
         self.status_label.config(text="Connecting to database...", foreground=ThemeManager.muted())
@@ -92,29 +113,29 @@ class LoginPage(tk.Toplevel):
         """ ✅ Tries to initialize the driver and connect to the DB (FINAL, CORRECTED) """
         try:
             # --- ✅ Import the correct functions from db.py ---
-            from ..db import init_oracle_driver, init_db_schema
+            from ..db import init_driver, init_db_schema
             
-            # --- ✅ Call the driver initializer first ---
-            print("Attempting to initialize Oracle client..."); 
-            if not init_oracle_driver():
-                # If driver fails, init_oracle_driver() prints details
-                raise Exception("Failed to initialize Oracle client driver. Check console log for details.") 
-            print("Oracle client initialized.")
+            # --- ✅ Call the driver initializer first (no-op for embedded SQLite) ---
+            print("Attempting to initialize database driver..."); 
+            if not init_driver():
+                # If driver fails, the backend prints details
+                raise Exception("Failed to initialize database driver. Check console log for details.") 
+            print("Database driver initialized.")
 
             # --- ✅ Call the schema initializer ---
             print("Attempting to initialize database tables..."); 
             init_db_schema() # This function connects and creates tables
             print("Database tables initialized.")
             
+            # --- Saved login: verified on a worker (a signature check and one query, no bcrypt) ---
+            if session.has_session():
+                self.set_busy("Restoring saved login...")
+                get_executor(self).submit(session.restore, on_success=self.on_session_restored, on_error=self.on_session_restored, label="LoginPage:restore")
+                return
+
             # --- Update UI ---
-            self.status_label.config(text="Connection successful!", foreground=ThemeManager.accent())
-            self.login_button.config(state="normal"); self.signup_button.config(state="normal"); self.guest_button.config(state="normal")
-            
-            print("Forcing UI update after DB connect...")
-            self.update_idletasks() 
-            print("UI update forced after DB connect.")
-            
-            self.status_label.after(2000, lambda: self.status_label.pack_forget())
+            self.set_ready("Connection successful!", ThemeManager.accent())
+            self.status_label.after(2000, lambda: self.status_label.pack_forget() if not self.busy else None)
             
         except Exception as e:
             print(f"CRITICAL: Database connection failed: {e}")
@@ -126,22 +147,53 @@ class LoginPage(tk.Toplevel):
             else:
                  self.destroy()
 
+    # --- Busy / ready state ---
+    def set_busy(self, text):
+        """Locks the form and shows progress while a worker runs."""
+        self.busy = True
+        for widget in (self.login_button, self.signup_button, self.guest_button, self.email_entry, self.pwd_entry, self.remember_check): widget.config(state="disabled")
+        self.status_label.config(text=text, foreground=ThemeManager.muted()); self.status_label.pack(side=tk.BOTTOM, pady=(10, 0))
+        self.progress.pack(side=tk.BOTTOM, fill="x", pady=(10, 0)); self.progress.start(15)
+
+    def set_ready(self, text="", color=None):
+        self.busy = False; self.progress.stop(); self.progress.pack_forget()
+        for widget in (self.login_button, self.signup_button, self.guest_button, self.email_entry, self.pwd_entry, self.remember_check): widget.config(state="normal")
+        self.status_label.config(text=text, foreground=color or ThemeManager.muted())
+
+    def on_session_restored(self, user):
+        if isinstance(user, dict): self.open_main_app(user); return
+        if isinstance(user, Exception): print(f"Restoring saved login failed: {user}")
+        self.set_ready("Please sign in.")
+
+    # --- Auth (runs on the shared worker pool) ---
     def login(self):
-        from ..db import authenticate 
+        if self.busy: return
         email = self.email_entry.get().strip(); password = self.pwd_entry.get().strip()
         if not email or not password: messagebox.showwarning("Input Required", "Please enter both email and password.", parent=self); return
-        user = authenticate(email, password)
-        if user: self.open_main_app(user)
-        else: messagebox.showerror("Login Failed", "Invalid email or password.", parent=self)
+        self.set_busy("Checking password...")
+        get_executor(self).submit(_sign_in, email, password, self.remember_var.get(), on_success=self.on_login_done,
+                                  on_error=lambda e: self.on_auth_error("Login", e), label="LoginPage:login")
+
+    def on_login_done(self, user):
+        if user: self.open_main_app(user); return
+        self.set_ready(); messagebox.showerror("Login Failed", "Invalid email or password.", parent=self)
 
     def signup(self):
-        from ..db import create_user 
+        if self.busy: return
         em = self.email_entry.get().strip(); pw = self.pwd_entry.get().strip()
         if not em or not pw: messagebox.showwarning("Sign up", "Please enter both email and password.", parent=self); return
-        try:
-            if create_user(em, pw): messagebox.showinfo("Sign up", "Account created successfully! Logging you in...", parent=self); self.login() 
-            else: messagebox.showerror("Sign up Failed", "An account with that email already exists.", parent=self)
-        except Exception as e: messagebox.showerror("Database Error", f"An error occurred during sign up: {e}", parent=self)
+        self.set_busy("Creating account...")
+        get_executor(self).submit(_sign_up, em, pw, self.remember_var.get(), on_success=self.on_signup_done,
+                                  on_error=lambda e: self.on_auth_error("Sign up", e), label="LoginPage:signup")
+
+    def on_signup_done(self, user):
+        self.set_ready()
+        if not user: messagebox.showerror("Sign up Failed", "An account with that email already exists.", parent=self); return
+        messagebox.showinfo("Sign up", "Account created successfully! Logging you in...", parent=self); self.open_main_app(user)
+
+    def on_auth_error(self, action, e):
+        print(f"{action} failed: {e}")
+        self.set_ready(); messagebox.showerror("Database Error", f"An error occurred during {action.lower()}: {e}", parent=self)
 
     def guest(self):
         guest_user = {"id": 0, "email": "guest@smartplate.com", "name": "Guest"}
@@ -151,7 +203,8 @@ class LoginPage(tk.Toplevel):
         print("Opening main application window...") 
         self.destroy() 
         self.root.deiconify() 
-        main_app = MainWindow(self.root, user_data) 
+        from .main_window import MainWindow
+        main_app = MainWindow(self.root, user_data); startup_report.mark("main window shown")
         print("Main application window should be open.") 
 
     def _on_close(self):
@@ -1,7 +1,9 @@
 # smartplate/main.py
+from . import startup_report # First, so launch time and (if enabled) import timings start here
 import tkinter as tk
 from .ui.theme_manager import ThemeManager 
 from .ui.login_page import LoginPage
+from .ui.db_executor import shutdown_executor
 import sys
 
 # Global variable to hold the login window reference
@@ -24,7 +26,7 @@ def start_application():
     """Initializes and runs the main application."""
     print("Starting SmartPlate (No Withdraw Test)...")
     
-    root = tk.Tk()
+    root = tk.Tk(); startup_report.mark("Tk root created")
     # Make the root window small and maybe off-screen initially
     root.geometry("1x1+0+0") 
     
@@ -42,4 +44,14 @@ def start_application():
     root.mainloop()
     print("Tkinter main loop finished.") 
     
+    shutdown_executor(root) # Drop queued background reads before the pool closes
+    # These modules are only imported once their page was used; nothing to stop otherwise
+    dispatcher_module = sys.modules.get(f"{__package__}.ai_dispatcher")
+    if dispatcher_module: dispatcher_module.shutdown_dispatcher() # Stop pending AI answers
+    renderer_module = sys.modules.get(f"{__package__}.chart_renderer")
+    if renderer_module: renderer_module.shutdown_chart_renderer() # Stop the chart worker process, if one was started
+    # Close pooled DB connections (db is only imported if the login flow used it)
+    db_module = sys.modules.get(f"{__package__}.db")
+    if db_module: db_module.close_pool()
+    
     print("SmartPlate has closed.")
\ No newline at end of file
@@ -0,0 +1,78 @@
+# smartplate/meal_analysis.py
+"""Nutrition lookup for a typed meal description, including composite meals like '2 chapati, dal tadka, salad'.
+
+Each item is resolved from the local food table first and from Spoonacular otherwise.
+Items are looked up concurrently, so a composite meal takes about as long as its slowest item.
+"""
+from concurrent.futures import ThreadPoolExecutor
+import re
+from .food_db import MATCH_THRESHOLD, get_food_index, parse_quantity
+
+COMPOSITE_WORKERS = 4 # Concurrent item lookups (each may be a Spoonacular request)
+NUTRIENT_CODES = ("ENERC_KCAL", "PROCNT", "CHOCDF", "FAT", "FIBTG", "SUGAR", "NA")
+_NUTRIENT_UNITS = {"ENERC_KCAL": "kcal", "NA": "mg"} # Everything else is in g
+_LIST_SPLIT_RE = re.compile(r"\s*(?:,|;|\n)\s*")
+_CONNECTOR_SPLIT_RE = re.compile(r"\s*(?:\+|&|\band\b|\bwith\b|\bplus\b)\s*", re.IGNORECASE)
+
+def _is_local_dish(item):
+    return bool(get_food_index().search(parse_quantity(item)[2], limit=1, min_score=MATCH_THRESHOLD))
+
+def _parts(text, pattern):
+    return [item for item in (part.strip(" .") for part in pattern.split(text)) if item]
+
+def split_meal(description):
+    """'2 chapati, dal tadka and salad' -> ['2 chapati', 'dal tadka', 'salad'].
+
+    Commas and semicolons always split; and/with/plus only split a part that isn't itself a local dish,
+    so 'coffee with milk' or 'mac and cheese' stay one item.
+    """
+    items = []
+    for part in _parts(description, _LIST_SPLIT_RE):
+        items.extend([part] if _is_local_dish(part) else _parts(part, _CONNECTOR_SPLIT_RE))
+    return items
+
+def is_composite(description):
+    return len(split_meal(description)) > 1
+
+def lookup_single(query, api_client):
+    """Candidate recipes for one food: local table first, then Spoonacular. Same shape as ApiClient.analyze_natural."""
+    return get_food_index().lookup(query) or api_client.analyze_natural(query)
+
+def scale_recipe(recipe, servings):
+    """Copy of a recipe with every nutrient multiplied by `servings`."""
+    if servings == 1: return recipe
+    nutrients = {code: {"quantity": (n.get("quantity") or 0) * servings, "unit": n.get("unit", "")} for code, n in recipe.get("nutrients", {}).items()}
+    return dict(recipe, title=f"{recipe.get('title', 'Unknown')} x{servings:g}", calories=round((recipe.get("calories") or 0) * servings), nutrients=nutrients)
+
+def _analyze_item(item, api_client):
+    amount, unit, name = parse_quantity(item)
+    if unit: servings = 1; result = lookup_single(item, api_client) # Weights come back already scaled (Spoonacular reads them too)
+    else: servings = amount; result = lookup_single(name, api_client)
+    if "error" in result or not result.get("recipes"):
+        return {"item": item, "error": result.get("error", f"No match for '{name}'.")}
+    return {"item": item, "recipe": scale_recipe(result["recipes"][0], servings)} # Best match per item
+
+def analyze_composite(description, api_client, max_workers=COMPOSITE_WORKERS):
+    """Looks up every item of a composite meal concurrently and sums them.
+
+    Returns {"recipes": [total]} where the total recipe carries a "breakdown" list of the
+    per-item recipes (items that couldn't be resolved are listed under "missing"), or {"error": ...}.
+    """
+    items = split_meal(description)
+    if not items: return {"error": "Query cannot be empty."}
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(items))), thread_name_prefix="smartplate-lookup") as pool:
+        results = list(pool.map(lambda item: _analyze_item(item, api_client), items)) # Keeps input order
+    found = [r["recipe"] for r in results if "recipe" in r]
+    missing = [{"item": r["item"], "error": r["error"]} for r in results if "error" in r]
+    for m in missing: print(f"[MealAnalysis] Skipping '{m['item']}': {m['error']}")
+    if not found: return {"error": f"None of the items could be matched: {', '.join(items)}."}
+    totals = {code: {"quantity": sum((r.get("nutrients", {}).get(code) or {}).get("quantity") or 0 for r in found),
+                     "unit": _NUTRIENT_UNITS.get(code, "g")} for code in NUTRIENT_CODES}
+    total = {"title": ", ".join(items), "calories": round(sum(r.get("calories") or 0 for r in found)),
+             "nutrients": totals, "breakdown": found, "missing": missing}
+    print(f"[MealAnalysis] Composite meal: {len(found)}/{len(items)} items matched, {total['calories']} kcal.")
+    return {"recipes": [total]}
+
+def analyze_meal(description, api_client):
+    """Entry point for MealLogPage: composite descriptions are split, single foods go straight to lookup_single."""
+    return analyze_composite(description, api_client) if is_composite(description) else lookup_single(description, api_client)
\ No newline at end of file
@@ -4,9 +4,13 @@ from tkinter import ttk, messagebox
 from .base_page import BasePage
 from .widgets import ThemedLabel, ThemedEntry, AccentButton, ThemedButton
 from ..api_client import ApiClient
+from ..meal_analysis import analyze_meal
 from .theme_manager import ThemeManager
+from .db_executor import get_executor
+from .virtual_table import RowModel, VirtualTable
 import datetime
-from ..db import add_meal, get_meals, delete_meal, update_meal
+from ..db import add_meal, get_meals_after, get_meals_by_ids, delete_meals, update_meal
+from ..nutrients import format_amount
 
 # --- Edit Log Window (from previous step, now used by Edit button) ---
 class EditLogWindow(tk.Toplevel):
@@ -17,23 +21,31 @@ class EditLogWindow(tk.Toplevel):
         self.configure(bg=ThemeManager.bg()); self.transient(master); self.grab_set()
         container = ttk.Frame(self, style='TFrame', padding=20); container.pack(fill="both", expand=True)
         self.entries = {}
-        fields = [("date_log", "Date (YYYY-MM-DD)"),("meal", "Meal Description"),("calories", "Calories (kcal)"),("protein", "Protein (g)"),("carbs", "Carbs (g)"),("fat", "Fat (g)"),("fiber", "Fiber (g)"),("sugar", "Sugar (g)"),("sodium", "Sodium (mg)")]
+        fields = [("date_log", "Date (YYYY-MM-DD)"),("meal", "Meal Description"),("calories", "Calories (kcal)"),("protein_g", "Protein (g)"),("carbs_g", "Carbs (g)"),("fat_g", "Fat (g)"),("fiber_g", "Fiber (g)"),("sugar_g", "Sugar (g)"),("sodium_mg", "Sodium (mg)")]
         for i, (key, label) in enumerate(fields):
             ThemedLabel(container, text=label).grid(row=i, column=0, sticky="w", pady=(0, 2))
             entry = ThemedEntry(container, width=50); entry.grid(row=i, column=1, sticky="ew", pady=(0, 10))
-            entry.insert(0, self.meal_data.get(key, "")); self.entries[key] = entry
-        AccentButton(container, text="Save Changes", command=self.save_changes).grid(row=len(fields), column=0, columnspan=2, pady=(20, 0))
+            value = self.meal_data.get(key)
+            # Stored numbers are shown bare; the label carries the unit
+            entry.insert(0, format_amount(value) if isinstance(value, (int, float)) else (value or "")); self.entries[key] = entry
+        self.save_button = AccentButton(container, text="Save Changes", command=self.save_changes); self.save_button.grid(row=len(fields), column=0, columnspan=2, pady=(20, 0))
         self.update_idletasks()
         x = master.winfo_rootx() + (master.winfo_width()//2) - (self.winfo_width()//2)
         y = master.winfo_rooty() + (master.winfo_height()//2) - (self.winfo_height()//2)
         self.geometry(f'+{x}+{y}')
     def save_changes(self):
-        try:
-            new_data = {key: entry.get() for key, entry in self.entries.items()}
-            update_meal(meal_id=self.meal_data['id'], date_str=new_data['date_log'], meal=new_data['meal'], calories_str=new_data['calories'], protein_str=new_data['protein'], carbs_str=new_data['carbs'], fat_str=new_data['fat'], fiber_str=new_data['fiber'], sugar_str=new_data['sugar'], sodium_str=new_data['sodium'])
-            messagebox.showinfo("Success", "Meal log updated successfully.", parent=self)
-            self.on_save_callback(); self.destroy()
-        except Exception as e: print(f"Error saving meal log: {e}"); messagebox.showerror("Error", f"Failed to update log: {e}", parent=self)
+        new_data = {key: entry.get() for key, entry in self.entries.items()}
+        self.save_button.config(state="disabled", text="Saving...")
+        get_executor(self).submit(update_meal, meal_id=self.meal_data['id'], date_str=new_data['date_log'], meal=new_data['meal'], calories_str=new_data['calories'], protein_str=new_data['protein_g'], carbs_str=new_data['carbs_g'], fat_str=new_data['fat_g'], fiber_str=new_data['fiber_g'], sugar_str=new_data['sugar_g'], sodium_str=new_data['sodium_mg'],
+                                  on_success=self.on_saved, on_error=self.on_save_failed, label="EditLogWindow:update_meal")
+    def on_saved(self, _result):
+        if not self.winfo_exists(): self.on_save_callback(); return
+        messagebox.showinfo("Success", "Meal log updated successfully.", parent=self)
+        self.on_save_callback(); self.destroy()
+    def on_save_failed(self, e):
+        print(f"Error saving meal log: {e}")
+        if not self.winfo_exists(): return
+        self.save_button.config(state="normal", text="Save Changes"); messagebox.showerror("Error", f"Failed to update log: {e}", parent=self)
 
 # --- Recipe Selection Window (from previous step) ---
 class RecipeSelectionWindow(tk.Toplevel):
@@ -42,35 +54,61 @@ class RecipeSelectionWindow(tk.Toplevel):
         self.title("Select a Recipe"); self.geometry("650x400"); self.configure(bg=ThemeManager.bg()); self.transient(master); self.grab_set()
         self.on_select_callback = on_select_callback; self.recipes = recipes
         ThemedLabel(self, text="Select the best match:", font=("Segoe UI", 12)).pack(pady=(10,5))
-        cols = ("Recipe Name", "Calories"); self.tree = ttk.Treeview(self, columns=cols, show="headings", style="Treeview", height=10)
-        self.tree.heading("Recipe Name", text="Recipe Name"); self.tree.column("Recipe Name", width=450, anchor="w")
-        self.tree.heading("Calories", text="Calories"); self.tree.column("Calories", width=100, anchor="center")
+        cols = ("Recipe Name", "Calories", "Protein", "Carbs", "Fat"); self.tree = ttk.Treeview(self, columns=cols, show="headings", style="Treeview", height=10)
+        self.tree.heading("Recipe Name", text="Recipe Name"); self.tree.column("Recipe Name", width=330, anchor="w")
+        for col in cols[1:]: self.tree.heading(col, text=col); self.tree.column(col, width=70, anchor="center")
         print(f"[RecipeSelectionWindow] Received {len(recipes)} recipes:")
         if not recipes: ThemedLabel(self, text="No recipes found by API.", foreground="red").pack(pady=20)
         for i, recipe in enumerate(recipes):
             title = recipe.get("title", "Unknown"); cals = recipe.get("calories", "-")
-            try: self.tree.insert("", "end", iid=i, values=(title, cals))
+            if recipe.get("breakdown"): title = f"Total: {title}"
+            try: self.tree.insert("", "end", iid=i, values=(title, cals) + self.macro_values(recipe), open=True)
             except Exception as e: print(f"ERROR inserting recipe {i}: {e}")
+            # Composite meals list their items underneath; picking one logs just that item
+            for j, item in enumerate(recipe.get("breakdown", [])):
+                self.tree.insert(i, "end", iid=f"{i}.{j}", values=(f"    • {item.get('title', 'Unknown')}", item.get("calories", "-")) + self.macro_values(item))
+            for missing in recipe.get("missing", []):
+                self.tree.insert(i, "end", values=(f"    • {missing['item']} (not found, not counted)", "-", "", "", ""))
         self.tree.pack(fill="x", expand=True, padx=10, pady=(0, 5)); self.tree.bind("<Double-1>", self.on_select)
+        if recipes and recipes[0].get("breakdown"): self.tree.selection_set("0")
         AccentButton(self, text="Use Selected Recipe", command=self.on_select).pack(pady=10)
         self.update_idletasks()
         x = master.winfo_rootx() + (master.winfo_width()//2) - (self.winfo_width()//2)
         y = master.winfo_rooty() + (master.winfo_height()//2) - (self.winfo_height()//2)
         self.geometry(f'+{x}+{y}')
+    @staticmethod
+    def macro_values(recipe):
+        nutrients = recipe.get("nutrients", {})
+        return tuple(format_amount((nutrients.get(code) or {}).get("quantity"), "g", 0) for code in ("PROCNT", "CHOCDF", "FAT"))
     def on_select(self, event=None):
         selected_item_iid = self.tree.selection()
         if not selected_item_iid: messagebox.showwarning("No Selection", "Please select a recipe.", parent=self); return
         try:
-            selected_index = int(selected_item_iid[0]); selected_recipe = self.recipes[selected_index] 
+            index, _, item = selected_item_iid[0].partition(".")
+            selected_recipe = self.recipes[int(index)]
+            if item: selected_recipe = selected_recipe["breakdown"][int(item)]
             if selected_recipe: self.on_select_callback(selected_recipe); self.destroy()
             else: messagebox.showerror("Error", "Could not retrieve selected recipe data.", parent=self)
         except (ValueError, IndexError) as e: messagebox.showerror("Error", f"Invalid selection index: {e}", parent=self)
 
+# --- Meal table rows ---
+def newest_first(row):
+    """RowModel sort key matching the database order (date_log DESC, id DESC)."""
+    try: day = datetime.date.fromisoformat(str(row.get("date_log") or "")[:10]).toordinal()
+    except ValueError: day = 0 # Missing or malformed dates sort last
+    return (-day, -row["id"])
+
+def table_values(row):
+    return (row.get("id", ""), row.get("date_log", ""), row.get("meal", ""), f"{row.get('calories') or 0:.0f}",
+            format_amount(row.get("protein_g"), "g"), format_amount(row.get("carbs_g"), "g"), format_amount(row.get("fat_g"), "g"))
+
 # --- Main Meal Log Page Class ---
 class MealLogPage(BasePage):
     PAGE_NAME = "Meal Log"
+    PAGE_SIZE = 500 # Rows fetched per page; only the visible ones become Treeview items
     def __init__(self, master, user):
-        self.user = user; self.api_client = ApiClient(); self.meal_data_map = {}; super().__init__(master)
+        self.user = user; self.api_client = ApiClient(); self.rows = RowModel(newest_first) # Every loaded entry, newest first
+        self.next_cursor = None; self.loading_page = False; super().__init__(master)
 
     def build(self):
         # --- Top frame for input fields ---
@@ -109,24 +147,29 @@ class MealLogPage(BasePage):
             anchor = "w" if col_id == "meal" else "center"
             self.table.heading(col_id, text=col_name); self.table.column(col_id, width=width, anchor=anchor, stretch=False)
         self.table.pack(side="left", fill="both", expand=True); 
-        scrollbar = ttk.Scrollbar(table_frame, orient="vertical", command=self.table.yview); self.table.configure(yscrollcommand=scrollbar.set); scrollbar.pack(side="right", fill="y")
+        self.scrollbar = ttk.Scrollbar(table_frame, orient="vertical"); self.scrollbar.pack(side="right", fill="y")
+        self.view = VirtualTable(self.table, self.scrollbar, self.rows, table_values, on_near_end=self.load_next_page)
         
         # --- Edit/Delete Button Frame ---
         edit_delete_frame = ttk.Frame(self, style='TFrame'); edit_delete_frame.pack(fill="x", padx=20, pady=(0,10))
         AccentButton(edit_delete_frame, text="Edit Selected", command=self.on_edit_selected).pack(side="left", ipadx=5, ipady=5)
         ThemedButton(edit_delete_frame, text="Delete Selected", command=self.delete_selected).pack(side="left", padx=10, ipadx=5, ipady=5)
-        ThemedLabel(edit_delete_frame, text=" (or double-click to edit)", font=("Segoe UI", 9, "italic"), foreground=self.theme.muted()).pack(side="left", pady=5)
+        ThemedLabel(edit_delete_frame, text=" (or double-click to edit)", font=("Segoe UI", 9, "italic"), style="Muted.TLabel").pack(side="left", pady=5)
         self.table.bind("<Double-1>", self.on_edit_selected)
 
     def analyze_meal(self):
         query = self.entries['meal'].get().strip()
         if not query: messagebox.showwarning("Input Needed", "Please enter a meal description to analyze.", parent=self); return
-        api_result = self.api_client.analyze_natural(query)
+        # Runs off the Tk thread: local table first, Spoonacular per item on a miss, composite meals split up
+        self.run_db(analyze_meal, query, self.api_client, key="analyze", on_success=self.show_analysis, loading_text="Analyzing...",
+                    on_error=lambda e: messagebox.showerror("API Error", f"Analysis failed: {e}", parent=self))
+
+    def show_analysis(self, api_result):
         if "error" in api_result: messagebox.showerror("API Error", api_result["error"], parent=self)
         elif "recipes" in api_result:
             recipes = api_result["recipes"]
             if not recipes: messagebox.showinfo("No Results", "No matching recipes found.", parent=self)
-            elif len(recipes) == 1: self.populate_fields(recipes[0])
+            elif len(recipes) == 1 and not recipes[0].get("breakdown"): self.populate_fields(recipes[0])
             else: RecipeSelectionWindow(self, recipes, self.populate_fields)
         else: messagebox.showerror("API Error", "Unexpected response format from API.", parent=self)
 
@@ -154,50 +197,79 @@ class MealLogPage(BasePage):
         
     def add_log_entry(self):
         if self.user["id"] == 0: messagebox.showinfo("Guest Mode", "Please sign up or log in to save.", parent=self); return
-        try:
-            date = datetime.date.today().isoformat()
-            # Get all values directly from the entry fields
-            add_meal(self.user["id"], date,
-                     self.entries['meal'].get(), self.entries['calories'].get(),
-                     self.entries['protein'].get(), self.entries['carbs'].get(),
-                     self.entries['fat'].get(), self.entries['fiber'].get(),
-                     self.entries['sugar'].get(), self.entries['sodium'].get())
-            self.clear_fields()
-            self.load_data()
-        except Exception as e: messagebox.showerror("Database Error", f"Failed to add meal log: {e}", parent=self)
+        date = datetime.date.today().isoformat()
+        # Read the entry fields here on the Tk thread; only the insert runs in the background
+        self.run_db(add_meal, self.user["id"], date,
+                    self.entries['meal'].get(), self.entries['calories'].get(),
+                    self.entries['protein'].get(), self.entries['carbs'].get(),
+                    self.entries['fat'].get(), self.entries['fiber'].get(),
+                    self.entries['sugar'].get(), self.entries['sodium'].get(),
+                    on_success=lambda _: (self.clear_fields(), self.load_data()), # The new row arrives with the refreshed first page
+                    on_error=lambda e: messagebox.showerror("Database Error", f"Failed to add meal log: {e}", parent=self),
+                    loading_text="Saving...")
 
     def clear_fields(self):
         for widget in self.entries.values(): widget.delete(0, tk.END)
         self.entries['meal'].focus() # Set focus back to meal description
         
     def load_data(self):
-        self.table.delete(*self.table.get_children()); self.meal_data_map.clear()
+        """Re-reads the newest page and patches only the rows that changed; older pages are fetched on scroll."""
         if self.user["id"] == 0: return
-        try:
-            rows = get_meals(self.user["id"])
-            for row in rows:
-                self.meal_data_map[row['id']] = row 
-                self.table.insert("", "end", iid=row["id"], values=(
-                    row.get("id", ""), row.get("date_log", ""), row.get("meal", ""), 
-                    f"{row.get('calories', 0):.0f}", row.get("protein", ""), 
-                    row.get("carbs", ""), row.get("fat", "")))
-        except Exception as e: messagebox.showerror("Load Error", f"Could not load meal data: {e}", parent=self)
-            
+        self.cancel_db("meals"); self.loading_page = True # Replaces any older page still in flight
+        self.run_db(get_meals_after, self.user["id"], None, self.PAGE_SIZE, key="meals", on_success=self.on_first_page_loaded, on_error=self.on_page_failed)
+
+    def on_first_page_loaded(self, result):
+        rows, cursor = result; self.loading_page = False
+        # Keep the cursor of deeper pages already loaded; the first page only says where its own rows end
+        if cursor is None or not rows or self.rows.last_key is None or self.rows.last_key <= newest_first(rows[-1]): self.next_cursor = cursor
+        self.rows.replace_head(rows, complete=cursor is None); self.view.refresh()
+        print(f"[MealLogPage] First page refreshed ({len(rows)} rows, {len(self.rows)} loaded, more={self.next_cursor is not None})")
+
+    def load_next_page(self):
+        """Appends the next (older) page of entries using the keyset cursor."""
+        if self.loading_page or self.next_cursor is None: return
+        self.loading_page = True
+        self.run_db(get_meals_after, self.user["id"], self.next_cursor, self.PAGE_SIZE, key="meals",
+                    on_success=self.on_page_loaded, on_error=self.on_page_failed)
+
+    def on_page_loaded(self, result):
+        rows, self.next_cursor = result; self.loading_page = False
+        self.rows.extend(rows); self.view.refresh()
+        if rows: print(f"[MealLogPage] Loaded {len(rows)} rows ({len(self.rows)} total, more={self.next_cursor is not None})")
+
+    def on_page_failed(self, e):
+        self.next_cursor = None; self.loading_page = False
+        messagebox.showerror("Load Error", f"Could not load meal data: {e}", parent=self)
+
+    def reload_rows(self, meal_ids):
+        """Re-reads a few edited entries and moves/updates just those rows."""
+        self.run_db(get_meals_by_ids, meal_ids, on_success=lambda found: self.on_rows_reloaded(meal_ids, found), loading_text=None)
+
+    def on_rows_reloaded(self, meal_ids, found):
+        for meal_id in meal_ids:
+            row = found.get(meal_id)
+            if row is None: self.rows.remove([meal_id]); continue # Deleted meanwhile
+            # Moved past the loaded rows: it comes back with a later page
+            if self.next_cursor is not None and newest_first(row) > self.rows.last_key: self.rows.remove([meal_id])
+            else: self.rows.upsert(row)
+        self.view.refresh()
+
+
     def delete_selected(self):
         if self.user["id"] == 0: messagebox.showinfo("Guest Mode", "No logs to delete.", parent=self); return
-        selected_iids = self.table.selection();
-        if not selected_iids: messagebox.showwarning("No Selection", "Please select one or more entries.", parent=self); return
-        if messagebox.askyesno("Confirm", f"Delete {len(selected_iids)} selected entries?"):
-            try:
-                for item_id in selected_iids: delete_meal(item_id)
-                self.load_data()
-            except Exception as e: messagebox.showerror("Delete Error", f"Failed to delete entries: {e}", parent=self)
+        meal_ids = self.view.selected_ids() # Includes selected rows scrolled out of view
+        if not meal_ids: messagebox.showwarning("No Selection", "Please select one or more entries.", parent=self); return
+        if messagebox.askyesno("Confirm", f"Delete {len(meal_ids)} selected entries?"):
+            self.run_db(delete_meals, meal_ids, # One transaction for the whole selection
+                        on_success=lambda _: (self.rows.remove(meal_ids), self.view.refresh()),
+                        on_error=lambda e: messagebox.showerror("Delete Error", f"Failed to delete entries: {e}", parent=self),
+                        loading_text="Deleting...")
 
     def on_edit_selected(self, event=None):
         """Called by button click or double-click."""
-        selected_iid = self.table.selection()
-        if not selected_iid: messagebox.showwarning("No Selection", "Please select an entry from the log to edit.", parent=self); return
-        item_id = int(selected_iid[0])
-        meal_data_to_edit = self.meal_data_map.get(item_id)
+        selected_ids = self.view.selected_ids()
+        if not selected_ids: messagebox.showwarning("No Selection", "Please select an entry from the log to edit.", parent=self); return
+        item_id = selected_ids[0]
+        meal_data_to_edit = self.rows.get(item_id)
         if not meal_data_to_edit: messagebox.showerror("Error", "Could not find data for the selected log.", parent=self); return
-        EditLogWindow(self, meal_data=meal_data_to_edit, on_save_callback=self.load_data)
\ No newline at end of file
+        EditLogWindow(self, meal_data=meal_data_to_edit, on_save_callback=lambda: self.reload_rows([item_id]))
\ No newline at end of file
@@ -0,0 +1,99 @@
+# smartplate/migrations.py
+"""Versioned schema migrations.
+
+schema_version has one row per applied step, so checking an up-to-date database at startup is a
+single SELECT. Steps run in version order and are idempotent (each checks what already exists),
+which also lets a database created before versioning adopt the history on its first start.
+
+Schema steps run at startup inside a transaction each. Online steps move data in small batches on
+a background thread once the app is usable; later schema steps must not depend on them.
+"""
+import threading
+import time
+from .db import get_backend, get_conn, backfill_nutrient_columns, rebuild_daily_rollup
+
+# --- Steps ---
+def _core_tables(backend, conn):
+    backend.create_core_tables(conn)
+
+def _meal_log_index(backend, conn):
+    backend.create_meal_log_index(conn)
+
+def _daily_rollup(backend, conn):
+    if backend.create_daily_rollup_table(conn):
+        conn.commit(); rebuild_daily_rollup() # Seed the new rollup from existing meals
+
+def _nutrient_backfill():
+    if backfill_nutrient_columns(): rebuild_daily_rollup() # Converted rows had no numeric values in the rollup yet
+
+# (version, name, step, online). Append only: never renumber or edit a step that has shipped.
+# Schema steps are called as step(backend, conn); online steps as step() and manage their own batches.
+MIGRATIONS = [
+    (1, "core tables (users, meal_logs, profiles)", _core_tables, False),
+    (2, "meal_logs (user, date) index", _meal_log_index, False),
+    (3, "daily_nutrition rollup", _daily_rollup, False),
+    (4, "numeric nutrient backfill", _nutrient_backfill, True),
+]
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+_online_thread = None
+_online_lock = threading.Lock()
+
+def applied_versions():
+    """The startup probe: versions recorded in schema_version, or None before the table exists."""
+    backend = get_backend()
+    with get_conn() as conn:
+        c = conn.cursor()
+        try: c.execute(backend.SQL["schema_versions"]); return {int(row[0]) for row in c.fetchall()}
+        except backend.DatabaseError: conn.rollback(); return None # No table yet; migrate() creates it
+
+def _record(conn, version, name):
+    backend = get_backend()
+    try: conn.cursor().execute(backend.SQL["record_schema_version"], {"version": version, "name": name})
+    except backend.IntegrityError: print(f"[migrations] Version {version} was already recorded by another process.")
+    conn.commit()
+
+def migrate(background=True):
+    """Applies pending steps and returns their versions.
+
+    Schema steps run now. Online steps run on a background thread (or before returning when
+    background is False, e.g. for the CLI) and are recorded only once they finish, so an
+    interrupted one starts over on the next launch.
+    """
+    backend = get_backend(); started = time.perf_counter()
+    applied = applied_versions()
+    pending = [step for step in MIGRATIONS if applied is None or step[0] not in applied]
+    if not pending:
+        print(f"Database schema is current (version {LATEST_VERSION}, checked in {(time.perf_counter() - started) * 1000:.1f} ms).")
+        return []
+    print(f"Migrating database schema ({backend.NAME}): {len(pending)} pending step(s)...")
+    with get_conn() as conn:
+        if applied is None: backend.create_schema_version_table(conn); conn.commit()
+        for version, name, step, online in pending:
+            if online: continue
+            print(f"[migrations] {version}: {name}")
+            step(backend, conn); _record(conn, version, name)
+    online = [(version, name, step) for version, name, step, is_online in pending if is_online]
+    if online:
+        if background: _start_online(online)
+        else: _run_online(online)
+    print(f"Database schema migration done in {(time.perf_counter() - started) * 1000:.0f} ms"
+          f"{f' ({len(online)} online step(s) continuing in the background)' if online and background else ''}.")
+    return [step[0] for step in pending]
+
+def _start_online(steps):
+    global _online_thread
+    with _online_lock:
+        if _online_thread is not None and _online_thread.is_alive(): return # Already running from an earlier login attempt
+        _online_thread = threading.Thread(target=_run_online, args=(steps,), name="smartplate-migrations", daemon=True)
+        _online_thread.start()
+
+def _run_online(steps):
+    for version, name, step in steps:
+        print(f"[migrations] {version}: {name} (online)")
+        started = time.perf_counter()
+        try: step()
+        except get_backend().DatabaseError as e:
+            print(f"[migrations] ERROR in online step {version} ({name}), will retry on next launch: {e}"); return
+        with get_conn() as conn: _record(conn, version, name)
+        print(f"[migrations] {version}: done in {time.perf_counter() - started:.1f}s")
\ No newline at end of file
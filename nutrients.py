@@ -0,0 +1,65 @@
+# smartplate/nutrients.py
+"""Nutrient unit convention shared by the database layer and the UI.
+
+Values are parsed once when written and stored as plain numbers:
+calories in kcal, sodium in mg, every other nutrient in g.
+"""
+import re
+
+# (field name used by the UI/API, numeric column, storage unit)
+NUTRIENTS = [
+    ("protein", "protein_g", "g"),
+    ("carbs", "carbs_g", "g"),
+    ("fat", "fat_g", "g"),
+    ("fiber", "fiber_g", "g"),
+    ("sugar", "sugar_g", "g"),
+    ("sodium", "sodium_mg", "mg"),
+]
+NUTRIENT_COLUMNS = {field: column for field, column, _ in NUTRIENTS}
+NUTRIENT_UNITS = {field: unit for field, _, unit in NUTRIENTS}
+
+# Conversion factors into each storage unit
+_GRAMS = {"g": 1.0, "gm": 1.0, "gms": 1.0, "gram": 1.0, "grams": 1.0, "mg": 0.001, "mcg": 0.000001, "ug": 0.000001, "µg": 0.000001,
+          "kg": 1000.0, "oz": 28.349523125, "lb": 453.59237, "lbs": 453.59237}
+_UNIT_FACTORS = {
+    "g": _GRAMS,
+    "mg": {unit: factor * 1000.0 for unit, factor in _GRAMS.items()},
+    "kcal": {"kcal": 1.0, "cal": 1.0, "cals": 1.0, "kcals": 1.0, "kj": 1 / 4.184},
+}
+_AMOUNT_RE = re.compile(r"^\s*([-+]?(?:\d{1,3}(?:,\d{3})+|\d*)(?:\.\d+)?)\s*([a-zµ]*)", re.IGNORECASE)
+
+def parse_amount(value, unit):
+    """Parses '12.3g', '0.4 g', '350mg', '2 oz' or a number into `unit`.
+
+    Returns None (treated as missing) if there's no number, the amount is negative or the unit can't be converted.
+    """
+    if value is None: return None
+    if isinstance(value, (int, float)): amount = float(value); given_unit = ""
+    else:
+        match = _AMOUNT_RE.match(str(value))
+        if not match or not any(ch.isdigit() for ch in match.group(1)): return None
+        amount = float(match.group(1).replace(",", "")); given_unit = match.group(2).lower()
+    if amount < 0: print(f"Warning: Negative {unit} value '{value}'. Treating it as missing."); return None
+    if not given_unit: return amount # Bare numbers are already in the storage unit
+    factor = _UNIT_FACTORS.get(unit, {}).get(given_unit)
+    if factor is None:
+        print(f"Warning: Unknown unit '{given_unit}' for {unit} value '{value}'. Treating it as missing.")
+        return None
+    return amount * factor
+
+def parse_nutrients(values):
+    """Maps UI field values ({'protein': '12g', ...}) to numeric columns ({'protein_g': 12.0, ...})."""
+    return {column: parse_amount(values.get(field), unit) for field, column, unit in NUTRIENTS}
+
+def parse_calories(value):
+    """Calories in kcal; empty or invalid input counts as 0."""
+    parsed = parse_amount(value, "kcal")
+    if parsed is None and value not in (None, ""): print(f"Warning: Invalid calorie value '{value}'. Setting to 0.")
+    return parsed if parsed is not None else 0.0
+
+def format_amount(value, unit="", decimals=1):
+    """Formats a stored number for display, e.g. 12.0 -> '12g'. None -> ''."""
+    if value is None or value == "": return ""
+    try: text = f"{float(value):.{decimals}f}".rstrip("0").rstrip(".")
+    except (TypeError, ValueError): return str(value)
+    return f"{text}{unit}"
\ No newline at end of file
@@ -0,0 +1,192 @@
+# smartplate/oracle_backend.py
+"""Oracle storage backend (optional). Requires oracledb and an Instant Client install."""
+import oracledb
+
+ORACLE_USER = "system"
+ORACLE_PASSWORD = "sanjay"
+ORACLE_DSN = "localhost:1521/XE"
+
+ORACLE_CLIENT_LIB_DIR = r"C:\oracle\instantclient-basic-windows\instantclient_23_8"
+STATEMENT_CACHE_SIZE = 40 # Parsed statements kept per (pooled) connection
+MAX_IN_LIST = 500 # Binds per IN (...) chunk; Oracle allows at most 1000
+
+NAME = "oracle"
+IntegrityError = oracledb.IntegrityError
+DatabaseError = oracledb.DatabaseError
+
+# --- Dialect: every statement uses named binds so db.py can share parameter dicts ---
+SQL = {
+    "create_user": "INSERT INTO users (email, password_hash, name) VALUES (:email, :password_hash, :name)",
+    "get_user_by_email": "SELECT * FROM users WHERE email = :email",
+    "update_password_hash": "UPDATE users SET password_hash = :password_hash WHERE id = :id",
+    "upsert_profile": """MERGE INTO profiles p USING (SELECT :user_id AS user_id FROM dual) d ON (p.user_id = d.user_id)
+        WHEN MATCHED THEN UPDATE SET p.name = :name, p.dob = :dob, p.height_cm = :height, p.weight_kg = :weight, p.activity_level = :activity
+        WHEN NOT MATCHED THEN INSERT (user_id, name, dob, height_cm, weight_kg, activity_level) VALUES (:user_id, :name, :dob, :height, :weight, :activity)""",
+    "get_profile": "SELECT * FROM profiles WHERE user_id = :user_id",
+    "add_meal": """INSERT INTO meal_logs (user_id, date_log, meal, calories, protein_g, carbs_g, fat_g, fiber_g, sugar_g, sodium_mg)
+        VALUES (:user_id, TO_DATE(:date_log, 'YYYY-MM-DD'), :meal, :calories, :protein_g, :carbs_g, :fat_g, :fiber_g, :sugar_g, :sodium_mg)""",
+    # ROWNUM keeps this Oracle 11g compatible; both pages are a descending range scan of MEAL_LOGS_USER_DATE_IX
+    "get_meals": """SELECT * FROM (SELECT id, TO_CHAR(date_log, 'YYYY-MM-DD') AS date_log, meal, calories, protein_g, carbs_g, fat_g, fiber_g, sugar_g, sodium_mg
+        FROM meal_logs WHERE user_id = :user_id ORDER BY date_log DESC, id DESC) WHERE ROWNUM <= :limit""",
+    "get_meals_after": """SELECT * FROM (SELECT id, TO_CHAR(date_log, 'YYYY-MM-DD') AS date_log, meal, calories, protein_g, carbs_g, fat_g, fiber_g, sugar_g, sodium_mg
+        FROM meal_logs WHERE user_id = :user_id
+        AND (date_log < TO_DATE(:cursor_date, 'YYYY-MM-DD') OR (date_log = TO_DATE(:cursor_date, 'YYYY-MM-DD') AND id < :cursor_id))
+        ORDER BY date_log DESC, id DESC) WHERE ROWNUM <= :limit""",
+    "delete_meal": "DELETE FROM meal_logs WHERE id = :id",
+    "update_meal": """UPDATE meal_logs SET date_log = TO_DATE(:date_log, 'YYYY-MM-DD'), meal = :meal, calories = :calories, protein_g = :protein_g,
+        carbs_g = :carbs_g, fat_g = :fat_g, fiber_g = :fiber_g, sugar_g = :sugar_g, sodium_mg = :sodium_mg WHERE id = :id""",
+    # {ids} is filled with a chunk of named binds (:id0, :id1, ...) by db._get_meals_by_ids
+    "get_meals_by_ids": """SELECT id, user_id, TO_CHAR(date_log, 'YYYY-MM-DD') AS date_log, meal, calories, protein_g, carbs_g, fat_g, fiber_g, sugar_g, sodium_mg
+        FROM meal_logs WHERE id IN ({ids})""",
+    # --- Daily rollup (one row per user and day, maintained by deltas) ---
+    "apply_daily_delta": """MERGE INTO daily_nutrition d USING (SELECT :user_id AS user_id, TO_DATE(:date_log, 'YYYY-MM-DD') AS date_log FROM dual) s
+        ON (d.user_id = s.user_id AND d.date_log = s.date_log)
+        WHEN MATCHED THEN UPDATE SET d.meal_count = d.meal_count + :meal_count, d.calories = d.calories + :calories,
+            d.protein_g = d.protein_g + :protein_g, d.carbs_g = d.carbs_g + :carbs_g, d.fat_g = d.fat_g + :fat_g,
+            d.fiber_g = d.fiber_g + :fiber_g, d.sugar_g = d.sugar_g + :sugar_g, d.sodium_mg = d.sodium_mg + :sodium_mg
+        WHEN NOT MATCHED THEN INSERT (user_id, date_log, meal_count, calories, protein_g, carbs_g, fat_g, fiber_g, sugar_g, sodium_mg)
+            VALUES (s.user_id, s.date_log, :meal_count, :calories, :protein_g, :carbs_g, :fat_g, :fiber_g, :sugar_g, :sodium_mg)""",
+    "prune_daily": "DELETE FROM daily_nutrition WHERE user_id = :user_id AND date_log = TO_DATE(:date_log, 'YYYY-MM-DD') AND meal_count <= 0",
+    "daily_totals": """SELECT meal_count, calories AS total_calories, protein_g AS total_protein, carbs_g AS total_carbs, fat_g AS total_fat,
+        fiber_g AS total_fiber, sugar_g AS total_sugar, sodium_mg AS total_sodium
+        FROM daily_nutrition WHERE user_id = :user_id AND date_log >= TO_DATE(:date_log, 'YYYY-MM-DD') AND date_log < TO_DATE(:date_log, 'YYYY-MM-DD') + 1""",
+    "daily_history": """SELECT TO_CHAR(date_log, 'YYYY-MM-DD') AS date_log, meal_count, calories, protein_g, carbs_g, fat_g, fiber_g, sugar_g, sodium_mg
+        FROM daily_nutrition WHERE user_id = :user_id AND date_log >= TO_DATE(:start_date, 'YYYY-MM-DD') AND date_log < TO_DATE(:end_date, 'YYYY-MM-DD') + 1
+        ORDER BY date_log""",
+    # --- Export (oldest first; the resume cursor is the (date_log, id) of the last row written) ---
+    "export_meals": """SELECT id, TO_CHAR(date_log, 'YYYY-MM-DD') AS date_log, meal, calories, protein_g, carbs_g, fat_g, fiber_g, sugar_g, sodium_mg
+        FROM meal_logs WHERE user_id = :user_id AND date_log < TO_DATE(:end_date, 'YYYY-MM-DD') + 1
+        AND (date_log > TO_DATE(:cursor_date, 'YYYY-MM-DD') OR (date_log = TO_DATE(:cursor_date, 'YYYY-MM-DD') AND id > :cursor_id))
+        ORDER BY date_log, id""",
+    # --- Schema versions (see migrations.py) ---
+    "schema_versions": "SELECT version FROM schema_version",
+    "record_schema_version": "INSERT INTO schema_version (version, name) VALUES (:version, :name)",
+}
+
+LEGACY_NUTRIENT_COLUMNS = ("protein", "carbs", "fat", "fiber", "sugar", "sodium")
+NUMERIC_NUTRIENT_COLUMNS = ("protein_g", "carbs_g", "fat_g", "fiber_g", "sugar_g", "sodium_mg")
+
+def init_driver():
+    """Initializes the Oracle client driver (thick mode)."""
+    try:
+        print(f"Initializing Oracle client from: {ORACLE_CLIENT_LIB_DIR}...")
+        oracledb.init_oracle_client(lib_dir=ORACLE_CLIENT_LIB_DIR)
+        print("Oracle client initialized."); return True
+    except Exception as e:
+        print(f"CRITICAL: Failed to initialize Oracle client: {e}"); return False
+
+def connect():
+    """Opens a new Oracle connection."""
+    conn = oracledb.connect(user=ORACLE_USER, password=ORACLE_PASSWORD, dsn=ORACLE_DSN)
+    conn.stmtcachesize = STATEMENT_CACHE_SIZE
+    return conn
+
+def ping(conn):
+    """Round-trips to the server; raises if the connection is dead."""
+    conn.ping()
+
+def configure_fetch(cursor, arraysize):
+    """Rows per network round trip while streaming; prefetch fills the first batch with the execute call."""
+    cursor.arraysize = arraysize; cursor.prefetchrows = arraysize + 1
+
+def describe_error(e):
+    """Logs the Oracle error code/message carried by a DatabaseError."""
+    error_obj, = e.args
+    print(f"Oracle Error Code: {error_obj.code}, Message: {error_obj.message}")
+
+def _columns(c, table):
+    c.execute("SELECT LOWER(column_name) FROM user_tab_columns WHERE table_name = :table_name", {"table_name": table})
+    return [row[0] for row in c.fetchall()]
+
+def legacy_nutrient_columns(conn):
+    """VARCHAR2 nutrient columns still waiting for the numeric backfill."""
+    cols = _columns(conn.cursor(), "MEAL_LOGS")
+    return [col for col in LEGACY_NUTRIENT_COLUMNS if col in cols]
+
+def drop_legacy_nutrient_columns(conn, columns):
+    """Marks the emptied VARCHAR2 columns unused (instant; space is reclaimed by a later DROP UNUSED COLUMNS)."""
+    conn.cursor().execute(f"ALTER TABLE meal_logs SET UNUSED ({', '.join(columns)})")
+    return True
+
+def _table_exists(c, name):
+    c.execute("SELECT table_name FROM user_tables WHERE table_name = :name", {"name": name})
+    return c.fetchone() is not None
+
+# --- Schema steps (idempotent, 11g compatible; run in order by migrations.py) ---
+def create_schema_version_table(conn):
+    """The table migrations.py records applied steps in."""
+    c = conn.cursor()
+    if _table_exists(c, "SCHEMA_VERSION"): return []
+    print("Creating table: SCHEMA_VERSION")
+    c.execute("CREATE TABLE schema_version (version NUMBER PRIMARY KEY, name VARCHAR2(200) NOT NULL, applied_at TIMESTAMP DEFAULT SYSTIMESTAMP NOT NULL)")
+    return ["schema_version"]
+
+def create_core_tables(conn):
+    """Tables, sequences and triggers for users, meal_logs and profiles. Returns the created/upgraded tables."""
+    created_objects = []
+    c = conn.cursor()
+
+    # --- Users Table, Sequence, Trigger ---
+    if not _table_exists(c, "USERS"):
+        print("Creating table: USERS")
+        c.execute("CREATE TABLE users (id NUMBER PRIMARY KEY, email VARCHAR2(255) UNIQUE NOT NULL, password_hash RAW(60) NOT NULL, name VARCHAR2(255))")
+        created_objects.append("users") # Mark that we created something
+
+        # Only create sequence/trigger if table was just created
+        print("Creating sequence: USERS_SEQ")
+        c.execute("CREATE SEQUENCE users_seq START WITH 1 INCREMENT BY 1 NOCACHE")
+        print("Creating trigger: USERS_BI")
+        c.execute("""CREATE OR REPLACE TRIGGER users_bi BEFORE INSERT ON users FOR EACH ROW
+                   BEGIN IF :new.id IS NULL THEN SELECT users_seq.NEXTVAL INTO :new.id FROM dual; END IF; END;""")
+        c.execute("ALTER TRIGGER users_bi ENABLE")
+
+    # --- Meal Logs Table, Sequence, Trigger ---
+    if not _table_exists(c, "MEAL_LOGS"):
+        print("Creating table: MEAL_LOGS")
+        # Nutrients are numeric: grams, except sodium in milligrams (see nutrients.py)
+        c.execute("""CREATE TABLE meal_logs (id NUMBER PRIMARY KEY, user_id NUMBER, date_log DATE, meal VARCHAR2(500), calories NUMBER,
+                   protein_g NUMBER, carbs_g NUMBER, fat_g NUMBER, fiber_g NUMBER, sugar_g NUMBER, sodium_mg NUMBER,
+                   FOREIGN KEY(user_id) REFERENCES users(id) ON DELETE CASCADE)""")
+        created_objects.append("meal_logs")
+
+        print("Creating sequence: MEAL_LOGS_SEQ")
+        c.execute("CREATE SEQUENCE meal_logs_seq START WITH 1 INCREMENT BY 1 NOCACHE")
+        print("Creating trigger: MEAL_LOGS_BI")
+        c.execute("""CREATE OR REPLACE TRIGGER meal_logs_bi BEFORE INSERT ON meal_logs FOR EACH ROW
+                   BEGIN IF :new.id IS NULL THEN SELECT meal_logs_seq.NEXTVAL INTO :new.id FROM dual; END IF; END;""")
+        c.execute("ALTER TRIGGER meal_logs_bi ENABLE")
+    else:
+        missing = [col for col in NUMERIC_NUTRIENT_COLUMNS if col not in _columns(c, "MEAL_LOGS")]
+        if missing:
+            print(f"Upgrading MEAL_LOGS: adding numeric columns {missing}")
+            c.execute(f"ALTER TABLE meal_logs ADD ({', '.join(col + ' NUMBER' for col in missing)})")
+            created_objects.append("meal_logs")
+
+    # --- Profiles Table ---
+    if not _table_exists(c, "PROFILES"):
+        print("Creating table: PROFILES")
+        c.execute("""CREATE TABLE profiles (user_id NUMBER PRIMARY KEY, name VARCHAR2(255), dob VARCHAR2(20), height_cm NUMBER,
+                   weight_kg NUMBER, activity_level VARCHAR2(100), FOREIGN KEY(user_id) REFERENCES users(id) ON DELETE CASCADE)""")
+        created_objects.append("profiles")
+
+    return created_objects
+
+def create_meal_log_index(conn):
+    """The (user, newest-first) index used by meal log paging."""
+    c = conn.cursor()
+    c.execute("SELECT index_name FROM user_indexes WHERE index_name = 'MEAL_LOGS_USER_DATE_IX'")
+    if c.fetchone() is not None: return []
+    print("Creating index: MEAL_LOGS_USER_DATE_IX")
+    c.execute("CREATE INDEX meal_logs_user_date_ix ON meal_logs (user_id, date_log DESC, id DESC)")
+    return ["meal_logs_user_date_ix"]
+
+def create_daily_rollup_table(conn):
+    """The daily_nutrition rollup, index-organized on its (user, day) key."""
+    c = conn.cursor()
+    if _table_exists(c, "DAILY_NUTRITION"): return []
+    print("Creating table: DAILY_NUTRITION")
+    c.execute("""CREATE TABLE daily_nutrition (user_id NUMBER NOT NULL, date_log DATE NOT NULL, meal_count NUMBER DEFAULT 0 NOT NULL,
+               calories NUMBER DEFAULT 0 NOT NULL, protein_g NUMBER DEFAULT 0 NOT NULL, carbs_g NUMBER DEFAULT 0 NOT NULL, fat_g NUMBER DEFAULT 0 NOT NULL,
+               fiber_g NUMBER DEFAULT 0 NOT NULL, sugar_g NUMBER DEFAULT 0 NOT NULL, sodium_mg NUMBER DEFAULT 0 NOT NULL,
+               CONSTRAINT daily_nutrition_pk PRIMARY KEY (user_id, date_log)) ORGANIZATION INDEX""")
+    return ["daily_nutrition"]
\ No newline at end of file
@@ -0,0 +1,149 @@
+# smartplate/pool.py
+"""Process-wide database connection pool shared by every db.get_conn() call."""
+import threading
+import time
+
+class PoolTimeoutError(Exception):
+    """Raised when no connection frees up within the pool's wait timeout."""
+
+class ConnectionPool:
+    """Thread-safe pool that reuses backend connections instead of connecting per query.
+
+    Idle connections are handed out LIFO so the warmest one (with its statement
+    cache) is reused first. Connections idle for longer than `health_check_interval_s`
+    are pinged before reuse, and ones idle longer than `idle_timeout_s` are closed
+    as long as at least `min_size` stay open.
+    """
+
+    def __init__(self, connect, ping, min_size=1, max_size=5, idle_timeout_s=300.0,
+                 wait_timeout_s=10.0, health_check_interval_s=30.0, name="db"):
+        if min_size < 0 or max_size < 1 or min_size > max_size:
+            raise ValueError(f"Invalid pool size: min={min_size}, max={max_size}")
+        self._connect = connect; self._ping = ping; self.name = name
+        self.min_size = min_size; self.max_size = max_size
+        self.idle_timeout_s = idle_timeout_s; self.wait_timeout_s = wait_timeout_s
+        self.health_check_interval_s = health_check_interval_s
+        self._idle = [] # [(conn, last_used_monotonic)], most recently used last
+        self._in_use = 0
+        self._closed = False
+        self._cond = threading.Condition()
+        self._stats = {"hits": 0, "misses": 0, "waits": 0, "wait_time_s": 0.0, "max_wait_s": 0.0,
+                       "created": 0, "closed": 0, "evicted_idle": 0, "failed_health_checks": 0, "timeouts": 0}
+
+    # --- Acquire / Release ---
+    def acquire(self):
+        """Returns a healthy connection, creating one if below max_size or waiting for a release."""
+        waited_since = None
+        with self._cond:
+            while True:
+                if self._closed: raise PoolTimeoutError(f"Pool '{self.name}' is closed.")
+                self._evict_idle_locked()
+                if self._idle:
+                    conn, last_used = self._idle.pop()
+                    self._in_use += 1
+                    break
+                if self._in_use < self.max_size:
+                    self._in_use += 1; conn = None
+                    break
+                # Pool exhausted: wait for a release
+                if waited_since is None: waited_since = time.monotonic(); self._stats["waits"] += 1
+                remaining = self.wait_timeout_s - (time.monotonic() - waited_since)
+                if remaining <= 0:
+                    self._stats["timeouts"] += 1
+                    raise PoolTimeoutError(f"Timed out after {self.wait_timeout_s:.1f}s waiting for a '{self.name}' connection ({self.max_size} in use).")
+                self._cond.wait(remaining)
+            if waited_since is not None: self._record_wait_locked(time.monotonic() - waited_since)
+
+        # Connect / health check outside the lock so other threads aren't blocked
+        try:
+            if conn is not None:
+                if time.monotonic() - last_used > self.health_check_interval_s and not self._is_healthy(conn):
+                    self._discard(conn); conn = None
+                else:
+                    with self._cond: self._stats["hits"] += 1
+                    return conn
+            conn = self._connect()
+            with self._cond: self._stats["misses"] += 1; self._stats["created"] += 1
+            return conn
+        except BaseException:
+            with self._cond: self._in_use -= 1; self._cond.notify()
+            raise
+
+    def release(self, conn, check_health=False):
+        """Returns a connection to the pool, rolling back any uncommitted work first."""
+        healthy = True
+        try: conn.rollback()
+        except Exception: healthy = False
+        if healthy and check_health: healthy = self._is_healthy(conn)
+        with self._cond:
+            self._in_use -= 1
+            if healthy and not self._closed:
+                self._idle.append((conn, time.monotonic()))
+                conn = None
+            self._cond.notify()
+        if conn is not None: self._discard(conn)
+
+    # --- Maintenance ---
+    def prefill(self):
+        """Opens connections up to min_size so the first queries don't pay for connect."""
+        while True:
+            with self._cond:
+                if self._closed or len(self._idle) + self._in_use >= self.min_size: return
+                self._in_use += 1
+            try: conn = self._connect()
+            except BaseException:
+                with self._cond: self._in_use -= 1; self._cond.notify()
+                raise
+            with self._cond: self._stats["created"] += 1
+            self.release(conn)
+
+    def close(self):
+        """Closes idle connections and stops handing out new ones."""
+        with self._cond:
+            self._closed = True; idle = [conn for conn, _ in self._idle]; self._idle = []
+            self._cond.notify_all()
+        for conn in idle: self._discard(conn)
+
+    def stats(self):
+        """Returns hit/miss, wait-time and size counters."""
+        with self._cond:
+            s = dict(self._stats)
+            s["in_use"] = self._in_use; s["idle"] = len(self._idle)
+            s["min_size"] = self.min_size; s["max_size"] = self.max_size
+        requests = s["hits"] + s["misses"]
+        s["hit_rate"] = s["hits"] / requests if requests else 0.0
+        s["avg_wait_s"] = s["wait_time_s"] / s["waits"] if s["waits"] else 0.0
+        return s
+
+    # --- Internals ---
+    def _evict_idle_locked(self):
+        now = time.monotonic(); keep = []; evict = []
+        open_count = len(self._idle) + self._in_use
+        # Oldest idle connections are at the front of the list
+        for conn, last_used in self._idle:
+            if now - last_used > self.idle_timeout_s and open_count > self.min_size:
+                evict.append(conn); open_count -= 1
+            else:
+                keep.append((conn, last_used))
+        if evict:
+            self._idle = keep; self._stats["evicted_idle"] += len(evict); self._stats["closed"] += len(evict)
+            for conn in evict: self._close_quietly(conn)
+
+    def _record_wait_locked(self, waited):
+        self._stats["wait_time_s"] += waited
+        self._stats["max_wait_s"] = max(self._stats["max_wait_s"], waited)
+
+    def _is_healthy(self, conn):
+        try: self._ping(conn); return True
+        except Exception as e:
+            print(f"[ConnectionPool:{self.name}] Health check failed, discarding connection: {e}")
+            with self._cond: self._stats["failed_health_checks"] += 1
+            return False
+
+    def _discard(self, conn):
+        self._close_quietly(conn)
+        with self._cond: self._stats["closed"] += 1
+
+    def _close_quietly(self, conn):
+        try: conn.close()
+        except Exception as e: print(f"[ConnectionPool:{self.name}] Error closing connection: {e}")
\ No newline at end of file
@@ -9,7 +9,7 @@ class ProfilePage(BasePage):
     def build(self):
         main_container = ttk.Frame(self, style="TFrame"); main_container.pack(expand=True)
         left_frame = ttk.Frame(main_container, style="TFrame", width=400); left_frame.pack(side="left", fill="y", padx=(0, 30))
-        ThemedLabel(left_frame, text="User Profile", font=("Segoe UI", 20, "bold"), foreground=self.theme.accent()).pack(pady=(0, 20))
+        ThemedLabel(left_frame, text="User Profile", font=("Segoe UI", 20, "bold"), style="Accent.TLabel").pack(pady=(0, 20))
         fields = {"name": ("Name", ThemedEntry),"dob": ("Date of Birth (YYYY-MM-DD)", ThemedEntry),"height_cm": ("Height (cm)", ThemedEntry),"weight_kg": ("Weight (kg)", ThemedEntry),"activity_level": ("Activity Level", ttk.Combobox)}
         for key, (label, widget_class) in fields.items():
             row = ttk.Frame(left_frame, style="TFrame"); row.pack(fill="x", pady=6)
@@ -19,7 +19,7 @@ class ProfilePage(BasePage):
             entry.pack(side="left", fill="x", expand=True); self.entries[key] = entry
         AccentButton(left_frame, text="Save Profile", command=self.save_data).pack(pady=25, ipady=5, ipadx=10)
         right_frame = ttk.Frame(main_container, style="TFrame"); right_frame.pack(side="left", fill="y")
-        ThemedLabel(right_frame, text="Health Metrics", font=("Segoe UI", 20, "bold"), foreground=self.theme.accent()).pack(pady=(0, 20))
+        ThemedLabel(right_frame, text="Health Metrics", font=("Segoe UI", 20, "bold"), style="Accent.TLabel").pack(pady=(0, 20))
         self.bmi_label = ThemedLabel(right_frame, text="BMI: -", font=("Segoe UI", 14)); self.bmi_label.pack(anchor="w")
         self.bmi_category_label = ThemedLabel(right_frame, text="Category: -", font=("Segoe UI", 11)); self.bmi_category_label.pack(anchor="w", pady=(5,0))
         # load_data is called by main_window on navigate
@@ -33,14 +33,16 @@ class ProfilePage(BasePage):
             height = float(height_str) if height_str else 0
             weight = float(weight_str) if weight_str else 0
             name = self.entries["name"].get(); dob = self.entries["dob"].get(); activity = self.entries["activity_level"].get()
-            update_profile(self.user["id"], name, dob, height, weight, activity)
-            messagebox.showinfo("Success", "Profile saved.", parent=self); self.calculate_bmi()
-        except ValueError: messagebox.showerror("Invalid Input", "Height and Weight must be numbers.", parent=self)
-        except Exception as e: messagebox.showerror("Error", f"Failed to save profile: {e}", parent=self)
+        except ValueError: messagebox.showerror("Invalid Input", "Height and Weight must be numbers.", parent=self); return
+        self.run_db(update_profile, self.user["id"], name, dob, height, weight, activity, loading_text="Saving...",
+                    on_success=lambda _: (messagebox.showinfo("Success", "Profile saved.", parent=self), self.calculate_bmi()),
+                    on_error=lambda e: messagebox.showerror("Error", f"Failed to save profile: {e}", parent=self))
     def load_data(self):
         from ..db import get_profile # Import here
         if self.user["id"] == 0: return
-        profile = get_profile(self.user["id"])
+        self.run_db(get_profile, self.user["id"], key="profile", on_success=self.fill_profile,
+                    on_error=lambda e: messagebox.showerror("Load Error", f"Could not load profile: {e}", parent=self))
+    def fill_profile(self, profile):
         if profile:
             for key, widget in self.entries.items():
                 val = profile.get(key)
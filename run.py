@@ -1,5 +1,6 @@
 import sys, os
 sys.path.append(os.path.dirname(__file__))  # ✅ ensures smartplate package is seen
+if "--startup-report" in sys.argv: os.environ["SMARTPLATE_STARTUP_REPORT"] = "1" # Per-module import timings at the login window
 
 from smartplate.main import start_application
 
@@ -0,0 +1,118 @@
+# smartplate/semantic_cache.py
+"""Two-tier answer cache for AI prompts: exact (normalized text) and semantic (similar wording).
+
+Semantic matching uses hashed word and character n-gram vectors compared by cosine similarity
+with NumPy, so it needs no model download. Wording may differ, but a few things that flip the answer
+must match exactly: negation, numbers and quantities, and terms like 'lose'/'gain' or 'breakfast'/'dinner'
+(see _CONFLICT_GROUPS). Entries persist in the shared DiskCache file and
+inherit its TTL and LRU eviction.
+"""
+import re
+import threading
+import zlib
+import numpy as np
+from .cache import DiskCache, make_key, normalize_text
+
+VECTOR_DIM = 2048 # Hashed feature space; collisions are rare at prompt lengths
+SIMILARITY_THRESHOLD = 0.92 # Cosine similarity needed to reuse an answer for a differently worded prompt (after the guard)
+_FEATURE_WEIGHTS = {"w": 2.0, "b": 1.0, "c": 0.5} # Whole words dominate; bigrams keep order; trigrams absorb typos and plurals
+_STOPWORDS = frozenset("a an the is are was were be of in on to for with and or how much many what which do does did i me my you your "
+                       "it its can will would should there this that please tell about per have has".split())
+_NEGATIONS = {"can't": "can not", "cannot": "can not", "won't": "will not"} # Anything else ending in n't: "isn't" -> "is not"
+_NEGATION_RE = re.compile(r"\b(?:cannot|can't|won't)\b|n't\b")
+_QUANTITY_RE = re.compile(r"(\d+(?:\.\d+)?)\s*(g|mg|kg|ml|l|kcal|cal|oz|cups?|grams?)\b")
+
+def _terms(text):
+    """Content words with quantities glued to units ('100 g' -> '100g'), negations as 'not' and plural 's' dropped."""
+    text = _NEGATION_RE.sub(lambda m: _NEGATIONS.get(m.group(0), " not"), str(text).lower().replace("’", "'"))
+    text = _QUANTITY_RE.sub(r"\1\2", text)
+    return [w[:-1] if len(w) > 3 and w.endswith("s") and not w.endswith("ss") else w
+            for w in re.findall(r"[a-z0-9.]+", text) if w not in _STOPWORDS]
+
+# Swapping, adding or dropping a term of one group changes the answer, however similar the rest of the prompt is
+_CONFLICT_GROUPS = [frozenset(group.split()) for group in (
+    "lose gain", "increase decrease reduce", "high low", "more less", "good bad", "healthy unhealthy", "safe unsafe harmful dangerous",
+    "before after", "breakfast lunch dinner snack", "morning evening night", "vegetarian vegan pescatarian keto paleo",
+    "men women male female", "child kid adult", "raw cooked fried boiled baked")]
+_NEGATION_TERMS = frozenset("not no never without".split())
+
+def guard_terms(text):
+    """What two prompts must agree on to share an answer: negations, numbers/quantities and each conflict group's terms."""
+    terms = set(_terms(text))
+    return (terms & _NEGATION_TERMS, {t for t in terms if any(ch.isdigit() for ch in t)}, [terms & group for group in _CONFLICT_GROUPS])
+
+def embed(text, dim=VECTOR_DIM):
+    """L2-normalized bag of hashed content words, word bigrams and in-word character trigrams."""
+    terms = _terms(text); vector = np.zeros(dim, dtype=np.float32)
+    features = [("w", t) for t in terms] + [("b", f"{a} {b}") for a, b in zip(terms, terms[1:])]
+    for t in terms: padded = f" {t} "; features += [("c", padded[i:i + 3]) for i in range(len(padded) - 2)]
+    for kind, feature in features: vector[zlib.crc32(f"{kind}:{feature}".encode("utf-8")) % dim] += _FEATURE_WEIGHTS[kind]
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+class SemanticCache:
+    """Answers keyed by prompt: an exact tier, then a nearest-neighbour tier over prompt vectors."""
+
+    def __init__(self, namespace, threshold=SIMILARITY_THRESHOLD, ttl_s=30 * 24 * 3600, max_entries=2000):
+        self.threshold = threshold
+        self.store = DiskCache(namespace, ttl_s=ttl_s, max_entries=max_entries)
+        self._lock = threading.Lock(); self._keys = None; self._matrix = None # Loaded on first lookup
+        self._stats = {"exact_hits": 0, "semantic_hits": 0, "misses": 0}
+
+    def _key(self, prompt, context):
+        return make_key(normalize_text(prompt), **context)
+
+    def _load_locked(self):
+        if self._keys is not None: return
+        entries = self.store.items()
+        self._keys = [key for key, _ in entries]
+        self._matrix = np.vstack([embed(value["prompt"]) for _, value in entries]) if entries else np.zeros((0, VECTOR_DIM), dtype=np.float32)
+
+    def get(self, prompt, **context):
+        """Returns (answer, info) or (None, None). info = {"tier": "exact"|"semantic", "similarity", "prompt"}.
+
+        `context` (model, system prompt, ...) must match for an answer to be reused.
+        """
+        value = self.store.get(self._key(prompt, context))
+        if value is not None and value.get("context") == context:
+            with self._lock: self._stats["exact_hits"] += 1
+            return value["answer"], {"tier": "exact", "similarity": 1.0, "prompt": value["prompt"]}
+        with self._lock:
+            self._load_locked()
+            if not self._keys: self._stats["misses"] += 1; return None, None
+            keys = list(self._keys); scores = self._matrix @ embed(prompt); order = np.argsort(-scores)
+        guard = guard_terms(prompt)
+        for idx in order[:5]: # A few candidates, in case the best one expired or belongs to another context
+            if scores[idx] < self.threshold: break
+            key = keys[idx]; value = self.store.get(key)
+            if value is None: self._forget(key); continue
+            if value.get("context") != context or guard_terms(value["prompt"]) != guard: continue # 'gain' must not reuse a 'lose' answer
+            with self._lock: self._stats["semantic_hits"] += 1
+            return value["answer"], {"tier": "semantic", "similarity": float(scores[idx]), "prompt": value["prompt"]}
+        with self._lock: self._stats["misses"] += 1
+        return None, None
+
+    def set(self, prompt, answer, **context):
+        key = self._key(prompt, context)
+        if not self.store.set(key, {"prompt": prompt, "answer": answer, "context": context}): return
+        with self._lock:
+            if self._keys is None: return # Not loaded yet; the next lookup reads it from disk
+            if key in self._keys: return
+            self._keys.append(key); self._matrix = np.vstack([self._matrix, embed(prompt)[None, :]])
+
+    def _forget(self, key):
+        with self._lock:
+            if self._keys and key in self._keys:
+                idx = self._keys.index(key); del self._keys[idx]; self._matrix = np.delete(self._matrix, idx, axis=0)
+
+    def clear(self):
+        self.store.clear()
+        with self._lock: self._keys = None; self._matrix = None
+
+    def stats(self):
+        """Hit counts per tier, hit rate and the underlying DiskCache counters."""
+        with self._lock: s = dict(self._stats)
+        lookups = s["exact_hits"] + s["semantic_hits"] + s["misses"]
+        s["hit_rate"] = (s["exact_hits"] + s["semantic_hits"]) / lookups if lookups else 0.0
+        s["store"] = self.store.stats()
+        return s
\ No newline at end of file
@@ -0,0 +1,81 @@
+# smartplate/session.py
+"""Remember-me sessions: a signed token in the home folder lets a relaunch skip the password (and bcrypt).
+
+The token holds the user id, email, expiry and a fingerprint of the current password hash, signed
+with HMAC-SHA256 under a random per-install key. Editing the token breaks the signature, and a
+password change (or rehash) changes the fingerprint, so either one sends the user back to the form.
+"""
+import base64
+import hashlib
+import hmac
+import json
+import os
+import secrets
+import time
+from pathlib import Path
+
+SESSION_FILE = Path.home() / ".smartplate_session.json"
+SESSION_KEY_FILE = Path.home() / ".smartplate_session.key"
+SESSION_TTL_DAYS = 30
+
+def _b64(data):
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode("ascii")
+
+def _unb64(text):
+    return base64.urlsafe_b64decode(text + "=" * (-len(text) % 4))
+
+def _key():
+    """The signing key, created (readable by this user only) on first use.
+
+    The key is written to a private temp file and linked into place, so a process starting at the same
+    time either wins or reads the complete key the other one wrote, never a half-written file.
+    """
+    try: return SESSION_KEY_FILE.read_bytes()
+    except FileNotFoundError: pass
+    key = secrets.token_bytes(32); tmp = SESSION_KEY_FILE.with_name(f"{SESSION_KEY_FILE.name}.{secrets.token_hex(4)}.tmp")
+    fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    try:
+        with os.fdopen(fd, "wb") as f: f.write(key)
+        os.link(tmp, SESSION_KEY_FILE)
+    except FileExistsError: return SESSION_KEY_FILE.read_bytes() # Another process created it first
+    finally: tmp.unlink(missing_ok=True)
+    return key
+
+def _sign(payload):
+    return _b64(hmac.new(_key(), payload.encode("ascii"), hashlib.sha256).digest())
+
+def _fingerprint(password_hash):
+    return hashlib.sha256(bytes(password_hash)).hexdigest()[:32]
+
+def has_session():
+    return SESSION_FILE.exists()
+
+def issue(user, ttl_days=SESSION_TTL_DAYS):
+    """Remembers `user` (a users row with its password_hash) on this machine."""
+    claims = {"uid": user["id"], "email": user["email"], "exp": int(time.time() + ttl_days * 86400), "pwd": _fingerprint(user["password_hash"])}
+    payload = _b64(json.dumps(claims, separators=(",", ":")).encode("utf-8"))
+    fd = os.open(SESSION_FILE, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    with os.fdopen(fd, "w") as f: json.dump({"token": f"{payload}.{_sign(payload)}"}, f)
+    print(f"[Session] Remembering {user['email']} for {ttl_days} days.")
+
+def clear():
+    """Forgets the remembered login (does nothing if there is none)."""
+    try: SESSION_FILE.unlink(); print("[Session] Saved login removed.")
+    except FileNotFoundError: pass
+
+def restore():
+    """The remembered user row, or None (and the token is removed) if it's missing, tampered with, expired or stale."""
+    from .db import get_user_by_email
+    try:
+        with open(SESSION_FILE) as f: payload, signature = json.load(f)["token"].split(".")
+        if not hmac.compare_digest(signature, _sign(payload)): raise ValueError("bad signature")
+        claims = json.loads(_unb64(payload))
+    except FileNotFoundError: return None
+    except (OSError, ValueError, KeyError, TypeError) as e:
+        print(f"[Session] Ignoring saved login: {e}"); clear(); return None
+    if claims["exp"] < time.time(): print("[Session] Saved login expired."); clear(); return None
+    user = get_user_by_email(claims["email"])
+    if not user or user["id"] != claims["uid"] or _fingerprint(user["password_hash"]) != claims["pwd"]:
+        print("[Session] Saved login no longer matches the account."); clear(); return None
+    print(f"[Session] Restored login for {user['email']}.")
+    return user
\ No newline at end of file
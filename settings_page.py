@@ -3,6 +3,7 @@ from tkinter import ttk, messagebox
 from .base_page import BasePage
 from .widgets import ThemedLabel, ThemedEntry, AccentButton, ThemedButton
 from .theme_manager import ThemeManager
+from .. import session
 
 class SettingsPage(BasePage):
     PAGE_NAME = "Settings"
@@ -12,7 +13,7 @@ class SettingsPage(BasePage):
     def build(self):
         main_container=ttk.Frame(self, style="TFrame"); main_container.pack(pady=30, padx=50, fill="x", expand=True, anchor="n")
         content_frame=ttk.Frame(main_container, style="TFrame", width=600); content_frame.pack(anchor="n"); content_frame.columnconfigure(0, weight=1)
-        ThemedLabel(content_frame, text="Settings", font=("Segoe UI", 20, "bold"), foreground=self.theme.accent()).grid(row=0, column=0, pady=(0, 25), sticky="w")
+        ThemedLabel(content_frame, text="Settings", font=("Segoe UI", 20, "bold"), style="Accent.TLabel").grid(row=0, column=0, pady=(0, 25), sticky="w")
 
         # Theme (Keep)
         ThemedLabel(content_frame, text="Theme Palettes:", font=("Segoe UI", 11, "bold")).grid(row=1, column=0, sticky="w", pady=(10, 5))
@@ -38,6 +39,10 @@ class SettingsPage(BasePage):
         AccentButton(content_frame, text="Save Groq API Key", command=self.save_groq_api_key).grid(row=8, column=0, sticky="w", pady=(0, 20), ipadx=10, ipady=5) # Use new save command
         # --- End Change ---
 
+        # Saved login ("Keep me signed in" on the login window)
+        ThemedLabel(content_frame, text="Saved Login:", font=("Segoe UI", 11, "bold")).grid(row=9, column=0, sticky="w", pady=(10, 5))
+        ThemedButton(content_frame, text="Forget Saved Login", command=self.forget_saved_login).grid(row=10, column=0, sticky="w", pady=(0, 20), ipadx=10, ipady=5)
+
     def set_theme(self, name):
         self.theme.set_theme(name);
         if self.on_theme_change_callback: self.on_theme_change_callback()
@@ -48,6 +53,10 @@ class SettingsPage(BasePage):
         self.theme.save_spoonacular_api_key(api_key);
         messagebox.showinfo("Success", "Spoonacular API Key saved.", parent=self)
 
+    def forget_saved_login(self):
+        session.clear()
+        messagebox.showinfo("Saved Login", "This device will ask for your password next time.", parent=self)
+
     # --- ✅ Save Groq Token Function ---
     def save_groq_api_key(self):
         token = self.groq_token_entry.get().strip();
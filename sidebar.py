@@ -1,7 +1,6 @@
 # smartplate/ui/sidebar.py
 import tkinter as tk
 from tkinter import ttk
-from .theme_manager import ThemeManager
 from .widgets import ThemedButton, ThemedLabel 
 
 class Sidebar(ttk.Frame):
@@ -16,7 +15,7 @@ class Sidebar(ttk.Frame):
         for widget in self.winfo_children():
             widget.destroy()
             
-        ThemedLabel(self, text="SmartPlate", font=("Segoe UI", 18, "bold"), foreground=ThemeManager.accent()).pack(pady=20)
+        ThemedLabel(self, text="SmartPlate", font=("Segoe UI", 18, "bold"), style="Accent.TLabel").pack(pady=20)
         
         self.buttons = {} # Reset buttons dictionary
         for name in ["Home", "Profile", "Meal Log", "Analytics", "Settings"]:
@@ -0,0 +1,174 @@
+# smartplate/sqlite_backend.py
+"""Embedded SQLite storage backend (default). Uses WAL mode and the sqlite3 prepared-statement cache."""
+import os
+from pathlib import Path
+import sqlite3
+
+# Per-user file next to the cache and session files, so the app never writes into the (version-controlled) package.
+# Set SMARTPLATE_SQLITE_PATH to keep using another file, e.g. the old smartplate/db.sqlite3.
+SQLITE_PATH = os.environ.get("SMARTPLATE_SQLITE_PATH", str(Path.home() / ".smartplate.sqlite3"))
+STATEMENT_CACHE_SIZE = 128 # Prepared statements kept per connection
+MAX_IN_LIST = 500 # Binds per IN (...) chunk, well under SQLITE_MAX_VARIABLE_NUMBER
+BUSY_TIMEOUT_S = 10
+
+NAME = "sqlite"
+IntegrityError = sqlite3.IntegrityError
+DatabaseError = sqlite3.DatabaseError
+
+# --- Dialect: same statement keys and named binds as oracle_backend.SQL ---
+SQL = {
+    "create_user": "INSERT INTO users (email, password_hash, name) VALUES (:email, :password_hash, :name)",
+    "get_user_by_email": "SELECT * FROM users WHERE email = :email",
+    "update_password_hash": "UPDATE users SET password_hash = :password_hash WHERE id = :id",
+    "upsert_profile": """INSERT INTO profiles (user_id, name, dob, height_cm, weight_kg, activity_level) VALUES (:user_id, :name, :dob, :height, :weight, :activity)
+        ON CONFLICT(user_id) DO UPDATE SET name = excluded.name, dob = excluded.dob, height_cm = excluded.height_cm,
+        weight_kg = excluded.weight_kg, activity_level = excluded.activity_level""",
+    "get_profile": "SELECT * FROM profiles WHERE user_id = :user_id",
+    "add_meal": """INSERT INTO meal_logs (user_id, date_log, meal, calories, protein_g, carbs_g, fat_g, fiber_g, sugar_g, sodium_mg)
+        VALUES (:user_id, :date_log, :meal, :calories, :protein_g, :carbs_g, :fat_g, :fiber_g, :sugar_g, :sodium_mg)""",
+    # Both meal pages walk idx_meal_logs_user_date backwards; the cursor is the (date_log, id) of the last row shown
+    "get_meals": """SELECT id, date_log, meal, calories, protein_g, carbs_g, fat_g, fiber_g, sugar_g, sodium_mg
+        FROM meal_logs WHERE user_id = :user_id ORDER BY date_log DESC, id DESC LIMIT :limit""",
+    "get_meals_after": """SELECT id, date_log, meal, calories, protein_g, carbs_g, fat_g, fiber_g, sugar_g, sodium_mg
+        FROM meal_logs WHERE user_id = :user_id AND (date_log < :cursor_date OR (date_log = :cursor_date AND id < :cursor_id))
+        ORDER BY date_log DESC, id DESC LIMIT :limit""",
+    "delete_meal": "DELETE FROM meal_logs WHERE id = :id",
+    "update_meal": """UPDATE meal_logs SET date_log = :date_log, meal = :meal, calories = :calories, protein_g = :protein_g,
+        carbs_g = :carbs_g, fat_g = :fat_g, fiber_g = :fiber_g, sugar_g = :sugar_g, sodium_mg = :sodium_mg WHERE id = :id""",
+    # {ids} is filled with a chunk of named binds (:id0, :id1, ...) by db._get_meals_by_ids
+    "get_meals_by_ids": """SELECT id, user_id, date_log, meal, calories, protein_g, carbs_g, fat_g, fiber_g, sugar_g, sodium_mg
+        FROM meal_logs WHERE id IN ({ids})""",
+    # --- Daily rollup (one row per user and day, maintained by deltas) ---
+    "apply_daily_delta": """INSERT INTO daily_nutrition (user_id, date_log, meal_count, calories, protein_g, carbs_g, fat_g, fiber_g, sugar_g, sodium_mg)
+        VALUES (:user_id, :date_log, :meal_count, :calories, :protein_g, :carbs_g, :fat_g, :fiber_g, :sugar_g, :sodium_mg)
+        ON CONFLICT(user_id, date_log) DO UPDATE SET meal_count = meal_count + excluded.meal_count, calories = calories + excluded.calories,
+        protein_g = protein_g + excluded.protein_g, carbs_g = carbs_g + excluded.carbs_g, fat_g = fat_g + excluded.fat_g,
+        fiber_g = fiber_g + excluded.fiber_g, sugar_g = sugar_g + excluded.sugar_g, sodium_mg = sodium_mg + excluded.sodium_mg""",
+    "prune_daily": "DELETE FROM daily_nutrition WHERE user_id = :user_id AND date_log = :date_log AND meal_count <= 0",
+    "daily_totals": """SELECT meal_count, calories AS total_calories, protein_g AS total_protein, carbs_g AS total_carbs, fat_g AS total_fat,
+        fiber_g AS total_fiber, sugar_g AS total_sugar, sodium_mg AS total_sodium
+        FROM daily_nutrition WHERE user_id = :user_id AND date_log = :date_log""",
+    "daily_history": """SELECT date_log, meal_count, calories, protein_g, carbs_g, fat_g, fiber_g, sugar_g, sodium_mg
+        FROM daily_nutrition WHERE user_id = :user_id AND date_log >= :start_date AND date_log <= :end_date ORDER BY date_log""",
+    # --- Export (oldest first; the resume cursor is the (date_log, id) of the last row written) ---
+    "export_meals": """SELECT id, date_log, meal, calories, protein_g, carbs_g, fat_g, fiber_g, sugar_g, sodium_mg
+        FROM meal_logs WHERE user_id = :user_id AND date_log <= :end_date
+        AND (date_log > :cursor_date OR (date_log = :cursor_date AND id > :cursor_id)) ORDER BY date_log, id""",
+    # --- Schema versions (see migrations.py) ---
+    "schema_versions": "SELECT version FROM schema_version",
+    "record_schema_version": "INSERT INTO schema_version (version, name) VALUES (:version, :name)",
+}
+
+LEGACY_NUTRIENT_COLUMNS = ("protein", "carbs", "fat", "fiber", "sugar", "sodium")
+NUMERIC_NUTRIENT_COLUMNS = ("protein_g", "carbs_g", "fat_g", "fiber_g", "sugar_g", "sodium_mg")
+
+def init_driver():
+    """sqlite3 ships with Python; nothing to load."""
+    print(f"Using embedded SQLite database at: {SQLITE_PATH}")
+    return True
+
+def connect():
+    """Opens a SQLite connection configured for WAL and concurrent readers."""
+    conn = sqlite3.connect(SQLITE_PATH, timeout=BUSY_TIMEOUT_S, cached_statements=STATEMENT_CACHE_SIZE, check_same_thread=False)
+    conn.execute("PRAGMA journal_mode = WAL")
+    conn.execute("PRAGMA synchronous = NORMAL") # Safe with WAL, avoids an fsync per commit
+    conn.execute("PRAGMA foreign_keys = ON")
+    return conn
+
+def ping(conn):
+    """Cheap liveness check for a pooled connection."""
+    conn.execute("SELECT 1").fetchone()
+
+def configure_fetch(cursor, arraysize):
+    """Rows pulled per fetchmany() step while streaming a large result."""
+    cursor.arraysize = arraysize
+
+def describe_error(e):
+    """Logs the SQLite error name carried by a DatabaseError."""
+    print(f"SQLite Error: {getattr(e, 'sqlite_errorname', type(e).__name__)}, Message: {e}")
+
+def _table_exists(c, name):
+    c.execute("SELECT name FROM sqlite_master WHERE type = 'table' AND name = :name", {"name": name})
+    return c.fetchone() is not None
+
+def _columns(c, table):
+    return [row[1] for row in c.execute(f"PRAGMA table_info({table})").fetchall()]
+
+def legacy_nutrient_columns(conn):
+    """Text nutrient columns still waiting for the numeric backfill."""
+    cols = _columns(conn.cursor(), "meal_logs")
+    return [col for col in LEGACY_NUTRIENT_COLUMNS if col in cols]
+
+def drop_legacy_nutrient_columns(conn, columns):
+    """Drops the emptied text columns (needs SQLite 3.35+, otherwise they stay as NULLs)."""
+    if sqlite3.sqlite_version_info < (3, 35, 0):
+        print(f"SQLite {sqlite3.sqlite_version} can't drop columns; legacy nutrient columns left empty."); return False
+    c = conn.cursor()
+    for col in columns: c.execute(f"ALTER TABLE meal_logs DROP COLUMN {col}")
+    return True
+
+# --- Schema steps (idempotent; run in order by migrations.py) ---
+def create_schema_version_table(conn):
+    """The table migrations.py records applied steps in."""
+    c = conn.cursor()
+    if _table_exists(c, "schema_version"): return []
+    print("Creating table: schema_version")
+    c.execute("CREATE TABLE schema_version (version INTEGER PRIMARY KEY, name TEXT NOT NULL, applied_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP)")
+    return ["schema_version"]
+
+def create_core_tables(conn):
+    """users, meal_logs and profiles; also upgrades the legacy db.sqlite3 meal_logs layout. Returns the created/upgraded tables."""
+    created_objects = []
+    c = conn.cursor()
+
+    if not _table_exists(c, "users"):
+        print("Creating table: users")
+        c.execute("""CREATE TABLE users (id INTEGER PRIMARY KEY AUTOINCREMENT, email TEXT UNIQUE NOT NULL, password_hash BLOB NOT NULL, name TEXT)""")
+        created_objects.append("users")
+
+    if not _table_exists(c, "meal_logs"):
+        print("Creating table: meal_logs")
+        # Nutrients are numeric: grams, except sodium in milligrams (see nutrients.py)
+        c.execute("""CREATE TABLE meal_logs (id INTEGER PRIMARY KEY AUTOINCREMENT, user_id INTEGER, date_log TEXT, meal TEXT, calories REAL,
+                   protein_g REAL, carbs_g REAL, fat_g REAL, fiber_g REAL, sugar_g REAL, sodium_mg REAL,
+                   FOREIGN KEY(user_id) REFERENCES users(id) ON DELETE CASCADE)""")
+        created_objects.append("meal_logs")
+    else:
+        # Older db.sqlite3 files used a 'date' column and stored nutrients as text
+        cols = _columns(c, "meal_logs"); upgraded = False
+        if "date" in cols and "date_log" not in cols:
+            print("Upgrading meal_logs: renaming 'date' to 'date_log'")
+            c.execute("ALTER TABLE meal_logs RENAME COLUMN date TO date_log"); upgraded = True
+        for col in NUMERIC_NUTRIENT_COLUMNS:
+            if col not in cols:
+                print(f"Upgrading meal_logs: adding numeric column '{col}'")
+                c.execute(f"ALTER TABLE meal_logs ADD COLUMN {col} REAL"); upgraded = True
+        if upgraded: created_objects.append("meal_logs")
+
+    if not _table_exists(c, "profiles"):
+        print("Creating table: profiles")
+        c.execute("""CREATE TABLE profiles (user_id INTEGER PRIMARY KEY, name TEXT, dob TEXT, height_cm REAL, weight_kg REAL, activity_level TEXT,
+                   FOREIGN KEY(user_id) REFERENCES users(id) ON DELETE CASCADE)""")
+        created_objects.append("profiles")
+
+    return created_objects
+
+def create_meal_log_index(conn):
+    """The (user, newest-first) index used by meal log paging."""
+    c = conn.cursor()
+    c.execute("SELECT name FROM sqlite_master WHERE type = 'index' AND name = 'idx_meal_logs_user_date'")
+    if c.fetchone() is not None: return []
+    print("Creating index: idx_meal_logs_user_date")
+    c.execute("CREATE INDEX idx_meal_logs_user_date ON meal_logs (user_id, date_log DESC, id DESC)")
+    return ["idx_meal_logs_user_date"]
+
+def create_daily_rollup_table(conn):
+    """The daily_nutrition rollup (one row per user and day)."""
+    c = conn.cursor()
+    if _table_exists(c, "daily_nutrition"): return []
+    print("Creating table: daily_nutrition")
+    c.execute("""CREATE TABLE daily_nutrition (user_id INTEGER NOT NULL, date_log TEXT NOT NULL, meal_count INTEGER NOT NULL DEFAULT 0,
+               calories REAL NOT NULL DEFAULT 0, protein_g REAL NOT NULL DEFAULT 0, carbs_g REAL NOT NULL DEFAULT 0, fat_g REAL NOT NULL DEFAULT 0,
+               fiber_g REAL NOT NULL DEFAULT 0, sugar_g REAL NOT NULL DEFAULT 0, sodium_mg REAL NOT NULL DEFAULT 0,
+               PRIMARY KEY (user_id, date_log)) WITHOUT ROWID""")
+    return ["daily_nutrition"]
\ No newline at end of file
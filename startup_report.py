@@ -0,0 +1,75 @@
+# smartplate/startup_report.py
+"""Startup timing: milestones such as 'login window shown', plus an optional -X importtime style report.
+
+Milestones are always recorded and the time to the login window is logged. Setting
+SMARTPLATE_STARTUP_REPORT=1 (or `run.py --startup-report`) also times every module import
+(self and cumulative, like `python -X importtime`) and prints the slowest ones at the login window.
+"""
+import importlib.abc
+import os
+import sys
+import time
+
+STARTUP_REPORT = os.environ.get("SMARTPLATE_STARTUP_REPORT") == "1"
+REPORT_TOP_MODULES = 20
+# Packages that belong to a later page; any of them loaded before login is a cold-start regression
+DEFERRED_PACKAGES = ("matplotlib", "numpy", "groq", "requests", "bcrypt", "oracledb")
+
+_started = time.perf_counter() # First import of this module, i.e. right at launch
+_milestones = [] # (name, seconds since launch, modules loaded)
+_imports = {} # module -> [self seconds, cumulative seconds]
+_stack = [] # Child time accumulated by each import in progress
+
+class _TimedLoader:
+    """Wraps a module loader to time exec_module; everything else is passed through."""
+
+    def __init__(self, loader, name):
+        self._loader = loader; self._name = name
+
+    def __getattr__(self, attr):
+        return getattr(self._loader, attr)
+
+    def exec_module(self, module):
+        _stack.append(0.0); started = time.perf_counter()
+        try: self._loader.exec_module(module)
+        finally:
+            total = time.perf_counter() - started; children = _stack.pop()
+            _imports[self._name] = [total - children, total]
+            if _stack: _stack[-1] += total
+
+class _TimingFinder(importlib.abc.MetaPathFinder):
+    """Asks the other finders for the spec and wraps its loader in a _TimedLoader."""
+
+    def find_spec(self, name, path, target=None):
+        for finder in sys.meta_path:
+            if finder is self or not hasattr(finder, "find_spec"): continue
+            spec = finder.find_spec(name, path, target)
+            if spec is not None: break
+        else: return None
+        if spec.loader is not None and hasattr(spec.loader, "exec_module"): spec.loader = _TimedLoader(spec.loader, name)
+        return spec
+
+if STARTUP_REPORT and not any(isinstance(f, _TimingFinder) for f in sys.meta_path): sys.meta_path.insert(0, _TimingFinder())
+
+def mark(name):
+    """Records a startup milestone and returns the milliseconds since launch."""
+    elapsed = time.perf_counter() - _started; _milestones.append((name, elapsed, len(sys.modules)))
+    return elapsed * 1000
+
+def login_window_shown():
+    """Logs the time to the login window, warns about deferred packages already loaded, prints the full report if enabled."""
+    ms = mark("login window shown")
+    print(f"[Startup] Login window shown {ms:.0f} ms after launch ({len(sys.modules)} modules loaded).")
+    early = [name for name in DEFERRED_PACKAGES if name in sys.modules]
+    if early: print(f"[Startup] WARNING: loaded before login (should be lazy): {', '.join(early)}")
+    if STARTUP_REPORT: print(report())
+
+def report(top=REPORT_TOP_MODULES):
+    """Milestones and the slowest imports so far, as printable text."""
+    lines = ["[Startup] Milestones:"] + [f"  {seconds * 1000:8.1f} ms  {name} ({modules} modules)" for name, seconds, modules in _milestones]
+    if _imports:
+        lines.append(f"[Startup] Slowest of {len(_imports)} timed imports:")
+        lines.append(f"  {'self [ms]':>10} | {'cumulative [ms]':>15} | module")
+        for name, (self_s, total_s) in sorted(_imports.items(), key=lambda item: -item[1][1])[:top]:
+            lines.append(f"  {self_s * 1000:10.1f} | {total_s * 1000:15.1f} | {name}")
+    return "\n".join(lines)
\ No newline at end of file
@@ -0,0 +1,33 @@
+# tests/test_cache.py
+import pytest
+
+from smartplate import cache as cache_module
+from smartplate.cache import DiskCache
+
+@pytest.fixture
+def clock(fake_clock):
+    return fake_clock(cache_module)
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / "cache.sqlite3")
+
+def test_values_persist_across_instances(path, clock):
+    first = DiskCache("recipes", path=path); first.set("k", {"calories": 120}); first.close()
+    second = DiskCache("recipes", path=path)
+    assert second.get("k") == {"calories": 120} and DiskCache("other", path=path).get("k") is None # Namespaces are separate
+
+def test_entries_expire_after_ttl(path, clock):
+    store = DiskCache("recipes", ttl_s=60, path=path)
+    store.set("short", 1); store.set("forever", 2, ttl_s=0)
+    clock.now += 61
+    assert store.get("short", "gone") == "gone" and store.get("forever") == 2
+    assert store.stats()["expired"] == 1 and store.stats()["entries"] == 1 # The expired row is deleted on read
+
+def test_least_recently_used_entry_is_evicted(path, clock):
+    store = DiskCache("recipes", max_entries=3, path=path)
+    for key in "abc": store.set(key, key); clock.now += 1
+    assert store.get("a") == "a"; clock.now += 1 # 'b' is now the least recently used
+    store.set("d", "d")
+    reopened = DiskCache("recipes", path=path)
+    assert [key for key, _ in reopened.items()] == ["c", "a", "d"] and store.stats()["evictions"] == 1
\ No newline at end of file
@@ -0,0 +1,30 @@
+# tests/test_db_executor.py
+import time
+
+from smartplate.ui.db_executor import DbExecutor
+
+class FakeWidget:
+    """Records after() calls instead of running a Tk event loop."""
+
+    def __init__(self): self.scheduled = []
+    def after(self, ms, func): self.scheduled.append(func)
+
+def run_until_idle(executor, widget, timeout_s=5.0):
+    deadline = time.monotonic() + timeout_s
+    while executor._pending and time.monotonic() < deadline:
+        if widget.scheduled: widget.scheduled.pop(0)()
+        else: time.sleep(0.005)
+
+def test_on_done_runs_when_the_callback_raises():
+    widget = FakeWidget(); executor = DbExecutor(widget); done = []
+    def broken(result): raise ValueError("page bug")
+    executor.submit(lambda: 42, on_success=broken, on_done=lambda: done.append("success"))
+    executor.submit(lambda: 1 / 0, on_error=broken, on_done=lambda: done.append("error"))
+    run_until_idle(executor, widget); executor.shutdown()
+    assert sorted(done) == ["error", "success"]
+
+def test_cancelled_task_skips_callbacks():
+    widget = FakeWidget(); executor = DbExecutor(widget); calls = []
+    task = executor.submit(time.sleep, 0.05, on_success=calls.append, on_done=lambda: calls.append("done"))
+    task.cancel(); run_until_idle(executor, widget); executor.shutdown()
+    assert calls == []
\ No newline at end of file
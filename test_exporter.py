@@ -0,0 +1,54 @@
+# tests/test_exporter.py
+import csv
+import gzip
+import json
+
+import pytest
+
+from smartplate import commands, exporter
+
+def add_meals(db, user_id, count):
+    db.add_meals(user_id, [{"date_log": f"2024-05-{i % 28 + 1:02d}", "meal": f"m{i}", "calories": i} for i in range(count)])
+
+def test_export_to_stdout_is_pure_jsonl(db, user_id, capsys):
+    db.add_meals(user_id, [{"date_log": "2024-05-01", "meal": "Poha", "calories": 250}, {"date_log": "2024-05-02", "meal": "Dal", "calories": 230}])
+    with db.get_conn() as conn: conn.cursor().execute("DELETE FROM schema_version"); conn.commit() # Migrations run (and log) again
+    capsys.readouterr()
+    assert commands.main(["--backend", "sqlite", "export", "-", "--user-id", str(user_id)]) == 0
+    out, err = capsys.readouterr()
+    rows = [json.loads(line) for line in out.splitlines()] # Every stdout line is data
+    assert [row["meal"] for row in rows] == ["Poha", "Dal"]
+    assert "Database backend" in err and "Migrating database schema" in err and "Closing connection pool" in err
+
+def test_interrupted_export_resumes_after_cursor(db, user_id, tmp_path, monkeypatch):
+    add_meals(db, user_id, 30)
+    path = tmp_path / "out.jsonl"; written = []
+    original = exporter.write_rows
+    def interrupt_after_ten(rows, *args, on_row=None, **kw):
+        def track(row):
+            on_row(row); written.append((row["date_log"], row["id"]))
+            if len(written) == 10: raise KeyboardInterrupt
+        return original(rows, *args, on_row=track, **kw)
+    monkeypatch.setattr(exporter, "write_rows", interrupt_after_ten)
+    with pytest.raises(KeyboardInterrupt): exporter.export_meals(user_id, str(path))
+    monkeypatch.setattr(exporter, "write_rows", original)
+    cursor = exporter.parse_cursor(exporter.format_cursor(written[-1])) # What the CLI prints and takes back with --after
+    stats = exporter.export_meals(user_id, str(path), after=cursor, append=True)
+    rows = [json.loads(line) for line in path.read_text().splitlines()]
+    assert stats["rows"] == 20 and len(rows) == 30 and len({row["id"] for row in rows}) == 30
+    assert [(row["date_log"], row["id"]) for row in rows] == sorted((row["date_log"], row["id"]) for row in rows)
+
+def test_csv_append_skips_the_header(db, user_id, tmp_path):
+    add_meals(db, user_id, 6); path = str(tmp_path / "out.csv")
+    first = exporter.export_meals(user_id, path, end_date="2024-05-03")
+    exporter.export_meals(user_id, path, after=first["last_cursor"], append=True)
+    with open(path, newline="", encoding="utf-8") as f: lines = list(csv.reader(f))
+    assert lines[0] == exporter.MEAL_FIELDS and exporter.MEAL_FIELDS not in lines[1:] # One header, at the top
+    assert [row[2] for row in lines[1:]] == [f"m{i}" for i in range(6)]
+
+def test_jsonl_gz_output(db, user_id, tmp_path):
+    add_meals(db, user_id, 5); path = str(tmp_path / "out.jsonl.gz")
+    assert exporter.export_meals(user_id, path)["rows"] == 5
+    with gzip.open(path, "rt", encoding="utf-8") as f: rows = [json.loads(line) for line in f]
+    assert [row["meal"] for row in rows] == [f"m{i}" for i in range(5)] and list(rows[0]) == exporter.MEAL_FIELDS
+    assert exporter.export_daily(user_id, str(tmp_path / "daily.jsonl.gz"))["rows"] == 5
\ No newline at end of file
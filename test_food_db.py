@@ -0,0 +1,41 @@
+# tests/test_food_db.py
+import pytest
+
+from smartplate.food_db import get_food_index, parse_quantity
+
+@pytest.mark.parametrize("text, expected", [
+    ("2 eggs", (2.0, None, "eggs")),
+    ("100 g chicken breast", (100.0, "g", "chicken breast")),
+    ("200g paneer", (200.0, "g", "paneer")),
+    ("half cup rice", (0.5, "cup", "rice")),
+    ("2 lassi", (2.0, None, "lassi")), # 'l' only counts as litres when it's a whole word
+    ("3 x idli", (3.0, None, "idli")),
+    ("dal tadka", (1.0, None, "dal tadka")),
+])
+def test_parse_quantity(text, expected):
+    assert parse_quantity(text) == expected
+
+def best(query):
+    result = get_food_index().lookup(query)
+    assert result is not None, f"no local match for {query!r}"
+    return result["recipes"][0]
+
+def test_count_multiplies_servings():
+    recipe = best("2 eggs")
+    assert recipe["title"].startswith("Boiled Egg x2") and recipe["calories"] == 156
+
+def test_weight_scales_by_serving_size():
+    recipe = best("100 g chicken breast") # Serving is 100g, so this is one serving, not 100
+    assert recipe["title"] == "Chicken Breast (100 g)" and recipe["calories"] == 165
+
+def test_weight_without_space_stays_local():
+    recipe = best("200g paneer")
+    assert recipe["title"] == "Paneer (200 g)" and recipe["calories"] == 530
+    assert recipe["nutrients"]["PROCNT"]["quantity"] == pytest.approx(36.6)
+
+def test_cup_divides_by_cup_serving():
+    recipe = best("half cup rice")
+    assert recipe["title"] == "Steamed Rice (0.5 cup)" and recipe["calories"] == 102
+
+def test_weight_of_unsized_serving_is_not_matched():
+    assert get_food_index().lookup("100 g pani puri") is None # '6 pieces' has no weight to scale by
\ No newline at end of file
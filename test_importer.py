@@ -0,0 +1,41 @@
+# tests/test_importer.py
+import gzip
+import json
+
+import pytest
+
+from smartplate import importer
+
+CSV_TEXT = """date,food,kcal,protein_g,sodium
+2024-05-01,Poha,250,5g,480mg
+2024-05-01T13:00:00,Dal Tadka,230,11,0.52 g
+not-a-date,Rice,205,4.3,2
+2024-05-02,,100,1,1
+2024-05-02,Curd,150,8.5,
+"""
+
+def write(tmp_path, name, text):
+    path = tmp_path / name; path.write_text(text, encoding="utf-8"); return str(path)
+
+def test_iter_records_yields_raw_and_error_pairs(tmp_path):
+    path = write(tmp_path, "log.jsonl", '{"date": "2024-05-01", "meal": "Idli"}\n\n{broken\n[1, 2]\n')
+    records = list(importer.iter_records(path))
+    assert records[0] == ({"date": "2024-05-01", "meal": "Idli"}, None)
+    assert records[1][0] is None and "line 3: invalid JSON" in str(records[1][1])
+    assert records[2] == ([1, 2], None) # Parsed, rejected later by normalize_record
+
+def test_import_skips_bad_rows_and_keeps_good_ones(db, user_id, tmp_path):
+    stats = importer.import_file(user_id, write(tmp_path, "log.csv", CSV_TEXT), batch_size=2)
+    assert stats["imported"] == 3 and stats["skipped"] == 2 and stats["batches"] == 2
+    meals = {row["meal"]: row for row in db.get_meals(user_id)}
+    assert set(meals) == {"Poha", "Dal Tadka", "Curd"}
+    assert meals["Dal Tadka"]["date_log"] == "2024-05-01" and meals["Dal Tadka"]["sodium_mg"] == pytest.approx(520.0)
+    assert meals["Curd"]["sodium_mg"] is None
+    assert db.get_daily_totals(user_id, "2024-05-01")["total_calories"] == 480.0
+
+def test_import_jsonl_gz_with_error_rows(db, user_id, tmp_path):
+    path = tmp_path / "log.jsonl.gz"
+    with gzip.open(path, "wt", encoding="utf-8") as f:
+        f.write(json.dumps({"day": "2024-05-03", "name": "Apple", "calories": 95}) + "\n{oops\n" + json.dumps({"meal": "No date"}) + "\n")
+    stats = importer.import_file(user_id, str(path))
+    assert stats["imported"] == 1 and stats["skipped"] == 2
\ No newline at end of file
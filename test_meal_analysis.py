@@ -0,0 +1,45 @@
+# tests/test_meal_analysis.py
+import pytest
+
+from smartplate.meal_analysis import analyze_meal, split_meal
+
+class RecordingApi:
+    """Stands in for ApiClient: records what reached the network lookup and matches nothing."""
+
+    def __init__(self):
+        self.queries = []
+
+    def analyze_natural(self, query):
+        self.queries.append(query); return {"error": f"offline: {query}"}
+
+@pytest.mark.parametrize("description, items", [
+    ("coffee with milk", ["coffee with milk"]),
+    ("cornflakes with milk", ["cornflakes with milk"]),
+    ("mac and cheese", ["mac and cheese"]),
+    ("bread and butter", ["bread and butter"]),
+    ("2 chapati, dal tadka and salad", ["2 chapati", "dal tadka", "salad"]),
+    ("idli with sambar", ["idli", "sambar"]),
+    ("rajma; coffee with milk", ["rajma", "coffee with milk"]),
+])
+def test_split_meal_keeps_local_dishes_whole(description, items):
+    assert split_meal(description) == items
+
+@pytest.mark.parametrize("description, title", [
+    ("coffee with milk", "Coffee with Milk"),
+    ("cornflakes with milk", "Cornflakes with Milk"),
+    ("mac and cheese", "Mac and Cheese"),
+    ("bread and butter", "Bread and Butter"),
+])
+def test_whole_dish_is_one_recipe(description, title):
+    api = RecordingApi()
+    result = analyze_meal(description, api)
+    assert result["recipes"][0]["title"].startswith(title) and "breakdown" not in result["recipes"][0]
+    assert api.queries == []
+
+def test_coffee_with_milk_counts_milk_once():
+    assert analyze_meal("coffee with milk", RecordingApi())["recipes"][0]["calories"] < 100 # Not coffee with milk + a cup of milk
+
+def test_composite_sums_items():
+    total = analyze_meal("2 roti, coffee with milk", RecordingApi())["recipes"][0]
+    assert [r["title"].split(" x")[0].split(" (")[0] for r in total["breakdown"]] == ["Roti", "Coffee with Milk"]
+    assert total["calories"] == sum(r["calories"] for r in total["breakdown"])
\ No newline at end of file
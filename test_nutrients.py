@@ -0,0 +1,53 @@
+# tests/test_nutrients.py
+import pytest
+
+from smartplate.nutrients import format_amount, parse_amount, parse_calories, parse_nutrients
+
+@pytest.mark.parametrize("value, unit, expected", [
+    ("12.3g", "g", 12.3),
+    ("0.4 g", "g", 0.4),
+    (" 7 ", "g", 7.0), # Bare numbers are already in the storage unit
+    (".5g", "g", 0.5),
+    ("350mg", "g", 0.35),
+    ("1.2 g", "mg", 1200.0),
+    ("250 mcg", "mg", 0.25),
+    ("1,250 mg", "mg", 1250.0),
+    ("2 kg", "g", 2000.0),
+    ("418.4 kJ", "kcal", 100.0),
+    ("12G", "g", 12.0),
+    ("+3g", "g", 3.0),
+    ("2 oz", "g", 56.69904625),
+    ("0.1 oz", "mg", 2834.9523125),
+    ("1 lb", "g", 453.59237),
+    ("150 grams", "g", 150.0),
+    ("0.5 kg", "g", 500.0),
+    ("40 mcg", "g", 0.00004),
+    (8, "g", 8.0),
+    (2.5, "mg", 2.5),
+])
+def test_parse_amount(value, unit, expected):
+    assert parse_amount(value, unit) == pytest.approx(expected)
+
+@pytest.mark.parametrize("value", [None, "", "   ", "g", "N/A", "-", ".g"])
+def test_parse_amount_without_a_number(value):
+    assert parse_amount(value, "g") is None
+
+@pytest.mark.parametrize("value, unit", [("-3g", "g"), ("-0.5", "mg"), (-2, "g"), ("-120 kcal", "kcal")])
+def test_negative_amounts_are_missing(value, unit):
+    assert parse_amount(value, unit) is None
+
+@pytest.mark.parametrize("value, unit", [("5 cups", "g"), ("2 tbsp", "mg"), ("12 oz", "kcal"), ("3 servings", "g")])
+def test_unknown_units_are_missing(value, unit):
+    assert parse_amount(value, unit) is None
+
+def test_parse_nutrients_maps_fields_to_columns():
+    parsed = parse_nutrients({"protein": "12g", "sodium": "0.4 g", "fiber": ""})
+    assert parsed["protein_g"] == 12.0 and parsed["sodium_mg"] == pytest.approx(400.0)
+    assert parsed["fiber_g"] is None and parsed["carbs_g"] is None
+
+def test_parse_calories_defaults_to_zero():
+    assert parse_calories("250 kcal") == 250.0 and parse_calories("abc") == 0.0 and parse_calories(None) == 0.0
+    assert parse_calories("-50") == 0.0
+
+def test_format_amount():
+    assert format_amount(12.0, "g") == "12g" and format_amount(0.35, "g", 2) == "0.35g" and format_amount(None, "g") == ""
\ No newline at end of file
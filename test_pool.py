@@ -0,0 +1,81 @@
+# tests/test_pool.py
+import threading
+
+import pytest
+
+from smartplate import pool as pool_module
+from smartplate.pool import ConnectionPool, PoolTimeoutError
+
+class FakeConn:
+    def __init__(self, n):
+        self.n = n; self.closed = False; self.rollbacks = 0; self.alive = True
+
+    def rollback(self):
+        if not self.alive: raise RuntimeError("connection lost")
+        self.rollbacks += 1
+
+    def close(self):
+        self.closed = True
+
+@pytest.fixture
+def clock(fake_clock):
+    return fake_clock(pool_module)
+
+def make_pool(**kw):
+    made = []; pings = []
+    def connect(): conn = FakeConn(len(made)); made.append(conn); return conn
+    def ping(conn):
+        pings.append(conn)
+        if not conn.alive: raise RuntimeError("server went away")
+    return ConnectionPool(connect, ping, **kw), made, pings
+
+def test_reuses_most_recently_released_connection(clock):
+    pool, made, _ = make_pool(max_size=3)
+    a = pool.acquire(); b = pool.acquire()
+    pool.release(a); clock.now += 1; pool.release(b)
+    assert pool.acquire() is b and pool.acquire() is a # LIFO: warmest first
+    assert len(made) == 2 and a.rollbacks == 1 and b.rollbacks == 1
+    stats = pool.stats()
+    assert stats["hits"] == 2 and stats["misses"] == 2 and stats["in_use"] == 2 and stats["hit_rate"] == 0.5
+
+def test_waits_for_release_then_times_out(): # Real clock: Condition.wait needs time to pass
+    pool, _, _ = make_pool(max_size=1, wait_timeout_s=0.05)
+    conn = pool.acquire()
+    threading.Timer(0.01, pool.release, args=(conn,)).start()
+    assert pool.acquire() is conn # Handed over once released
+    with pytest.raises(PoolTimeoutError): pool.acquire()
+    assert pool.stats()["waits"] == 2 and pool.stats()["timeouts"] == 1
+
+def test_idle_connections_are_evicted_down_to_min_size(clock):
+    pool, made, _ = make_pool(min_size=1, max_size=3, idle_timeout_s=60, health_check_interval_s=1000)
+    conns = [pool.acquire() for _ in range(3)]
+    for conn in conns: pool.release(conn)
+    clock.now += 61
+    kept = pool.acquire()
+    assert kept is conns[-1] and [c.closed for c in conns] == [True, True, False] # Keeps min_size (the one handed out)
+    assert pool.stats()["evicted_idle"] == 2 and len(made) == 3
+
+def test_stale_connection_is_pinged_and_replaced(clock):
+    pool, made, pings = make_pool(max_size=2, health_check_interval_s=30, idle_timeout_s=1000)
+    conn = pool.acquire(); pool.release(conn)
+    clock.now += 10; assert pool.acquire() is conn and pings == [] # Recently used: no ping
+    pool.release(conn); conn.alive = False; clock.now += 31
+    fresh = pool.acquire()
+    assert fresh is not conn and conn.closed and pings == [conn] and len(made) == 2
+    assert pool.stats()["failed_health_checks"] == 1
+
+def test_broken_connection_is_not_returned_to_the_pool(clock):
+    pool, made, _ = make_pool(max_size=2)
+    conn = pool.acquire(); conn.alive = False; pool.release(conn)
+    assert conn.closed and pool.stats()["idle"] == 0 and pool.acquire() is not conn
+
+def test_prefill_and_close(clock):
+    pool, made, _ = make_pool(min_size=2, max_size=4)
+    pool.prefill()
+    assert len(made) == 2 and pool.stats()["idle"] == 2
+    pool.close()
+    assert all(conn.closed for conn in made)
+    with pytest.raises(PoolTimeoutError): pool.acquire()
+
+def test_rejects_invalid_sizes():
+    with pytest.raises(ValueError): make_pool(min_size=3, max_size=2)
\ No newline at end of file
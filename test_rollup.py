@@ -0,0 +1,59 @@
+# tests/test_rollup.py
+import pytest
+
+from smartplate.db import ROLLUP_COLUMNS
+
+def meal(date_log, name, calories, protein="10g", sodium="200mg"):
+    return {"date_log": date_log, "meal": name, "calories": calories, "protein": protein, "carbs": "20g", "fat": "5g",
+            "fiber": "1g", "sugar": "", "sodium": sodium}
+
+def rollup(db, user_id):
+    with db.get_conn() as conn:
+        c = conn.cursor()
+        c.execute(f"SELECT date_log, meal_count, {', '.join(ROLLUP_COLUMNS)} FROM daily_nutrition WHERE user_id = :user_id ORDER BY date_log",
+                  {"user_id": user_id})
+        return [tuple(round(v, 6) if isinstance(v, float) else v for v in row) for row in c.fetchall()]
+
+def assert_matches_rebuild(db, user_id):
+    """The incrementally maintained rollup must equal one recomputed from meal_logs."""
+    incremental = rollup(db, user_id)
+    db.rebuild_daily_rollup(user_id)
+    assert incremental == rollup(db, user_id)
+    return incremental
+
+def meal_ids(db, user_id):
+    return {row["meal"]: row["id"] for row in db.get_meals(user_id, limit=100)}
+
+def test_add_meals_updates_rollup(db, user_id):
+    db.add_meal(user_id, "2024-05-01", "Poha", "250", "5g", "42g", "7g", "2.5g", "2.5g", "480mg")
+    db.add_meals(user_id, [meal("2024-05-01", "Dal", 230), meal("2024-05-02", "Rice", 205, sodium="0.002 g")])
+    rows = assert_matches_rebuild(db, user_id)
+    assert [(day, count, calories) for day, count, calories, *_ in rows] == [("2024-05-01", 2, 480.0), ("2024-05-02", 1, 205.0)]
+    totals = db.get_daily_totals(user_id, "2024-05-01")
+    assert totals["total_sodium"] == pytest.approx(680.0) and totals["total_protein"] == pytest.approx(15.0)
+
+def test_update_meals_moves_totals_between_days(db, user_id):
+    db.add_meals(user_id, [meal("2024-05-01", "Dal", 230), meal("2024-05-01", "Roti", 120), meal("2024-05-02", "Rice", 205)])
+    ids = meal_ids(db, user_id)
+    updated = db.update_meals([dict(meal("2024-05-02", "Roti", 240, protein="6.2g"), id=ids["Roti"]), # Moved to the next day
+                               dict(meal("2024-05-02", "Rice", 300), id=ids["Rice"]), dict(meal("2024-05-03", "Gone", 1), id=999999)])
+    assert updated == 2
+    rows = assert_matches_rebuild(db, user_id)
+    assert [(day, count, calories) for day, count, calories, *_ in rows] == [("2024-05-01", 1, 230.0), ("2024-05-02", 2, 540.0)]
+
+def test_delete_meals_prunes_empty_days(db, user_id):
+    db.add_meals(user_id, [meal("2024-05-01", "Dal", 230), meal("2024-05-02", "Rice", 205), meal("2024-05-02", "Curd", 150)])
+    ids = meal_ids(db, user_id)
+    assert db.delete_meals([ids["Dal"], ids["Curd"], 999999]) == 2
+    rows = assert_matches_rebuild(db, user_id)
+    assert [(day, count, calories) for day, count, calories, *_ in rows] == [("2024-05-02", 1, 205.0)]
+    assert db.get_daily_totals(user_id, "2024-05-01")["meal_count"] == 0
+
+def test_mixed_sequence_matches_rebuild(db, user_id):
+    days = [f"2024-06-{d:02d}" for d in range(1, 6)]
+    db.add_meals(user_id, [meal(days[i % 5], f"m{i}", 100 + i, protein=f"{i / 3:.2f}g") for i in range(40)])
+    ids = meal_ids(db, user_id)
+    db.update_meals([dict(meal(days[(i + 2) % 5], f"m{i}", 50 + i), id=ids[f"m{i}"]) for i in range(0, 40, 3)])
+    db.delete_meals([ids[f"m{i}"] for i in range(1, 40, 4)])
+    db.delete_meal(ids["m0"])
+    assert len(assert_matches_rebuild(db, user_id)) == 5
\ No newline at end of file
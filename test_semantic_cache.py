@@ -0,0 +1,47 @@
+# tests/test_semantic_cache.py
+import pytest
+
+pytest.importorskip("numpy")
+from smartplate.semantic_cache import SemanticCache, guard_terms
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = SemanticCache("test.answers"); cache.store.path = str(tmp_path / "cache.sqlite3")
+    yield cache
+    cache.store.close()
+
+NEGATIVE_PAIRS = [
+    ("What should I eat to lose weight", "What should I eat to gain weight"),
+    ("Is intermittent fasting safe", "Is intermittent fasting not safe"),
+    ("Is intermittent fasting safe", "Isn't intermittent fasting safe"),
+    ("Suggest a high protein breakfast plan", "Suggest a high protein dinner plan"),
+    ("Best protein sources for vegetarians", "Best protein sources for vegans"),
+    ("How much protein is in 100 g paneer", "How much protein is in 200 g paneer"),
+    ("Give me a high protein vegetarian breakfast plan for weight loss", "Give me a high protein breakfast plan for weight loss"),
+]
+
+@pytest.mark.parametrize("cached, asked", NEGATIVE_PAIRS)
+def test_different_meaning_is_a_miss(cache, cached, asked):
+    cache.set(cached, "cached answer", model="m")
+    assert cache.get(asked, model="m") == (None, None)
+
+@pytest.mark.parametrize("cached, asked", NEGATIVE_PAIRS)
+def test_guard_rejects_regardless_of_threshold(cached, asked):
+    assert guard_terms(cached) != guard_terms(asked)
+
+@pytest.mark.parametrize("cached, asked", [
+    ("How many calories are in 2 eggs?", "calories in 2 eggs"),
+    ("How much protein is in 100 g paneer", "how much protein in 100g of paneer?"),
+    ("Is paneer healthy for weight loss?", "is  Paneer healthy for weight-loss"),
+    ("Give me a high protein vegetarian breakfast plan for weight loss", "Could you give me a high protein vegetarian breakfast plan for weight loss"),
+    ("Give me a high protein vegetarian breakfast plan for weight loss", "Give me a high protein vegetarian breakfast plan for weight loss today"),
+])
+def test_paraphrase_is_a_semantic_hit(cache, cached, asked):
+    cache.set(cached, "cached answer", model="m")
+    answer, info = cache.get(asked, model="m")
+    assert answer == "cached answer" and info["tier"] == "semantic" and info["similarity"] >= cache.threshold
+
+def test_context_must_match(cache):
+    cache.set("calories in 2 eggs", "cached answer", model="m")
+    assert cache.get("How many calories are in 2 eggs?", model="other") == (None, None)
+    assert cache.get("calories in 2 eggs", model="m")[1]["tier"] == "exact"
\ No newline at end of file
@@ -0,0 +1,87 @@
+# tests/test_session.py
+import json
+import os
+import threading
+
+import pytest
+
+from smartplate import session
+
+@pytest.fixture(autouse=True)
+def session_files(tmp_path, monkeypatch):
+    monkeypatch.setattr(session, "SESSION_FILE", tmp_path / "session.json")
+    monkeypatch.setattr(session, "SESSION_KEY_FILE", tmp_path / "session.key")
+
+@pytest.fixture
+def user(db, user_id):
+    return db.get_user_by_email("test@example.com")
+
+def rewrite_token(change):
+    token = json.loads(session.SESSION_FILE.read_text())["token"]
+    session.SESSION_FILE.write_text(json.dumps({"token": change(token)}))
+
+def test_round_trip(user):
+    session.issue(user)
+    assert session.has_session() and session.restore()["id"] == user["id"]
+
+@pytest.mark.skipif(os.name == "nt", reason="POSIX file modes don't apply on Windows")
+def test_key_is_private(user):
+    session.issue(user)
+    assert session.SESSION_KEY_FILE.stat().st_mode & 0o077 == 0 # Key readable by this user only
+
+def test_tampered_payload_is_rejected(user):
+    session.issue(user)
+    def other_user(token):
+        payload, signature = token.split(".")
+        claims = json.loads(session._unb64(payload)); claims["uid"] += 1
+        return f"{session._b64(json.dumps(claims).encode())}.{signature}"
+    rewrite_token(other_user)
+    assert session.restore() is None and not session.has_session() # A bad token is removed
+
+def test_tampered_signature_and_garbage_are_rejected(user):
+    session.issue(user); rewrite_token(lambda token: token[:-2] + ("AA" if not token.endswith("AA") else "BB"))
+    assert session.restore() is None
+    session.SESSION_FILE.write_text("not json")
+    assert session.restore() is None and not session.has_session()
+
+def test_expired_token_is_rejected(user, monkeypatch):
+    session.issue(user, ttl_days=1)
+    monkeypatch.setattr(session.time, "time", lambda: 10 ** 12)
+    assert session.restore() is None and not session.has_session()
+
+def test_password_change_invalidates_token(db, user):
+    session.issue(user)
+    with db.get_conn() as conn:
+        conn.cursor().execute(db._sql("update_password_hash"), {"id": user["id"], "password_hash": b"changed"}); conn.commit()
+    assert session.restore() is None
+
+def test_missing_token_and_clear(user):
+    assert session.restore() is None
+    session.issue(user); session.clear(); session.clear()
+    assert not session.has_session()
+
+def test_concurrent_first_use_agrees_on_one_key(user):
+    keys = []; start = threading.Barrier(8)
+    def first_use(): start.wait(); keys.append(session._key())
+    threads = [threading.Thread(target=first_use) for _ in range(8)]
+    for t in threads: t.start()
+    for t in threads: t.join()
+    assert len(set(keys)) == 1 and keys[0] == session.SESSION_KEY_FILE.read_bytes() and len(keys[0]) == 32
+    assert [p.name for p in session.SESSION_KEY_FILE.parent.iterdir() if p.suffix == ".tmp"] == []
+
+def test_login_rehashes_to_configured_cost_and_drops_old_sessions(db, monkeypatch):
+    pytest.importorskip("bcrypt")
+    monkeypatch.setattr(db, "BCRYPT_ROUNDS", 4); db.create_user("cost@example.com", "s3cret")
+    old = db.get_user_by_email("cost@example.com"); session.issue(old)
+    monkeypatch.setattr(db, "BCRYPT_ROUNDS", 5)
+    assert db.authenticate("cost@example.com", "wrong") is None
+    user = db.authenticate("cost@example.com", "s3cret")
+    assert db._hash_rounds(bytes(user["password_hash"])) == 5
+    assert db._hash_rounds(bytes(db.get_user_by_email("cost@example.com")["password_hash"])) == 5
+    assert session.restore() is None # Signed against the old hash
+    session.issue(user); assert session.restore()["id"] == user["id"]
+    assert db.authenticate("cost@example.com", "s3cret")["id"] == user["id"] # Already at the configured cost
+
+@pytest.mark.parametrize("value, rounds", [(None, 12), ("", 12), ("10", 10), ("2", 4), ("40", 31), ("twelve", 12)])
+def test_bcrypt_rounds_setting(db, value, rounds):
+    assert db._bcrypt_rounds(value) == rounds
\ No newline at end of file
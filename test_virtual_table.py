@@ -0,0 +1,109 @@
+# tests/test_virtual_table.py
+from types import SimpleNamespace
+
+import pytest
+
+from smartplate.ui import virtual_table
+from smartplate.ui.virtual_table import RowModel, VirtualTable
+
+ROW_HEIGHT = 25
+
+def newest_first(row):
+    return (-row["day"], -row["id"])
+
+def make_rows(n):
+    return [{"id": i, "day": i // 3, "meal": f"meal {i}"} for i in range(1, n + 1)]
+
+class FakeTree:
+    """Just enough of ttk.Treeview for VirtualTable, with a selection limited to existing items like the real one."""
+
+    def __init__(self, rows_visible):
+        self.items = []; self.values = {}; self._selection = []; self._focus = ""
+        self.height = ROW_HEIGHT * (rows_visible + 1)
+
+    def configure(self, **kw): pass
+    def cget(self, key): return "Treeview"
+    def bind(self, *args, **kw): pass
+    def after_idle(self, func): func()
+    def bbox(self, iid): return (0, ROW_HEIGHT, 100, ROW_HEIGHT)
+    def yview(self): return (0.0, 1.0)
+    def winfo_height(self): return self.height
+    def identify_region(self, x, y): return "cell"
+    def focus(self, iid=None):
+        if iid is None: return self._focus
+        self._focus = str(iid)
+    def insert(self, parent, index, iid, values): self.items.insert(index, iid); self.values[iid] = values
+    def move(self, iid, parent, index): self.items.remove(iid); self.items.insert(index, iid)
+    def item(self, iid, values): self.values[iid] = values
+    def delete(self, *iids):
+        for iid in iids: self.items.remove(iid)
+        self._selection = [iid for iid in self._selection if iid not in iids]
+    def selection(self): return tuple(str(iid) for iid in self._selection)
+    def selection_set(self, iids): self._selection = [iid for iid in iids if iid in self.items]
+    def user_select(self, iids): # What Tk's class bindings do for a click, followed by <<TreeviewSelect>>
+        self.selection_set(iids)
+
+class FakeScrollbar:
+    def configure(self, **kw): pass
+    def set(self, first, last): self.position = (first, last)
+
+@pytest.fixture
+def table(monkeypatch):
+    monkeypatch.setattr(virtual_table.ttk, "Style", lambda: SimpleNamespace(lookup=lambda *a: ROW_HEIGHT))
+    model = RowModel(newest_first); model.extend(make_rows(300))
+    view = VirtualTable(FakeTree(rows_visible=20), FakeScrollbar(), model, lambda row: (row["id"], row["meal"]))
+    view.refresh()
+    return view
+
+def click(view, iids, extend=False):
+    view.on_click(SimpleNamespace(state=0x0004 if extend else 0, x=0, y=0))
+    view.tree.user_select((list(view.tree.selection()) if extend else []) + iids); view.on_tree_select()
+
+# --- RowModel ---
+def test_model_keeps_sort_order():
+    model = RowModel(newest_first); model.extend(make_rows(10))
+    assert [row["id"] for row in model.window(0, 4)] == [10, 9, 8, 7]
+    assert model.upsert({"id": 1, "day": 99, "meal": "moved"}) == 0 and model.index(1) == 0
+
+def test_model_remove_ignores_unknown_ids():
+    model = RowModel(newest_first); model.extend(make_rows(10))
+    assert model.remove([3, 4, 42]) == 2
+    assert model.get(3) is None and len(model) == 8 and [row["id"] for row in model.window(5, 3)] == [5, 2, 1]
+
+def test_replace_head_drops_missing_rows_and_keeps_the_tail():
+    model = RowModel(newest_first); model.extend(make_rows(10))
+    new = {"id": 11, "day": 9, "meal": "new"}; edited = dict(model.get(9), meal="edited")
+    model.replace_head([new, model.get(10), edited, model.get(7)]) # 8 was deleted elsewhere
+    assert [row["id"] for row in model.window(0, len(model))] == [11, 10, 9, 7, 6, 5, 4, 3, 2, 1]
+    assert model.get(9)["meal"] == "edited" and model.get(8) is None
+
+def test_replace_head_complete_drops_everything_else():
+    model = RowModel(newest_first); model.extend(make_rows(10))
+    model.replace_head([{"id": 2, "day": 0, "meal": "meal 2"}], complete=True)
+    assert [row["id"] for row in model.window(0, len(model))] == [2]
+
+# --- VirtualTable ---
+def test_only_the_window_is_rendered(table):
+    assert table.tree.items == [row["id"] for row in table.model.window(0, 21)]
+    table.scroll_to(150)
+    assert table.tree.items == [row["id"] for row in table.model.window(150, 21)]
+
+def test_selection_survives_scrolling(table):
+    click(table, [300, 299])
+    table.scroll_to(200)
+    assert table.tree.selection() == () and table.selected_ids() == [300, 299]
+    click(table, [100], extend=True) # Ctrl-click further down adds to it
+    table.scroll_to(0)
+    assert set(table.tree.selection()) == {"300", "299"} and table.selected_ids() == [300, 299, 100]
+
+def test_plain_click_replaces_off_screen_selection(table):
+    click(table, [300]); table.scroll_to(200); click(table, [100])
+    assert table.selected_ids() == [100]
+
+def test_removed_rows_leave_the_selection(table):
+    click(table, [300, 299]); table.model.remove([299]); table.refresh()
+    assert table.selected_ids() == [300]
+
+def test_keyboard_moves_selection(table):
+    click(table, [300]); table.tree.focus(300); table.move_focus(50)
+    assert table.selected_ids() == [table.model.window(50, 1)[0]["id"]] and table.top > 0
\ No newline at end of file
@@ -19,7 +19,11 @@ class ThemeManager:
     # --- ✅ Store Groq Key ---
     _groq_api_key = ""
     # --- End Change ---
+    _credentials_version = 0 # Bumped whenever an API key may have changed; clients reload only then
     style = None
+    _base_theme = None
+    _style_sets = {} # Palette name -> ttk theme settings
+    _registered = [] # (widget, recolor(palette)) for raw tk widgets
 
     @classmethod
     def setup_style(cls, root):
@@ -33,70 +37,79 @@ class ThemeManager:
 
     @classmethod
     def apply_theme_to_style(cls):
-        """Applies the current theme colors to ttk widget styles."""
+        """Switches ttk to the current palette's theme (created on first use) and re-colors registered tk widgets.
+
+        Every ttk widget follows the switch by itself, so nothing has to be rebuilt.
+        """
         if cls.style is None:
             print("ERROR: ThemeManager.style not initialized.")
             return
+        name = cls.theme_name(); ttk_theme = cls.ttk_theme_name(name)
+        if ttk_theme not in cls.style.theme_names():
+            cls.style.theme_create(ttk_theme, parent=cls.base_theme(), settings=cls.style_set(name))
+            print(f"Created ttk theme '{ttk_theme}' on '{cls.base_theme()}'.")
+        cls.style.theme_use(ttk_theme)
+        cls.recolor_registered()
 
-        p = cls.palette()
-        print(f"Applying theme: {cls.theme_name()} with palette: {p}")
+    @classmethod
+    def base_theme(cls):
+        """The built-in ttk theme the palettes are layered on: clam if available."""
+        if cls._base_theme is None:
+            available = cls.style.theme_names()
+            cls._base_theme = next((t for t in ("clam", "vista", "xpnative") if t in available), "default")
+            print(f"Using '{cls._base_theme}' base theme.")
+        return cls._base_theme
+
+    @staticmethod
+    def ttk_theme_name(name):
+        return "smartplate-" + name.lower().replace(" ", "-")
 
-        # --- ✅ Base Theme: Corrected Try/Except Indentation ---
-        try:
-            cls.style.theme_use('clam')
-            print("Using 'clam' base theme.")
-        except tk.TclError:
-            print("Warning: 'clam' theme not available, trying others...")
+    @classmethod
+    def style_set(cls, name):
+        """ttk theme settings for one palette; built once and cached."""
+        if name in cls._style_sets: return cls._style_sets[name]
+        p = cls.PALETTES[name]
+        accent_fg = p['text'] # Main text color reads well on every accent
+        settings = {
+            '.': {'configure': {'background': p['bg'], 'foreground': p['text'], 'fieldbackground': p['panel'], 'insertcolor': p['text'], 'font': ('Segoe UI', 10)}},
+            'TFrame': {'configure': {'background': p['bg']}},
+            'TLabel': {'configure': {'background': p['bg'], 'foreground': p['text']}},
+            'Accent.TLabel': {'configure': {'foreground': p['accent']}}, # Page titles
+            'Muted.TLabel': {'configure': {'foreground': p['muted']}}, # Hints and status lines
+            'TButton': {'configure': {'background': p['panel'], 'foreground': p['text'], 'font': ('Segoe UI', 10, 'bold'), 'borderwidth': 0, 'padding': (10, 5), 'relief': 'flat'},
+                        'map': {'background': [('active', p['muted']), ('disabled', p['panel'])], 'foreground': [('disabled', p['muted']), ('active', p['text']), ('!disabled', p['text'])]}},
+            'Accent.TButton': {'configure': {'background': p['accent'], 'foreground': accent_fg, 'font': ('Segoe UI', 10, 'bold'), 'borderwidth': 0, 'padding': (10, 5), 'relief': 'flat'},
+                               'map': {'background': [('active', p['text']), ('disabled', p['panel']), ('!disabled', p['accent'])], 'foreground': [('active', p['accent']), ('disabled', p['muted']), ('!disabled', accent_fg)]}},
+            'TEntry': {'configure': {'fieldbackground': p['panel'], 'foreground': p['text'], 'bordercolor': p['muted'], 'insertcolor': p['text'], 'borderwidth': 1},
+                       'map': {'bordercolor': [('focus', p['accent'])]}},
+            'Focus.TEntry': {'configure': {'bordercolor': p['accent'], 'fieldbackground': p['panel']}}, # ThemedEntry while it has focus
+            'TCombobox': {'configure': {'fieldbackground': p['panel'], 'background': p['panel'], 'foreground': p['text'], 'bordercolor': p['muted'], 'arrowcolor': p['text']},
+                          'map': {'fieldbackground': [('readonly', p['panel'])], 'bordercolor': [('focus', p['accent'])]}},
+            'Horizontal.TProgressbar': {'configure': {'background': p['accent'], 'troughcolor': p['panel'], 'bordercolor': p['panel'], 'lightcolor': p['accent'], 'darkcolor': p['accent']}},
+            'Treeview': {'configure': {'background': p['panel'], 'fieldbackground': p['panel'], 'foreground': p['text'], 'rowheight': 25},
+                         'map': {'background': [('selected', p['accent'])], 'foreground': [('selected', accent_fg)]},
+                         'layout': [('Treeview.treearea', {'sticky': 'nswe'})]},
+            'Treeview.Heading': {'configure': {'font': ('Segoe UI', 10, 'bold'), 'background': p['bg'], 'foreground': p['text'], 'padding': 8, 'relief': 'flat', 'borderwidth': 0},
+                                 'map': {'background': [('active', p['muted'])]}},
+        }
+        cls._style_sets[name] = settings
+        return settings
+
+    # --- Raw tk widgets (ttk styles don't reach them) ---
+    @classmethod
+    def register(cls, widget, recolor):
+        """Colors `widget` with recolor(palette) now and again after every theme change, until it is destroyed."""
+        recolor(cls.palette()); cls._registered.append((widget, recolor))
+
+    @classmethod
+    def recolor_registered(cls):
+        p = cls.palette(); alive = []
+        for widget, recolor in cls._registered:
             try:
-                cls.style.theme_use('vista')
-                print("Using 'vista' base theme.")
-            except tk.TclError:
-                try:
-                    cls.style.theme_use('xpnative')
-                    print("Using 'xpnative' base theme.")
-                except tk.TclError:
-                    print("Error: Could not set any custom base theme (clam, vista, xpnative).")
-                    try:
-                         cls.style.theme_use('default') # Last resort
-                         print("Using 'default' base theme.")
-                    except tk.TclError:
-                         print("FATAL: No ttk themes seem to be available.")
-        # --- End Correction ---
-
-
-        # --- Calculate Contrasting Foreground for Accent ---
-        try:
-             hex_color = p['accent'].lstrip('#')
-             rgb = tuple(int(hex_color[i:i+2], 16) for i in (0, 2, 4))
-             luminance = (rgb[0]*299 + rgb[1]*587 + rgb[2]*114) / 1000
-             accent_fg = p['text'] # Use main text color
-             print(f"Calculated accent foreground: {accent_fg}")
-        except Exception as e:
-             print(f"Warn: Contrast calc failed: {e}. Falling back.")
-             accent_fg = p['bg'] # Fallback contrast
-
-        # --- Configure Global Styles ---
-        cls.style.configure('.', background=p['bg'], foreground=p['text'],
-                            fieldbackground=p['panel'], insertcolor=p['text'],
-                            font=('Segoe UI', 10))
-
-        # --- Specific Widget Styles (Keep as before) ---
-        cls.style.configure('TFrame', background=p['bg'])
-        cls.style.configure('TLabel', background=p['bg'], foreground=p['text'])
-        cls.style.configure('TButton', background=p['panel'], foreground=p['text'], font=('Segoe UI', 10, 'bold'), borderwidth=0, padding=(10, 5), relief='flat')
-        cls.style.map('TButton', background=[('active', p['muted']), ('disabled', p['panel'])], foreground=[('disabled', p['muted']), ('active', p['text']), ('!disabled', p['text'])])
-        cls.style.configure('Accent.TButton', background=p['accent'], foreground=accent_fg, font=('Segoe UI', 10, 'bold'), borderwidth=0, padding=(10, 5), relief='flat')
-        cls.style.map('Accent.TButton', background=[('active', p['text']), ('disabled', p['panel']), ('!disabled', p['accent'])], foreground=[('active', p['accent']), ('disabled', p['muted']), ('!disabled', accent_fg)])
-        cls.style.configure('TEntry', fieldbackground=p['panel'], foreground=p['text'], bordercolor=p['muted'], insertcolor=p['text'], borderwidth=1)
-        cls.style.map('TEntry', bordercolor=[('focus', p['accent'])])
-        cls.style.configure('TCombobox', fieldbackground=p['panel'], background=p['panel'], foreground=p['text'], bordercolor=p['muted'], arrowcolor=p['text'])
-        cls.style.map('TCombobox', fieldbackground=[('readonly', p['panel'])], bordercolor=[('focus', p['accent'])])
-        cls.style.configure('Treeview', background=p['panel'], fieldbackground=p['panel'], foreground=p['text'], rowheight=25)
-        cls.style.map('Treeview', background=[('selected', p['accent'])], foreground=[('selected', accent_fg)])
-        cls.style.configure('Treeview.Heading', font=('Segoe UI', 10, 'bold'), background=p['bg'], foreground=p['text'], padding=8, relief='flat', borderwidth=0)
-        cls.style.map('Treeview.Heading', background=[('active', p['muted'])])
-        try: cls.style.layout("Treeview", [('Treeview.treearea', {'sticky': 'nswe'})])
-        except tk.TclError: print("Warn: Treeview layout failed.")
+                if not widget.winfo_exists(): continue
+                recolor(p); alive.append((widget, recolor))
+            except tk.TclError: pass # Destroyed while we were iterating
+        cls._registered = alive
 
     @classmethod
     def load_settings(cls):
@@ -120,6 +133,7 @@ class ThemeManager:
              cls._theme = cls.DEFAULT # Ensure defaults on error
              cls._spoonacular_api_key = ""
              cls._groq_api_key = ""
+        cls._credentials_version += 1
 
     @classmethod
     def save_settings(cls):
@@ -148,7 +162,7 @@ class ThemeManager:
     # --- API Key Management ---
     @classmethod
     def save_spoonacular_api_key(cls, api_key):
-        cls._spoonacular_api_key = api_key; cls.save_settings()
+        cls._spoonacular_api_key = api_key; cls._credentials_version += 1; cls.save_settings()
     @classmethod
     def get_spoonacular_api_key(cls):
         return cls._spoonacular_api_key
@@ -156,7 +170,11 @@ class ThemeManager:
     @classmethod
     def save_groq_api_key(cls, api_key):
         print(f"Updating Groq API Key: '{api_key[:4]}...'")
-        cls._groq_api_key = api_key; cls.save_settings()
+        cls._groq_api_key = api_key; cls._credentials_version += 1; cls.save_settings()
+    @classmethod
+    def credentials_version(cls):
+        """Changes every time the saved API keys may have changed (load or save)."""
+        return cls._credentials_version
     @classmethod
     def get_groq_api_key(cls):
         print(f"Client getting Groq API Key: '{cls._groq_api_key[:4]}...'")
@@ -0,0 +1,45 @@
+# smartplate/trends.py
+"""Calorie and macro trends over the last 7/30/90/365 days, with rolling averages.
+
+Reads only the daily_nutrition rollup (one row per logged day), never meal rows, and does the
+post-processing (gap filling, rolling means, averages, slope) with vectorized NumPy.
+"""
+import datetime
+import numpy as np
+from .db import get_daily_history
+
+# View name -> (days shown, rolling-average window in days)
+TREND_VIEWS = {"7 days": (7, 3), "30 days": (30, 7), "90 days": (90, 7), "365 days": (365, 30)}
+TREND_METRICS = {"calories": ("Calories", "kcal"), "protein_g": ("Protein", "g"), "carbs_g": ("Carbs", "g"), "fat_g": ("Fat", "g"),
+                 "fiber_g": ("Fiber", "g"), "sugar_g": ("Sugar", "g"), "sodium_mg": ("Sodium", "mg")}
+
+def rolling_mean(values, window):
+    """Mean of the logged (non-NaN) values in each trailing window; NaN where the window has none."""
+    logged = ~np.isnan(values)
+    sums = np.concatenate(([0.0], np.cumsum(np.where(logged, values, 0.0))))
+    counts = np.concatenate(([0], np.cumsum(logged)))
+    window_sums = sums[window:] - sums[:-window]; window_counts = counts[window:] - counts[:-window]
+    with np.errstate(invalid="ignore", divide="ignore"): return np.where(window_counts > 0, window_sums / window_counts, np.nan)
+
+def get_trend(user_id, days, window, end_date=None):
+    """Per-day series for the `days` ending at end_date (today by default).
+
+    Returns {"dates": datetime64[D] array, "days_logged", "series": {metric: {"daily", "rolling", "average", "slope_per_week"}}}.
+    Days without meals are NaN (not zero), so gaps don't drag the averages down. The rollup is read
+    from window-1 days earlier so the rolling average is complete from the first day shown.
+    """
+    end = np.datetime64(end_date or datetime.date.today().isoformat(), "D")
+    start = end - (days - 1); fetch_start = start - (window - 1)
+    rows = get_daily_history(user_id, str(fetch_start), str(end))
+    span = days + window - 1
+    offsets = (np.array([row["date_log"][:10] for row in rows], dtype="datetime64[D]") - fetch_start).astype(int) if rows else np.zeros(0, dtype=int)
+    dates = np.arange(start, end + 1)
+    shown = slice(window - 1, None); x = np.arange(days, dtype=float)
+    series = {}
+    for metric in TREND_METRICS:
+        values = np.full(span, np.nan); values[offsets] = [float(row[metric] or 0) for row in rows]
+        daily = values[shown]; logged = ~np.isnan(daily)
+        slope = float(np.polyfit(x[logged], daily[logged], 1)[0] * 7) if logged.sum() >= 2 else None
+        series[metric] = {"daily": daily, "rolling": rolling_mean(values, window), "average": float(daily[logged].mean()) if logged.any() else None,
+                          "slope_per_week": slope}
+    return {"dates": dates, "days": days, "window": window, "days_logged": int((~np.isnan(series["calories"]["daily"])).sum()), "series": series}
\ No newline at end of file
@@ -0,0 +1,182 @@
+# smartplate/ui/virtual_table.py
+"""A Treeview that shows a scrolling window over a large in-memory list of rows.
+
+RowModel keeps the rows sorted and indexed by id, so adding, editing or removing one row is a
+binary search plus a list shift. VirtualTable creates Tk items only for the rows on screen, and
+applies scrolling and model changes as a diff (delete/insert/move/update of the items that
+differ), so the Tk work per change depends on the window height, not on the number of rows.
+"""
+import bisect
+import tkinter as tk
+from tkinter import ttk
+
+WHEEL_ROWS = 3 # Rows scrolled per mouse wheel notch
+PREFETCH_ROWS = 50 # on_near_end fires when the window gets this close to the last loaded row
+
+class RowModel:
+    """Rows ordered by sort_key(row) ascending (the key must be unique, e.g. end with the id), indexed by row["id"].
+
+    Rows are treated as immutable: to change one, upsert a new dict.
+    """
+
+    def __init__(self, sort_key):
+        self.sort_key = sort_key
+        self._keys = []; self._rows = []; self._by_id = {}
+
+    def __len__(self):
+        return len(self._rows)
+
+    def get(self, row_id):
+        return self._by_id.get(row_id)
+
+    def window(self, start, count):
+        return self._rows[start:start + count]
+
+    def index(self, row_id):
+        row = self._by_id.get(row_id)
+        return bisect.bisect_left(self._keys, self.sort_key(row)) if row is not None else None
+
+    @property
+    def last_key(self):
+        return self._keys[-1] if self._keys else None
+
+    def clear(self):
+        self._keys.clear(); self._rows.clear(); self._by_id.clear()
+
+    def upsert(self, row):
+        """Adds a row or replaces the one with the same id (moving it if its key changed). Returns its index."""
+        self.remove([row["id"]]); key = self.sort_key(row)
+        if not self._keys or key > self._keys[-1]: index = len(self._keys); self._keys.append(key); self._rows.append(row) # Next page: append
+        else: index = bisect.bisect_left(self._keys, key); self._keys.insert(index, key); self._rows.insert(index, row)
+        self._by_id[row["id"]] = row
+        return index
+
+    def extend(self, rows):
+        for row in rows: self.upsert(row)
+
+    def remove(self, row_ids):
+        """Drops the rows with these ids (unknown ids are ignored). Returns how many were removed."""
+        removed = 0
+        for row_id in row_ids:
+            row = self._by_id.pop(row_id, None)
+            if row is None: continue
+            index = bisect.bisect_left(self._keys, self.sort_key(row)); del self._keys[index]; del self._rows[index]; removed += 1
+        return removed
+
+    def replace_head(self, rows, complete=False):
+        """Makes the model start with `rows`, a freshly fetched first page in display order.
+
+        Rows up to the page's last key that aren't in it are dropped; rows after it are kept, unless
+        `complete` says the page holds everything. Unchanged rows aren't touched.
+        """
+        fresh = {row["id"] for row in rows}
+        end = len(self._keys) if complete or not rows else bisect.bisect_right(self._keys, self.sort_key(rows[-1]))
+        self.remove([row["id"] for row in self._rows[:end] if row["id"] not in fresh])
+        for row in rows:
+            if self._by_id.get(row["id"]) != row: self.upsert(row)
+
+class VirtualTable:
+    """Shows model rows [top, top + visible rows) in `tree`; the scrollbar, wheel and arrow keys move `top`.
+
+    values(row) gives an item's column values. on_near_end() is called when the window nears the last
+    loaded row (to fetch the next page). The selection is kept here as row ids, so rows stay selected
+    while scrolled out of the window; the Treeview only mirrors the part that is on screen.
+    """
+
+    def __init__(self, tree, scrollbar, model, values, on_near_end=None):
+        self.tree = tree; self.scrollbar = scrollbar; self.model = model; self.values = values; self.on_near_end = on_near_end
+        self.top = 0
+        self._shown = [] # Row ids of the Treeview items, top to bottom
+        self._shown_values = {} # Row id -> values last written to its item
+        self.selected = set() # Selected row ids, on screen or not
+        self._shown_selected = set() # The part of `selected` the Treeview currently shows as selected
+        scrollbar.configure(command=self.on_scrollbar); tree.configure(yscrollcommand=lambda first, last: None) # The tree never scrolls itself
+        tree.bind("<Configure>", lambda e: self.refresh(), add="+")
+        tree.bind("<ButtonPress-1>", self.on_click, add="+"); tree.bind("<<TreeviewSelect>>", self.on_tree_select, add="+")
+        for sequence in ("<MouseWheel>", "<Button-4>", "<Button-5>"): tree.bind(sequence, self.on_wheel)
+        tree.bind("<Up>", lambda e: self.move_focus(-1)); tree.bind("<Down>", lambda e: self.move_focus(1))
+        tree.bind("<Prior>", lambda e: self.move_focus(-self.visible_rows())); tree.bind("<Next>", lambda e: self.move_focus(self.visible_rows()))
+        tree.bind("<Home>", lambda e: self.move_focus(-len(self.model))); tree.bind("<End>", lambda e: self.move_focus(len(self.model)))
+
+    def row_height(self):
+        try: return int(ttk.Style().lookup(self.tree.cget("style") or "Treeview", "rowheight") or 25)
+        except (tk.TclError, ValueError): return 25
+
+    def visible_rows(self):
+        """Rows that fit below the heading (measured from the first item once there is one)."""
+        box = self.tree.bbox(self._shown[0]) if self._shown else None
+        header = box[1] if box else self.row_height()
+        return max(1, (self.tree.winfo_height() - header) // self.row_height())
+
+    # --- Scrolling ---
+    def scroll_to(self, top):
+        self.top = max(0, min(int(top), len(self.model) - self.visible_rows())); self.render()
+
+    def refresh(self):
+        """Re-renders after the model changed (or the tree was resized)."""
+        self.scroll_to(self.top)
+
+    def see(self, row_id):
+        """Scrolls the least needed to bring a row into the window."""
+        index = self.model.index(row_id)
+        if index is None: return
+        visible = self.visible_rows()
+        if index < self.top: self.scroll_to(index)
+        elif index >= self.top + visible: self.scroll_to(index - visible + 1)
+
+    def on_scrollbar(self, action, amount, unit=None):
+        if action == "moveto": self.scroll_to(float(amount) * len(self.model))
+        else: self.scroll_to(self.top + int(amount) * (self.visible_rows() if unit == "pages" else 1))
+
+    def on_wheel(self, event):
+        if event.num == 4: step = -WHEEL_ROWS
+        elif event.num == 5: step = WHEEL_ROWS
+        else: step = -WHEEL_ROWS if event.delta > 0 else WHEEL_ROWS
+        self.scroll_to(self.top + step); return "break"
+
+    def move_focus(self, delta):
+        """Arrow and page keys: moves the focused row through the whole model, scrolling as needed."""
+        if not len(self.model): return "break"
+        focus = self.tree.focus(); index = self.model.index(int(focus)) if focus else None
+        index = 0 if index is None else max(0, min(index + delta, len(self.model) - 1))
+        row_id = self.model.window(index, 1)[0]["id"]
+        self.selected = {row_id}; self.see(row_id); self.tree.focus(row_id); self.render()
+        return "break"
+
+    # --- Selection ---
+    def selected_ids(self):
+        """Selected row ids in display order, including rows scrolled out of the window."""
+        return sorted((row_id for row_id in self.selected if self.model.get(row_id) is not None), key=self.model.index)
+
+    def on_click(self, event):
+        """A plain click starts a new selection, so rows selected off screen are dropped too (Ctrl/Shift-click extend it)."""
+        if not event.state & 0x0005 and self.tree.identify_region(event.x, event.y) in ("cell", "tree"): self.selected &= set(self._shown)
+
+    def on_tree_select(self, event=None):
+        """Takes the on-screen part of the selection from the Treeview (it changed it for a click) and keeps the rest."""
+        shown = set(self._shown); self._shown_selected = {int(iid) for iid in self.tree.selection()}
+        self.selected = (self.selected - shown) | self._shown_selected
+
+    # --- Rendering ---
+    def render(self):
+        """Makes the Treeview items match the window: only rows that left, arrived, moved or changed cost a Tk call."""
+        rows = self.model.window(self.top, self.visible_rows() + 1) # +1 fills the partly visible bottom line
+        wanted = [row["id"] for row in rows]; wanted_set = set(wanted)
+        gone = [row_id for row_id in self._shown if row_id not in wanted_set]
+        if gone: self.tree.delete(*gone)
+        current = [row_id for row_id in self._shown if row_id in wanted_set]; shown_values = {}
+        for index, row in enumerate(rows):
+            row_id = row["id"]; values = self.values(row); shown_values[row_id] = values
+            if row_id not in self._shown_values:
+                self.tree.insert("", index, iid=row_id, values=values); current.insert(index, row_id); continue
+            if self._shown_values[row_id] != values: self.tree.item(row_id, values=values)
+            if current[index] != row_id: self.tree.move(row_id, "", index); current.remove(row_id); current.insert(index, row_id)
+        self._shown = wanted; self._shown_values = shown_values
+        self.selected = {row_id for row_id in self.selected if self.model.get(row_id) is not None} # Rows removed from the model
+        shown_selected = self.selected & wanted_set
+        if shown_selected != self._shown_selected & wanted_set: self.tree.selection_set(list(shown_selected)) # Re-select rows scrolled back in
+        self._shown_selected = shown_selected
+        if self.tree.yview()[0] > 0: self.tree.yview_moveto(0) # Undo any scrolling the tree did on its own
+        total = len(self.model)
+        self.scrollbar.set(*((self.top / total, min(1.0, (self.top + len(rows)) / total)) if total else (0.0, 1.0)))
+        if self.on_near_end and self.top + len(rows) >= total - PREFETCH_ROWS: self.tree.after_idle(self.on_near_end)
\ No newline at end of file
@@ -1,7 +1,6 @@
 # smartplate/ui/widgets.py
 import tkinter as tk
 from tkinter import ttk
-from .theme_manager import ThemeManager
 
 # --- Basic Themed Widgets ---
 
@@ -16,10 +15,7 @@ class ThemedEntry(ttk.Entry):
         super().__init__(master, style=style, **kwargs)
         # Add border highlighting on focus
         self.bind("<FocusIn>", lambda e: self.configure(style='Focus.TEntry'))
-        self.bind("<FocusOut>", lambda e: self.configure(style='TEntry'))
-        # Create the focused style if it doesn't exist
-        s = ttk.Style()
-        s.configure('Focus.TEntry', bordercolor=ThemeManager.accent(), fieldbackground=ThemeManager.palette()['panel'])
+        self.bind("<FocusOut>", lambda e: self.configure(style='TEntry')) # Focus.TEntry is part of each palette's style set
 
 
 class ThemedButton(ttk.Button):